@@ -1,9 +1,7 @@
 import os
+import sys
 import json
 import requests
-from bs4 import BeautifulSoup
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 
 # Configuration
@@ -12,7 +10,19 @@ HEADERS = {
     'Accept-Language': 'en-US,en;q=0.9'
 }
 MAX_THREADS = 5  # Number of concurrent requests
-DELAY_SECONDS = 1  # Delay between requests to avoid getting blocked
+REQUESTS_PER_SECOND = 5  # Starting per-host rate; adapts to how the site responds
+ARCHIVE_PAGES = True  # Keep every fetched profile in .page_archive/ for --from-archive re-parsing
+
+# Repository root, for the shared modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+import http_client  # noqa: E402
+import metrics  # noqa: E402
+from http_client import fetch  # noqa: E402
+from crawl_engine import run_crawl  # noqa: E402
+from page_archive import PageArchive, replay  # noqa: E402
+from html_parsers import make_soup  # noqa: E402
+from doctor_records import DoctorRecord, to_json  # noqa: E402
+from jsonl_io import OUTPUT_FORMAT, JsonlWriter, iter_records, latest_outputs  # noqa: E402
 
 def load_json_data(filename):
     """Load JSON data from file."""
@@ -22,15 +32,24 @@ def load_json_data(filename):
 def save_json_data(data, filename):
     """Save JSON data to file."""
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2, default=to_json)
 
 def scrape_doctor_details(url):
     """Scrape detailed information from a doctor's profile page."""
     try:
-        time.sleep(DELAY_SECONDS)
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        details = parse_doctor_details(response.text, url)
+        return DoctorRecord.from_dict(details) if details else None
+
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to fetch {url}: {str(e)}")
+        return None
+
+def parse_doctor_details(html, url):
+    """Extract detailed information from a doctor's profile page."""
+    try:
+        soup = make_soup(html)
         
         doctor_data = {
             "profile_url": url,
@@ -114,21 +133,24 @@ def scrape_doctor_details(url):
 
         return doctor_data
 
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to fetch {url}: {str(e)}")
-        return None
     except Exception as e:
         print(f"Error parsing doctor details from {url}: {str(e)}")
         return None
 
-def process_doctors(input_file, output_dir):
-    """Process all doctors from input file and save detailed info to output directory."""
+def process_doctors(input_file, output_dir, from_archive=False):
+    """Process all doctors from input file and save detailed info to output directory.
+
+    With from_archive the profiles are re-parsed from the page archive instead
+    of fetched; doctors whose profile is not archived keep their saved record.
+    """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
     district_data = load_json_data(input_file)
     district_name = district_data.get("district", "unknown").lower()
-    output_file = os.path.join(output_dir, f'doctors-details-{district_name}.json')
+    output_file = os.path.join(output_dir, f'doctors-details-{district_name}.{OUTPUT_FORMAT}')
+    saved = latest_outputs([os.path.join(output_dir, f'doctors-details-{district_name}.{extension}')
+                            for extension in ("json", "jsonl")])
     
     all_doctors = []
     
@@ -146,30 +168,71 @@ def process_doctors(input_file, output_dir):
     total_doctors = len(all_doctors)
     print(f"Found {total_doctors} doctors with chamber links in {district_name}")
     
-    # Process doctor details concurrently
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_doctor = {
-            executor.submit(scrape_doctor_details, doctor["chamber_link"]): doctor
-            for doctor in all_doctors
-        }
-        
-        processed_doctors = []
-        for future in as_completed(future_to_doctor):
-            doctor = future_to_doctor[future]
-            try:
-                details = future.result()
-                if details:
-                    # Merge basic info with scraped details
-                    merged = {
-                        **doctor,
-                        **details,
-                        "source_hospital": doctor["hospital_name"],
-                        "source_hospital_link": doctor["hospital_link"]
-                    }
-                    processed_doctors.append(merged)
-                    print(f"Processed {doctor['name']}")
-            except Exception as e:
-                print(f"Error processing {doctor['name']}: {str(e)}")
+    # Process doctor details concurrently; JSONL output is written as each profile completes
+    processed_doctors = []
+    writer = JsonlWriter(output_file) if OUTPUT_FORMAT == "jsonl" else None
+    missing = []
+
+    def save(merged):
+        if writer is not None:
+            with metrics.STAGE_SECONDS.time(stage="write"):
+                writer.write(merged)
+            metrics.RECORDS.inc(stage="write")
+        else:
+            processed_doctors.append(merged)
+
+    def collect(doctor, details):
+        metrics.RECORDS.inc(stage="fetch" if details else "fetch_failed")
+        if details:
+            # Merge basic info with scraped details
+            with metrics.STAGE_SECONDS.time(stage="merge"):
+                merged = DoctorRecord.from_dict({
+                    **doctor,
+                    **details,
+                    "source_hospital": doctor["hospital_name"],
+                    "source_hospital_link": doctor["hospital_link"]
+                })
+            metrics.RECORDS.inc(stage="merge")
+            save(merged)
+            print(f"Processed {doctor['name']}")
+        else:
+            missing.append(doctor)
+
+    jobs = ((doctor, doctor["chamber_link"]) for doctor in all_doctors)
+    archive = PageArchive() if ARCHIVE_PAGES or from_archive else None
+    try:
+        if from_archive:
+            _, report = replay(jobs, parse_doctor_details, on_result=collect, archive=archive)
+            print(f"Replay: {json.dumps(report)}")
+            previous = {(record.get("chamber_link"), record.get("source_hospital")): record
+                        for record in iter_records(saved[-1], key='doctors')} if saved else {}
+            kept = [previous[key] for key in ((doctor["chamber_link"], doctor["hospital_name"]) for doctor in missing)
+                    if key in previous]
+            for record in kept:
+                save(DoctorRecord.from_dict(record))
+            print(f"Kept the saved records of {len(kept)} doctors not in the archive")
+        else:
+            run_crawl(
+                jobs,
+                parse_doctor_details,
+                on_result=collect,
+                concurrency=MAX_THREADS,
+                rate=REQUESTS_PER_SECOND,
+                headers=HEADERS,
+                archive=archive
+            )
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+    finally:
+        if archive is not None:
+            archive.close()
+    
+    if writer is not None:
+        writer.commit()
+        print(f"Saved {writer.count} doctor details for {district_name} to {output_file}")
+        return
     
     # Save all doctor details
     result = {
@@ -178,7 +241,9 @@ def process_doctors(input_file, output_dir):
         "doctors": processed_doctors
     }
     
-    save_json_data(result, output_file)
+    with metrics.STAGE_SECONDS.time(stage="write"):
+        save_json_data(result, output_file)
+    metrics.RECORDS.inc(len(processed_doctors), stage="write")
     print(f"Saved detailed doctor data for {district_name} to {output_file}")
 
 if __name__ == "__main__":
@@ -186,4 +251,9 @@ if __name__ == "__main__":
     input_json = "hospitals-narayanganj.json"
     output_directory = "Doctor Details"
     
-    process_doctors(input_json, output_directory)
\ No newline at end of file
+    # --from-archive re-parses the archived profiles without touching the network
+    from_archive = "--from-archive" in sys.argv[1:]
+    process_doctors(input_json, output_directory, from_archive)
+    metrics.save_crawl_summary("db_for_chamber_link-archive" if from_archive else "db_for_chamber_link")
+    if not from_archive:
+        print(f"Fetch stats: {http_client.stats.summary()}")
\ No newline at end of file
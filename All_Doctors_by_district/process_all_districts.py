@@ -1,9 +1,7 @@
 import os
+import sys
 import json
-import requests
-from bs4 import BeautifulSoup
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin
 
 # Configuration
@@ -12,9 +10,26 @@ HEADERS = {
     'Accept-Language': 'en-US,en;q=0.9'
 }
 MAX_THREADS = 5  # Number of concurrent requests
-DELAY_SECONDS = 1  # Delay between requests
+REQUESTS_PER_SECOND = 5  # Starting per-host rate; adapts to how the site responds
+PARSE_WORKERS = os.cpu_count() or 2  # Processes parsing fetched profiles
+USE_HTTP_CACHE = True  # Send conditional GETs and reuse unchanged profiles from .http_cache/
+ARCHIVE_PAGES = True  # Keep every fetched profile in .page_archive/ for --from-archive re-parsing
+USE_FRONTIER = True  # Share fetched profiles across districts through the crawl frontier (.crawl_frontier/)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Parent folder path
 
+sys.path.insert(0, os.path.dirname(BASE_DIR))  # Repository root, for the shared modules
+import http_client  # noqa: E402
+import metrics  # noqa: E402
+from http_client import fetch  # noqa: E402
+from crawl_pipeline import run_pipeline  # noqa: E402
+from checkpoint_journal import CheckpointJournal  # noqa: E402
+from crawl_frontier import CrawlFrontier  # noqa: E402
+from page_archive import PageArchive, replay  # noqa: E402
+from http_cache import HttpCache, fetch_parsed  # noqa: E402
+from html_parsers import parse_doctor_profile  # noqa: E402
+from doctor_records import DoctorRecord, to_json  # noqa: E402
+from jsonl_io import OUTPUT_FORMAT, JsonlWriter, iter_records, latest_outputs  # noqa: E402
+
 DISTRICTS = [
     "barisal"
 ]
@@ -35,101 +50,86 @@ def save_json_data(data, filename):
     """Save JSON data to file."""
     os.makedirs(os.path.dirname(filename), exist_ok=True)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2, default=to_json)
 
-def scrape_doctor_details(url):
+def scrape_doctor_details(url, cache=None):
     """Scrape detailed information from a doctor's profile page."""
     try:
-        time.sleep(DELAY_SECONDS)
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        doctor_data = {
-            "profile_url": url,
-            "name": None,
-            "photo": None,
-            "qualification": None,
-            "specialty": None,
-            "designation": None,
-            "workplace": None,
-            "rating": None,
-            "chambers": []
-        }
-        
-        # Extract basic info
-        header = soup.find('header', class_='entry-header')
-        if header:
-            # Photo
-            photo = header.find('img')
-            if photo:
-                doctor_data["photo"] = photo.get('src')
-            
-            # Name
-            name = header.find('h1', class_='entry-title')
-            if name:
-                doctor_data["name"] = name.get_text(strip=True)
-            
-            # Details from info list
-            info_items = header.select('div.info ul li')
-            if info_items:
-                if len(info_items) > 0:
-                    doctor_data["qualification"] = info_items[0].get_text(strip=True)
-                if len(info_items) > 1:
-                    doctor_data["specialty"] = info_items[1].get_text(strip=True)
-                if len(info_items) > 2:
-                    doctor_data["designation"] = info_items[2].get_text(strip=True)
-                if len(info_items) > 3:
-                    doctor_data["workplace"] = info_items[3].get_text(strip=True)
-            
-            # Rating
-            rating_div = header.find('div', class_='ssr-rating')
-            if rating_div:
-                doctor_data["rating"] = rating_div.get_text(strip=True)
-
-        # Extract chamber information
-        entry_content = soup.find('div', class_='entry-content')
-        if entry_content:
-            chambers = []
-            h2_tags = entry_content.find_all('h2')
-            
-            for h2 in h2_tags:
-                if 'chamber' in h2.get_text().lower() or 'appointment' in h2.get_text().lower():
-                    next_p = h2.find_next('p')
-                    if next_p:
-                        chamber_info = next_p.get_text('\n', strip=True).split('\n')
-                        chamber = {}
-                        
-                        for line in chamber_info:
-                            if 'address' in line.lower():
-                                chamber["address"] = line.split(':', 1)[-1].strip()
-                            elif 'hour' in line.lower():
-                                chamber["visiting_hour"] = line.split(':', 1)[-1].strip() if ':' in line else line.strip()
-                            elif 'appointment' in line.lower():
-                                chamber["appointment"] = line.split(':', 1)[-1].strip()
-                            else:
-                                chamber["name"] = line.strip()
-                        
-                        chamber_link = next_p.find('a')
-                        if chamber_link:
-                            chamber["url"] = chamber_link.get('href')
-                        
-                        chambers.append(chamber)
-            
-            doctor_data["chambers"] = chambers
-
-        return doctor_data
+        if cache is not None:
+            details = fetch_parsed(url, parse_doctor_details, cache, headers=HEADERS, timeout=10)
+        else:
+            response = fetch(url, headers=HEADERS, timeout=10)
+            response.raise_for_status()
+            details = parse_doctor_details(response.text, url)
+        return DoctorRecord.from_dict(details) if details else None
+
+    except Exception as e:
+        print(f"Error processing {url}: {str(e)}")
+        return None
+
+def parse_doctor_details(html, url):
+    """Extract detailed information from a doctor's profile page."""
+    try:
+        return parse_doctor_profile(html, url)
 
     except Exception as e:
         print(f"Error processing {url}: {str(e)}")
         return None
 
-def process_district(district):
-    """Process all doctors for a single district."""
+def collect_doctors(district_data):
+    """Collect all doctors with chamber links from a district's hospital listing."""
+    all_doctors = []
+    for hospital in district_data.get("hospitals", []):
+        for doctor in hospital.get("doctors", []):
+            if doctor.get("chamber_link"):
+                all_doctors.append({
+                    "name": doctor["name"],
+                    "chamber_link": doctor["chamber_link"],
+                    "hospital_name": hospital["name"],
+                    "hospital_link": hospital.get("link", "")
+                })
+    return all_doctors
+
+def merge_details(doctor, details):
+    """Combine a hospital listing entry with the scraped profile details."""
+    return DoctorRecord.from_dict({
+        **doctor,
+        **details,
+        "source_hospital": doctor["hospital_name"],
+        "source_hospital_link": doctor["hospital_link"]
+    })
+
+def output_file(district, output_format=OUTPUT_FORMAT):
+    """Path of the district's doctor details in the given format."""
+    return os.path.join(BASE_DIR, "Doctor_Details", f"doctors-details-{district}.{output_format}")
+
+LISTING_FIELDS = ("chamber_link", "hospital_name", "hospital_link", "source_hospital", "source_hospital_link")
+
+def saved_details(district):
+    """{profile URL: details} from the district's saved output, without the listing fields merge_details adds."""
+    saved = latest_outputs([output_file(district, "json"), output_file(district, "jsonl")])
+    details = {}
+    if saved:
+        for record in iter_records(saved[-1], key='doctors'):
+            if record.get("chamber_link"):
+                details.setdefault(record["chamber_link"],
+                                   {k: v for k, v in record.items() if k not in LISTING_FIELDS})
+    return details
+
+def checkpoint_path(district):
+    """Path of the district's resume journal."""
+    return os.path.join(BASE_DIR, "Doctor_Details", ".checkpoints", f"doctors-details-{district}.jsonl")
+
+def process_district(district, from_archive=False, run_started=None):
+    """Process all doctors for a single district, resuming from its checkpoint journal.
+
+    Profiles the frontier got at or after run_started (default: now) are
+    reused instead of fetched. With from_archive every profile is re-parsed
+    from the page archive instead, ignoring the journal and the frontier;
+    profiles the archive does not have keep their previously saved details.
+    """
     input_dir = os.path.join(BASE_DIR, district)
     input_json = os.path.join(input_dir, f"hospitals-{district}.json")
-    output_dir = os.path.join(BASE_DIR, "Doctor_Details")
-    output_json = os.path.join(output_dir, f"doctors-details-{district}.json")
     
     if not os.path.exists(input_json):
         print(f"Skipping {district} - input file not found")
@@ -139,64 +139,197 @@ def process_district(district):
     if not district_data:
         return
     
-    all_doctors = []
+    all_doctors = collect_doctors(district_data)
     
-    # Collect all doctors with chamber links
-    for hospital in district_data.get("hospitals", []):
-        for doctor in hospital.get("doctors", []):
-            if doctor.get("chamber_link"):
-                all_doctors.append({
-                    "name": doctor["name"],
-                    "chamber_link": doctor["chamber_link"],
-                    "hospital_name": hospital["name"],
-                    "hospital_link": hospital.get("link", "")
-                })
+    # Profiles listed under several hospitals are fetched once and merged for each listing
+    profile_urls = list(dict.fromkeys(doctor["chamber_link"] for doctor in all_doctors))
+    journal = CheckpointJournal(checkpoint_path(district))
+    details_by_url = {} if from_archive else {
+        url: DoctorRecord.from_dict(details) for url, details in journal.load().items()
+    }
+    # Profiles another district already fetched during this run are not fetched again;
+    # ones from earlier runs are, so a recrawl never returns stale data
+    frontier = CrawlFrontier() if USE_FRONTIER and not from_archive else None
+    run_started = time.time() if run_started is None else run_started
+    shared = 0
+    if frontier is not None:
+        for url in profile_urls:
+            details = None if url in details_by_url else frontier.result(url, since=run_started)
+            if details:
+                details_by_url[url] = DoctorRecord.from_dict(details)
+                shared += 1
+    pending = [url for url in profile_urls if url not in details_by_url]
+    print(f"Processing {len(all_doctors)} doctors in {district} "
+          f"({len(profile_urls) - len(pending)} of {len(profile_urls)} profiles already fetched, "
+          f"{shared} shared with other districts)")
     
-    total_doctors = len(all_doctors)
-    print(f"Processing {total_doctors} doctors in {district}")
+    # In JSONL mode each listing is written out as soon as its profile is known
+    listings_by_url = {}
+    for doctor in all_doctors:
+        listings_by_url.setdefault(doctor["chamber_link"], []).append(doctor)
+    writer = JsonlWriter(output_file(district, "jsonl")) if OUTPUT_FORMAT == "jsonl" else None
+
+    def emit(url, details):
+        if writer is not None:
+            for doctor in listings_by_url[url]:
+                with metrics.STAGE_SECONDS.time(stage="merge"):
+                    merged = merge_details(doctor, details)
+                with metrics.STAGE_SECONDS.time(stage="write"):
+                    writer.write(merged)
+                metrics.RECORDS.inc(stage="merge")
+                metrics.RECORDS.inc(stage="write")
+
+    for url, details in details_by_url.items():
+        if url in listings_by_url:
+            emit(url, details)
+
+    # Process doctor details concurrently, journaling each profile as it completes
+    def collect(url, details):
+        metrics.RECORDS.inc(stage="fetch" if details else "fetch_failed")
+        if frontier is not None:
+            frontier.add(url, "profile", district)
+            if details:
+                frontier.complete(url, details)
+            else:
+                frontier.fail(url)
+        if details:
+            if not from_archive:
+                # Archive data never goes in the journal a later network run would resume from
+                journal.append(url, details)
+            details_by_url[url] = details = DoctorRecord.from_dict(details)
+            emit(url, details)
+            print(f"Processed {details.get('name') or url}")
+
+    # Fetching runs on the event loop while profiles are parsed in PARSE_WORKERS processes
+    cache = HttpCache() if USE_HTTP_CACHE and not from_archive else None
+    archive = PageArchive() if ARCHIVE_PAGES or from_archive else None
+    try:
+        with journal:
+            if from_archive:
+                _, report = replay(((url, url) for url in pending), parse_doctor_profile, on_result=collect,
+                                   archive=archive, workers=PARSE_WORKERS)
+            else:
+                _, report = run_pipeline(
+                    ((url, url) for url in pending),
+                    parse_doctor_profile,
+                    on_result=collect,
+                    concurrency=MAX_THREADS,
+                    rate=REQUESTS_PER_SECOND,
+                    headers=HEADERS,
+                    cache=cache,
+                    workers=PARSE_WORKERS,
+                    archive=archive
+                )
+    except BaseException:
+        if writer is not None:
+            writer.discard()  # the journal still holds every fetched profile
+        raise
+    finally:
+        if frontier is not None:
+            frontier.close()
+        if archive is not None:
+            archive.close()
+    print(f"Pipeline: {json.dumps(report)}")
+    if from_archive:
+        # Profiles missing from the archive (or failing to parse) keep what was saved before
+        previous = saved_details(district)
+        kept = 0
+        for url in profile_urls:
+            if url not in details_by_url and url in previous:
+                details_by_url[url] = details = DoctorRecord.from_dict(previous[url])
+                emit(url, details)
+                kept += 1
+        print(f"Kept the saved details of {kept} profiles not in the archive")
+    if cache is not None:
+        print(f"HTTP cache: {cache.stats}")
+        cache.close()
     
-    # Process doctor details concurrently
-    processed_doctors = []
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_doctor = {
-            executor.submit(scrape_doctor_details, doctor["chamber_link"]): doctor
-            for doctor in all_doctors
+    if writer is not None:
+        writer.commit()
+        print(f"Saved {writer.count} doctor details for {district}")
+    else:
+        with metrics.STAGE_SECONDS.time(stage="merge"):
+            processed_doctors = [
+                merge_details(doctor, details_by_url[doctor["chamber_link"]])
+                for doctor in all_doctors
+                if details_by_url.get(doctor["chamber_link"])
+            ]
+        metrics.RECORDS.inc(len(processed_doctors), stage="merge")
+        
+        # Save results
+        result = {
+            "district": district,
+            "total_doctors_processed": len(processed_doctors),
+            "doctors": processed_doctors
         }
         
-        for future in as_completed(future_to_doctor):
-            doctor = future_to_doctor[future]
-            details = future.result()
-            if details:
-                merged = {
-                    **doctor,
-                    **details,
-                    "source_hospital": doctor["hospital_name"],
-                    "source_hospital_link": doctor["hospital_link"]
-                }
-                processed_doctors.append(merged)
-                print(f"Processed {doctor['name']}")
+        with metrics.STAGE_SECONDS.time(stage="write"):
+            save_json_data(result, output_file(district, "json"))
+        metrics.RECORDS.inc(len(processed_doctors), stage="write")
+        print(f"Saved {len(processed_doctors)} doctor details for {district}")
+    if from_archive:
+        return
     
-    # Save results
-    result = {
-        "district": district,
-        "total_doctors_processed": len(processed_doctors),
-        "doctors": processed_doctors
-    }
+    # Keep the journal while some profiles failed so a rerun only retries those; journaled
+    # profiles the listing no longer has do not count
+    missing = [url for url in profile_urls if url not in details_by_url]
+    if not missing:
+        journal.remove()
+    else:
+        print(f"{len(missing)} profiles failed; rerun to retry them")
+
+def district_status(district):
+    """Report crawl progress for one district."""
+    input_json = os.path.join(BASE_DIR, district, f"hospitals-{district}.json")
+    saved = latest_outputs([output_file(district, "json"), output_file(district, "jsonl")])
+    district_data = load_json_data(input_json) if os.path.exists(input_json) else None
+    if not district_data:
+        return {"district": district, "state": "no input"}
     
-    save_json_data(result, output_json)
-    print(f"Saved {len(processed_doctors)} doctor details for {district}")
+    profile_urls = {doctor["chamber_link"] for doctor in collect_doctors(district_data)}
+    journal_path = checkpoint_path(district)
+    fetched = len(profile_urls.intersection(CheckpointJournal(journal_path).load()))
+    if os.path.exists(journal_path):
+        # A saved output next to a journal means the last run finished with failures
+        state = "partial" if saved else "in progress"
+    elif saved:
+        state = "done"
+        fetched = len(profile_urls)
+    else:
+        state = "not started"
+    return {"district": district, "state": state, "fetched": fetched, "total": len(profile_urls)}
 
-def main():
+def print_status():
+    """Print crawl progress for every configured district."""
+    for district in DISTRICTS:
+        status = district_status(district)
+        if "total" in status:
+            percent = 100 * status["fetched"] / status["total"] if status["total"] else 100
+            print(f"{district:<15} {status['state']:<12} {status['fetched']}/{status['total']} profiles ({percent:.0f}%)")
+        else:
+            print(f"{district:<15} {status['state']}")
+
+def main(from_archive=False):
     """Process all districts."""
     # Create output directory if it doesn't exist
     output_dir = os.path.join(BASE_DIR, "Doctor_Details")
     os.makedirs(output_dir, exist_ok=True)
     
     # Process each district
+    run_started = time.time()
     for district in DISTRICTS:
         print(f"\nStarting processing for {district}")
-        process_district(district)
+        process_district(district, from_archive, run_started)
+    # Per-stage metrics for the whole run, to find where the time went
+    metrics.save_crawl_summary("process_all_districts-archive" if from_archive else "process_all_districts")
+    if from_archive:
+        return
+    print(f"Fetch stats: {http_client.stats.summary()}")
 
 if __name__ == "__main__":
-    main()
-    print("\nAll districts processed successfully!")
\ No newline at end of file
+    if sys.argv[1:] == ["status"]:
+        print_status()
+    else:
+        # --from-archive re-parses the archived profiles without touching the network
+        main(from_archive="--from-archive" in sys.argv[1:])
+        print("\nAll districts processed successfully!")
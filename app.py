@@ -1,58 +1,181 @@
-from flask import Flask, jsonify
-import requests
-from bs4 import BeautifulSoup
+import os
+import time
+from flask import Flask, Response, g, jsonify, request
+import metrics
+from chamber_schedule import parse_moment
+from http_client import fetch
+from html_parsers import parse_doctor_articles
+from doctor_store import DEFAULT_PAGE_SIZE, INDEXED_FIELDS, DoctorStore
+from doctor_db import DoctorDatabase
+from doctor_records import Record
+from response_bodies import DYNAMIC_GZIP_LEVEL, ENCODINGS, BodyCache, EncodedBody, choose_encoding, etag_matches
+from response_cache import ResponseCache
+
+LIVE_CACHE_SECONDS = int(os.environ.get('LIVE_CACHE_SECONDS', 300))  # How long a live scrape is served as fresh
+LIVE_STALE_SECONDS = int(os.environ.get('LIVE_STALE_SECONDS', 3600))  # How long a stale scrape is served while refreshing
+# How long clients and proxies may reuse a dataset response before revalidating it with its ETag
+API_CACHE_SECONDS = int(os.environ.get('API_CACHE_SECONDS', 60))
+# 'json' loads the files into memory, 'snapshot' mmaps the binary snapshot, 'sqlite' reads doctor_db
+DATA_BACKEND = os.environ.get('DATA_BACKEND', 'json')
 
 app = Flask(__name__)
+_json_default = app.json.default
+app.json.default = lambda value: value.to_dict() if isinstance(value, Record) else _json_default(value)
+if DATA_BACKEND == 'sqlite':
+    # Built by python doctor_db.py or the standardize step's --database, never here in each worker.
+    # A rebuilt file is picked up, but nothing rebuilds it when the JSON files change
+    store = DoctorDatabase()
+else:
+    # Falls back to the JSON files while the snapshot is missing or older than them
+    store = DoctorStore(use_snapshot=DATA_BACKEND == 'snapshot')
+    store.load()
 
 def get_doctors():
     url = 'https://www.doctorbangladesh.com/doctors/'
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    # print(soup.prettify()[:1000])  # Print the first 1000 chars of the HTML
-
-    doctors = [] 
-    for article in soup.select('article.post.entry'):
-        header = article.select_one('header.entry-header')
-        if not header:
-            continue
-
-        name_tag = header.select_one('h2.entry-title a')
-        name = name_tag.text.strip() if name_tag else None
-        link = name_tag['href'] if name_tag else None
-
-        degree_tag = header.select_one('ul li[title="Degree"]')
-        degree = degree_tag.text.strip() if degree_tag else None
-
-        speciality_tag = header.select_one('li.speciality')
-        speciality = speciality_tag.text.strip() if speciality_tag else None
-
-        designation_tag = header.select_one('li[title="Designation"] strong')
-        designation = designation_tag.text.strip() if designation_tag else None
-
-        workplace_tag = header.select_one('li[title="Workplace"]')
-        workplace = workplace_tag.text.strip() if workplace_tag else None
-
-        img_tag = header.select_one('.photo img')
-        img_url = img_tag['src'] if img_tag else None
-
-        doctors.append({
-            'name': name,
-            'link': link,
-            'degree': degree,
-            'speciality': speciality,
-            'designation': designation,
-            'workplace': workplace,
-            'photo': img_url
-        })
-    return doctors
+    response = fetch(url, headers=headers)
+    return parse_doctor_articles(response.text)
+
+live_doctors = ResponseCache(get_doctors, ttl=LIVE_CACHE_SECONDS, stale_ttl=LIVE_STALE_SECONDS)
+
+REQUEST_SECONDS = metrics.histogram("api_request_seconds", "Time to handle an API request", ("endpoint",))
+RESPONSES = metrics.counter("api_responses_total", "API responses by endpoint and status", ("endpoint", "status"))
+RESPONSE_BYTES = metrics.counter("api_response_bytes_total", "Response body bytes sent", ("endpoint",))
+
+@app.before_request
+def _start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    # Label by route rather than path so /api/phones/<phone> stays one series
+    endpoint = request.endpoint or "not_found"
+    if 'started' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.started, endpoint=endpoint)
+    RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+    if not response.direct_passthrough:
+        RESPONSE_BYTES.inc(response.calculate_content_length() or 0, endpoint=endpoint)
+    return response
+
+# Responses that only depend on the dataset (and the query string) get ETags, compression and Cache-Control
+CACHEABLE_ENDPOINTS = {'api_doctors', 'api_search', 'api_phone_lookup', 'api_doctor_facets', 'api_visiting_hours'}
+bodies = BodyCache()
+
+def _encoded_response(body):
+    """Send the client's preferred coding of an EncodedBody, or a 304 if its ETag matches If-None-Match."""
+    encoding = choose_encoding(request.accept_encodings, [e for e in ENCODINGS if e in body.bodies])
+    headers = {
+        'ETag': body.etags[encoding],
+        'Cache-Control': f'public, max-age={API_CACHE_SECONDS}',
+        'Vary': 'Accept-Encoding',
+    }
+    if etag_matches(request.headers.get('If-None-Match'), body.etags):
+        return Response(status=304, headers=headers)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return Response(body.bodies[encoding], mimetype=body.mimetype, headers=headers)
+
+def _dataset_body(key, load):
+    # Serialized and compressed once per dataset version, not per request
+    return bodies.get(key, store.version(), lambda: EncodedBody(app.json.dumps(load()).encode('utf-8')))
+
+@app.after_request
+def _encode_dynamic(response):
+    # Registered after _record_request so it runs first and the metrics see the bytes actually sent
+    if (request.endpoint not in CACHEABLE_ENDPOINTS or response.status_code != 200
+            or 'ETag' in response.headers or response.direct_passthrough):
+        return response
+    encoded = _encoded_response(EncodedBody(response.get_data(), encodings=('gzip',), level=DYNAMIC_GZIP_LEVEL,
+                                            mimetype=response.mimetype))
+    encoded.headers['Cache-Control'] = response.headers.get('Cache-Control', encoded.headers['Cache-Control'])
+    return encoded
+
+if DATA_BACKEND == 'json':
+    # Warm the largest body so the first request does not build it. The other backends build it on first
+    # use instead: here it would decode the whole mmapped snapshot (or database) in every worker
+    _dataset_body('doctors', store.doctors)
+
+QUERY_PARAMS = set(INDEXED_FIELDS) | {'page', 'offset', 'limit', 'cursor', 'fields', 'open_at'}
+
+def _int_arg(name, default=None):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
 
 @app.route('/api/doctors', methods=['GET'])
 def api_doctors():
-    data = get_doctors()
-    return jsonify(data)
+    # The upstream scrape is only used when explicitly asked for with ?source=live
+    if request.args.get('source') == 'live':
+        response = jsonify(live_doctors.get())
+        response.headers['Cache-Control'] = f'public, max-age={LIVE_CACHE_SECONDS}'
+        return response
+    if not QUERY_PARAMS.intersection(request.args):
+        return _encoded_response(_dataset_body('doctors', store.doctors))
+
+    # Filtered, paginated query: repeated parameters (?district=a&district=b) are OR-ed
+    filters = {field: request.args.getlist(field) for field in INDEXED_FIELDS if request.args.getlist(field)}
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+    try:
+        limit = _int_arg('limit', DEFAULT_PAGE_SIZE)
+        page = _int_arg('page')
+        offset = _int_arg('offset', (page - 1) * limit if page else 0)
+        cursor = _int_arg('cursor')
+        # ?open_at=tue 18:00, ?open_at=tuesday 6pm or ?open_at=now (Dhaka time)
+        open_at = parse_moment(request.args['open_at']) if request.args.get('open_at') else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if page is not None and page < 1:
+        return jsonify({"error": "'page' must be >= 1"}), 400
+    if offset < 0 or limit < 1:
+        return jsonify({"error": "'offset' must be >= 0 and 'limit' >= 1"}), 400
+    return jsonify(store.query(filters, offset=offset, limit=limit, cursor=cursor, fields=fields, open_at=open_at))
+
+@app.route('/api/search', methods=['GET'])
+def api_search():
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({"error": "'q' is required"}), 400
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+    try:
+        limit = _int_arg('limit', DEFAULT_PAGE_SIZE)
+        offset = _int_arg('offset', 0)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if offset < 0 or limit < 1:
+        return jsonify({"error": "'offset' must be >= 0 and 'limit' >= 1"}), 400
+    return jsonify(store.search(text, offset=offset, limit=limit, fields=fields))
+
+@app.route('/api/phones/<path:phone>', methods=['GET'])
+def api_phone_lookup(phone):
+    # Caller ID -> chambers, doctors and hospitals; accepts +8801711240969, 01711-240969, ...
+    result = store.lookup_phone(phone)
+    if result is None:
+        return jsonify({"error": f"No chamber found for {phone}"}), 404
+    return jsonify(result)
+
+@app.route('/api/doctors/facets', methods=['GET'])
+def api_doctor_facets():
+    return _encoded_response(_dataset_body('facets', store.facets))
+
+@app.route('/api/doctors/visiting-hours', methods=['GET'])
+def api_visiting_hours():
+    # How many chamber visiting hours parsed, with the most common ones that did not
+    return _encoded_response(_dataset_body('visiting_hours', lambda: store.stats()["visiting_hours"]))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    # Prometheus text format: API request metrics, plus crawl metrics when a crawl runs in this process
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    return jsonify({"live_doctors": live_doctors.stats(), "response_bodies": bodies.stats()})
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""Benchmark the html_parsers backends on saved HTML fixtures.
+
+Every backend's output is compared with the html.parser reference, so the
+table shows both pages/second and whether the records are byte-identical.
+
+    python benchmarks/bench_parsers.py [--fixtures DIR] [--repeat N] [--output FILE]
+
+Fixtures are read from DIR/{profiles,listings,archive}/*.html; if DIR does
+not exist it is filled with pages rendered by site_fixtures.py.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))  # Repository root, for the shared modules
+sys.path.insert(0, BENCH_DIR)
+import html_parsers  # noqa: E402
+import site_fixtures  # noqa: E402
+
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+
+PAGE_KINDS = {
+    "profiles": lambda html, url, backend: html_parsers.parse_doctor_profile(html, url, backend=backend),
+    "listings": lambda html, url, backend: html_parsers.parse_specialty_listing(html, url, backend=backend),
+    "archive": lambda html, url, backend: html_parsers.parse_doctor_articles(html, backend=backend),
+}
+
+
+def load_pages(fixtures_dir, kind):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, kind, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def run_benchmark(fixtures_dir, backends, repeat):
+    results = []
+    for kind, parse in PAGE_KINDS.items():
+        pages = load_pages(fixtures_dir, kind)
+        if not pages:
+            continue
+        reference = [json.dumps(parse(html, path, "html.parser"), ensure_ascii=False) for path, html in pages]
+        for backend in backends:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                outputs = [parse(html, path, backend) for path, html in pages]
+            elapsed = time.perf_counter() - started
+            identical = sum(
+                json.dumps(output, ensure_ascii=False) == expected
+                for output, expected in zip(outputs, reference)
+            )
+            results.append({
+                "kind": kind,
+                "backend": backend,
+                "pages": len(pages),
+                "pages_per_second": round(len(pages) * repeat / elapsed, 1),
+                "ms_per_page": round(1000 * elapsed / (len(pages) * repeat), 3),
+                "identical": identical,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--backends", default=",".join(html_parsers.available_backends()))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures):
+        print(f"Rendering fixtures into {args.fixtures}")
+        site_fixtures.write_fixtures(args.fixtures)
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    results = run_benchmark(args.fixtures, backends, args.repeat)
+
+    print(f"\n{'pages':<10} {'backend':<12} {'pages/s':>10} {'ms/page':>9} {'identical':>10}")
+    for row in results:
+        print(f"{row['kind']:<10} {row['backend']:<12} {row['pages_per_second']:>10} "
+              f"{row['ms_per_page']:>9} {row['identical']:>5}/{row['pages']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
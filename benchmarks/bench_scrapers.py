@@ -0,0 +1,284 @@
+"""Benchmark the scrapers, standardization and the API offline, against the local stand-in site.
+
+Stages, each run in a fresh process so peak RSS is its own:
+
+    scrape        per district: listings through scrape_doctor_info's parser
+                  (run_crawl), then every profile they link to through
+                  scrape_doctor_details' parser (run_pipeline)
+    standardize   standardize_data_format over Doctor_Details/ into a temp dir
+    api           /api/doctors through the Flask test client
+
+    python benchmarks/bench_scrapers.py [--stages scrape,standardize,api] [--districts barisal,khulna]
+        [--latency 0.01] [--error-rate 0.02] [--forbidden-every 500 --forbidden-burst 5] [--output FILE]
+
+Results are saved to benchmarks/results/<time>-<commit>.json and compared
+with the previous run there, so a regression shows up as a change in
+seconds or peak RSS. The rate limiter is opened up to --rate/--max-rate
+for the local server; pass --rate 5 --max-rate 10 to crawl at the
+production settings.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+STAGES = ("scrape", "standardize", "api")
+API_REQUESTS = {
+    "all": "/api/doctors",
+    "district": "/api/doctors?district=dhaka&limit=50",
+    "open_at": "/api/doctors?open_at=tue%2018:00&limit=50",
+}
+
+
+def peak_rss_mb(children=False):
+    """Peak resident memory of this process (and, optionally, of its finished children) in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / 1024, 1)
+
+
+def child_scrape(district, base_url, concurrency, rate, max_rate, workers):
+    """Crawl one district's listings and profiles from the stand-in site."""
+    sys.path.insert(0, REPO_DIR)
+    sys.path.insert(0, BENCH_DIR)
+    import rate_limiter
+    import site_fixtures
+    from crawl_engine import run_crawl
+    from crawl_pipeline import run_pipeline
+    from html_parsers import parse_doctor_profile
+    from scrape_doctors_from_every_district import parse_doctor_info
+    from stand_in_site import StandInSite
+
+    rate_limiter.configure(rate=rate, max_rate=max_rate)
+    listings = site_fixtures.load_district_listings()[district]
+    jobs = [(link, base_url + StandInSite.path(link)) for _, link, _ in listings if link]
+    parse_seconds = [0.0]
+
+    def timed_parse(html, url):
+        started = time.process_time()
+        try:
+            return parse_doctor_info(html, url)
+        finally:
+            parse_seconds[0] += time.process_time() - started
+
+    started = time.perf_counter()
+    results = run_crawl(jobs, timed_parse, concurrency=concurrency, rate=rate)
+    listed = time.perf_counter()
+    profile_urls = list(dict.fromkeys(
+        doctor["chamber_link"] for _, doctors in results for doctor in doctors or [] if doctor.get("chamber_link")
+    ))
+    profiles, report = run_pipeline(((url, url) for url in profile_urls), parse_doctor_profile,
+                                    concurrency=concurrency, rate=rate, workers=workers)
+    finished = time.perf_counter()
+
+    fetched = sum(1 for _, doctors in results if doctors is not None)
+    print(json.dumps({
+        "scrape_doctor_info": {
+            "pages": len(jobs),
+            "failures": len(jobs) - fetched,
+            "seconds": round(listed - started, 3),
+            "pages_per_second": round(len(jobs) / (listed - started), 1) if listed > started else 0.0,
+            "parse_ms_per_page": round(1000 * parse_seconds[0] / fetched, 3) if fetched else None,
+        },
+        "scrape_doctor_details": {
+            "pages": len(profile_urls),
+            "failures": sum(1 for _, details in profiles if details is None),
+            "seconds": round(finished - listed, 3),
+            "pages_per_second": report["fetch"]["pages_per_second"],
+            "parse_ms_per_page": round(1000 * report["parse"]["avg_parse_seconds"], 3),
+        },
+        "seconds": round(finished - started, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def child_standardize():
+    """Standardize every district from scratch into a temporary directory."""
+    sys.path.insert(0, REPO_DIR)
+    from standardize_doctor_data import standardize_record
+    from standardize_pipeline import standardize_all
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        summary = standardize_all(standardize_record, os.path.join(REPO_DIR, "Doctor_Details"), output_dir,
+                                  force=True, snapshot=False)
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "districts": summary["processed"],
+        "doctors": summary["doctors"],
+        "seconds": round(elapsed, 3),
+        "doctors_per_second": round(summary["doctors"] / elapsed, 1) if elapsed else 0.0,
+        # Districts are standardized in worker processes
+        "peak_rss_mb": peak_rss_mb(children=True),
+    }))
+
+
+def child_api(repeat):
+    """Load the API and time /api/doctors requests through the test client."""
+    sys.path.insert(0, REPO_DIR)
+    started = time.perf_counter()
+    from app import app
+    loaded = time.perf_counter()
+    client = app.test_client()
+    requests = {}
+    for name, path in API_REQUESTS.items():
+        timings = []
+        size = 0
+        for _ in range(repeat):
+            request_started = time.perf_counter()
+            response = client.get(path)
+            timings.append(time.perf_counter() - request_started)
+            size = len(response.data)
+        timings.sort()
+        requests[name] = {
+            "path": path,
+            "status": response.status_code,
+            "bytes": size,
+            "p50_ms": round(1000 * timings[len(timings) // 2], 2),
+            "p95_ms": round(1000 * timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+            "requests_per_second": round(len(timings) / sum(timings), 1),
+        }
+    print(json.dumps({
+        "load_seconds": round(loaded - started, 3),
+        "requests": requests,
+        "seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def run_child(*args):
+    process = subprocess.run([sys.executable, __file__, "--child", *map(str, args)],
+                             stdout=subprocess.PIPE, text=True, cwd=REPO_DIR)
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"Benchmark stage {args[0]} failed (exit code {process.returncode})")
+    return json.loads(lines[-1])
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results(exclude=None):
+    paths = [path for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json"))) if path != exclude]
+    if not paths:
+        return None, None
+    with open(paths[-1], 'r', encoding='utf-8') as f:
+        return paths[-1], json.load(f)
+
+
+def _change(current, previous):
+    if not previous or current is None:
+        return ""
+    return f"{100 * (current - previous) / previous:+.0f}%"
+
+
+def print_table(results, previous):
+    earlier = {(row["stage"], row.get("district")): row for row in (previous or {}).get("results", [])}
+    print(f"\n{'stage':<12} {'district':<12} {'seconds':>8} {'change':>7} {'pages/s':>8} "
+          f"{'parse ms':>9} {'peak MB':>8} {'change':>7}")
+    for row in results:
+        before = earlier.get((row["stage"], row.get("district")), {})
+        if row["stage"] == "scrape":
+            rate = row["scrape_doctor_details"]["pages_per_second"]
+            parse_ms = row["scrape_doctor_details"]["parse_ms_per_page"]
+        elif row["stage"] == "standardize":
+            rate, parse_ms = row["doctors_per_second"], None
+        else:
+            rate, parse_ms = row["requests"]["district"]["requests_per_second"], None
+        print(f"{row['stage']:<12} {row.get('district') or '':<12} {row['seconds']:>8} "
+              f"{_change(row['seconds'], before.get('seconds')):>7} {rate!s:>8} {parse_ms!s:>9} "
+              f"{row['peak_rss_mb']:>8} {_change(row['peak_rss_mb'], before.get('peak_rss_mb')):>7}")
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        stage, args = sys.argv[2], sys.argv[3:]
+        if stage == "scrape":
+            child_scrape(args[0], args[1], int(args[2]), float(args[3]), float(args[4]), int(args[5]))
+        elif stage == "standardize":
+            child_standardize()
+        else:
+            child_api(int(args[0]))
+        return
+
+    sys.path.insert(0, REPO_DIR)
+    from crawl_pipeline import PARSE_WORKERS
+    from page_archive import PageArchive
+    from stand_in_site import StandInSite
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--districts", help="Comma-separated districts to scrape (default: all)")
+    parser.add_argument("--latency", type=float, default=0.01, help="Mean seconds per stand-in response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses that are a 503")
+    parser.add_argument("--forbidden-every", type=int, default=0, help="Send a burst of 403s every N requests")
+    parser.add_argument("--forbidden-burst", type=int, default=0, help="403s in each burst")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--rate", type=float, default=50.0, help="Starting requests/second")
+    parser.add_argument("--max-rate", type=float, default=200.0, help="Requests/second the limiter may reach")
+    parser.add_argument("--workers", type=int, default=PARSE_WORKERS, help="Profile parse processes")
+    parser.add_argument("--api-requests", type=int, default=20, help="Requests per /api/doctors query")
+    parser.add_argument("--no-archive", action="store_true", help="Serve rendered pages even where recorded ones exist")
+    parser.add_argument("--output", help="Write the results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    stages = [stage for stage in args.stages.split(",") if stage]
+    settings = {key: value for key, value in vars(args).items() if key != "output"}
+    results = []
+    site = None
+    if "scrape" in stages:
+        site = StandInSite(args.latency, args.error_rate, args.forbidden_every, args.forbidden_burst,
+                           archive=None if args.no_archive else PageArchive())
+        base_url = site.start()
+        districts = args.districts.split(",") if args.districts else list(site.listings)
+        try:
+            for district in districts:
+                print(f"Scraping {district} from {base_url}")
+                row = run_child("scrape", district, base_url, args.concurrency, args.rate, args.max_rate,
+                                args.workers)
+                results.append({"stage": "scrape", "district": district, **row})
+        finally:
+            site.stop()
+        settings["stand_in"] = site.stats
+    if "standardize" in stages:
+        print("Standardizing Doctor_Details/")
+        results.append({"stage": "standardize", **run_child("standardize")})
+    if "api" in stages:
+        print("Querying /api/doctors")
+        results.append({"stage": "api", **run_child("api", args.api_requests)})
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    previous_path, previous = previous_results(exclude=output)
+    print_table(results, previous)
+    if previous_path:
+        print(f"\nChanges are against {os.path.relpath(previous_path, REPO_DIR)} ({previous.get('commit')})")
+    if site is not None:
+        print(f"Stand-in site: {site.stats}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"commit": commit, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": settings,
+                   "results": results}, f, indent=2)
+    print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Compare API worker startup time and memory for the JSON, snapshot and SQLite backends.
+
+Each backend is loaded in fresh worker processes, the way gunicorn workers
+start. The table shows load time, the first query and search, and memory
+split into private (RssAnon) and file-backed pages (RssFile, shared between
+workers through the page cache). Pss is each worker's share of physical
+memory when --workers N run side by side.
+
+    python benchmarks/bench_startup.py [--backends json,snapshot,sqlite] [--workers N] [--output FILE]
+
+The snapshot and SQLite files are built first if missing or stale.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BACKENDS = ("json", "snapshot", "sqlite")
+
+
+def memory_usage():
+    """Read this process's memory counters (kB) from /proc, where available."""
+    usage = {}
+    for path, keys in (("/proc/self/status", ("VmRSS", "RssAnon", "RssFile")), ("/proc/self/smaps_rollup", ("Pss",))):
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in keys:
+                        usage[key] = int(value.split()[0])
+        except OSError:
+            pass
+    return usage
+
+
+def child(backend, ready_path):
+    """Load one backend, time it, then report memory once every worker has loaded."""
+    started = time.perf_counter()
+    sys.path.insert(0, REPO_DIR)
+    if backend == "sqlite":
+        from doctor_db import DoctorDatabase
+        store = DoctorDatabase()
+    else:
+        from doctor_store import DoctorStore
+        store = DoctorStore(use_snapshot=backend == "snapshot")
+        store.load()
+    loaded = time.perf_counter()
+    store.query({"district": ["dhaka"]}, limit=50)
+    queried = time.perf_counter()
+    store.search("medicine specialist", limit=20)
+    searched = time.perf_counter()
+
+    # Wait for the sibling workers so Pss reflects pages shared between them
+    with open(ready_path, 'a') as f:
+        f.write("x")
+    deadline = time.monotonic() + 30
+    while os.path.getsize(ready_path) < int(os.environ["BENCH_WORKERS"]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    print(json.dumps({
+        "load_seconds": loaded - started,
+        "first_query_ms": 1000 * (queried - loaded),
+        "first_search_ms": 1000 * (searched - queried),
+        **memory_usage(),
+    }))
+
+
+def prepare(backends):
+    """Build the snapshot and SQLite files the selected backends read."""
+    sys.path.insert(0, REPO_DIR)
+    from doctor_store import DATA_DIR
+    if "snapshot" in backends:
+        from standardize_pipeline import refresh_snapshot
+        refresh_snapshot(DATA_DIR)
+    if "sqlite" in backends:
+        from doctor_db import build_database
+        build_database()
+
+
+def run_backend(backend, workers, ready_path):
+    with open(ready_path, 'w'):
+        pass
+    env = {**os.environ, "BENCH_WORKERS": str(workers)}
+    processes = [
+        subprocess.Popen([sys.executable, __file__, "--child", backend, ready_path],
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env, text=True)
+        for _ in range(workers)
+    ]
+    reports = []
+    for process in processes:
+        output, _ = process.communicate()
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    def mean(key):
+        values = [report[key] for report in reports if key in report]
+        return sum(values) / len(values) if values else None
+
+    return {
+        "backend": backend,
+        "workers": workers,
+        "load_seconds": round(mean("load_seconds"), 3),
+        "first_query_ms": round(mean("first_query_ms"), 2),
+        "first_search_ms": round(mean("first_search_ms"), 2),
+        "rss_mb": round(mean("VmRSS") / 1024, 1) if mean("VmRSS") else None,
+        "private_mb": round(mean("RssAnon") / 1024, 1) if mean("RssAnon") else None,
+        "file_backed_mb": round(mean("RssFile") / 1024, 1) if mean("RssFile") else None,
+        "pss_mb": round(mean("Pss") / 1024, 1) if mean("Pss") else None,
+    }
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    prepare(backends)
+    ready_path = os.path.join(BENCH_DIR, f".startup-ready-{os.getpid()}")
+    try:
+        results = [run_backend(backend, args.workers, ready_path) for backend in backends]
+    finally:
+        if os.path.exists(ready_path):
+            os.remove(ready_path)
+
+    print(f"\n{'backend':<10} {'load s':>8} {'query ms':>9} {'search ms':>10} "
+          f"{'rss MB':>8} {'private':>8} {'file':>6} {'pss MB':>7}")
+    for row in results:
+        print(f"{row['backend']:<10} {row['load_seconds']:>8} {row['first_query_ms']:>9} {row['first_search_ms']:>10} "
+              f"{row['rss_mb']!s:>8} {row['private_mb']!s:>8} {row['file_backed_mb']!s:>6} {row['pss_mb']!s:>7}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
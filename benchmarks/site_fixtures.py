@@ -0,0 +1,157 @@
+"""Render doctorbangladesh.com-style HTML pages from the JSON already in the repository.
+
+Used to build parser fixtures and the local stand-in site when no pages have
+been recorded. The markup follows the selectors the scrapers rely on, wrapped
+in WordPress-like boilerplate so page sizes are in the same range as the
+real site.
+"""
+import glob
+import json
+import os
+from html import escape
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOILERPLATE_HEAD = """<!DOCTYPE html>
+<html lang="en-US"><head><meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} - Doctor Bangladesh</title>
+<link rel="stylesheet" href="https://www.doctorbangladesh.com/wp-content/themes/db/style.css" media="all">
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+</head><body class="post-template-default single single-post">
+<div id="page" class="site"><header id="masthead" class="site-header"><nav class="main-navigation"><ul>
+""" + "".join(
+    f'<li class="menu-item"><a href="https://www.doctorbangladesh.com/doctors-{d}/">Doctors in {d.title()}</a></li>'
+    for d in ("dhaka", "chittagong", "sylhet", "rajshahi", "khulna", "barisal", "rangpur", "mymensingh")
+) + """</ul></nav></header><div id="content" class="site-content"><main id="main" class="site-main">
+"""
+
+BOILERPLATE_FOOT = """</main><aside class="widget-area">""" + "".join(
+    f'<section class="widget"><h3 class="widget-title">Popular {i}</h3><ul><li><a href="#">Link {i}</a></li></ul></section>'
+    for i in range(12)
+) + """</aside></div><footer class="site-footer"><p>&copy; Doctor Bangladesh</p></footer></div>
+<script src="https://www.doctorbangladesh.com/wp-includes/js/jquery/jquery.min.js"></script>
+</body></html>
+"""
+
+
+def render_profile(doctor):
+    """Render a profile page that scrape_doctor_details turns back into doctor."""
+    info = "".join(
+        f"<li>{escape(doctor[key])}</li>"
+        for key in ("qualification", "specialty", "designation", "workplace")
+        if doctor.get(key)
+    )
+    chambers = ""
+    for chamber in doctor.get("chambers", []):
+        lines = []
+        if chamber.get("name"):
+            name = escape(chamber["name"])
+            lines.append(f'<a href="{escape(chamber["url"])}">{name}</a>' if chamber.get("url") else name)
+        if chamber.get("address"):
+            lines.append(f"Address: {escape(chamber['address'])}")
+        if chamber.get("visiting_hour"):
+            lines.append(f"Visiting Hour: {escape(chamber['visiting_hour'])}")
+        if chamber.get("appointment"):
+            lines.append(f"Appointment: {escape(chamber['appointment'])}")
+        chambers += "<h2>Chamber &amp; Appointment</h2>\n<p>" + "<br>\n".join(lines) + "</p>\n"
+
+    body = f"""<article class="post type-post"><header class="entry-header">
+<div class="photo"><img src="{escape(doctor.get('photo') or '')}" alt="{escape(doctor.get('name') or '')}"></div>
+<h1 class="entry-title">{escape(doctor.get('name') or '')}</h1>
+<div class="info"><ul>{info}</ul></div>
+<div class="ssr-rating">{escape(doctor.get('rating') or '')}</div>
+</header>
+<div class="entry-content">
+<p>{escape(doctor.get('name') or '')} is a {escape(doctor.get('specialty') or 'doctor')}.</p>
+{chambers}<h2>About</h2><p>Call the number above to book an appointment.</p>
+</div></article>
+"""
+    return BOILERPLATE_HEAD.format(title=escape(doctor.get("name") or "")) + body + BOILERPLATE_FOOT
+
+
+def render_listing(title, doctors):
+    """Render a specialty/hospital listing page that scrape_doctor_info turns back into doctors."""
+    cards = ""
+    for doctor in doctors:
+        info = "".join(
+            f"<li>{escape(doctor[key])}</li>"
+            for key in ("degree", "specialty", "workplace")
+            if doctor.get(key) and doctor[key] != "N/A"
+        )
+        photo = f'<div class="photo"><img src="{escape(doctor["photo"])}"></div>' if doctor.get("photo") else ""
+        cards += (
+            f'<li class="doctor">{photo}<h3 class="title"><a href="{escape(doctor["chamber_link"])}">'
+            f'{escape(doctor["name"])}</a></h3><div class="info"><ul>{info}</ul></div></li>\n'
+        )
+    body = f'<h1 class="entry-title">{escape(title)}</h1>\n<ul class="doctors">\n{cards}</ul>\n'
+    return BOILERPLATE_HEAD.format(title=escape(title)) + body + BOILERPLATE_FOOT
+
+
+def render_archive(doctors):
+    """Render the /doctors/ archive page read by app.get_doctors."""
+    articles = ""
+    for doctor in doctors:
+        articles += f"""<article class="post entry"><header class="entry-header">
+<div class="photo"><img src="{escape(doctor.get('photo') or '')}"></div>
+<h2 class="entry-title"><a href="{escape(doctor['profile_url'])}">{escape(doctor.get('name') or '')}</a></h2>
+<ul><li title="Degree">{escape(doctor.get('qualification') or '')}</li>
+<li class="speciality">{escape(doctor.get('specialty') or '')}</li>
+<li title="Designation"><strong>{escape(doctor.get('designation') or '')}</strong></li>
+<li title="Workplace">{escape(doctor.get('workplace') or '')}</li></ul>
+</header></article>
+"""
+    return BOILERPLATE_HEAD.format(title="Doctors") + articles + BOILERPLATE_FOOT
+
+
+def load_profiles(limit=None):
+    """Return scraped profile records from Doctor_Details/, deduplicated by URL."""
+    profiles = {}
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "Doctor_Details", "doctors-details-*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for doctor in json.load(f).get("doctors", []):
+                if doctor.get("profile_url"):
+                    profiles.setdefault(doctor["profile_url"], doctor)
+                    if limit and len(profiles) >= limit:
+                        return list(profiles.values())
+    return list(profiles.values())
+
+
+def load_listings(limit=None):
+    """Return (title, link, doctors) listing pages from All_Doctors_by_district/."""
+    listings = []
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "All_Doctors_by_district", "*", "hospitals-*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for hospital in json.load(f).get("hospitals", []):
+                listings.append((hospital["name"], hospital.get("link"), hospital.get("doctors", [])))
+                if limit and len(listings) >= limit:
+                    return listings
+    return listings
+
+
+def load_district_listings():
+    """Return {district: [(title, link, doctors), ...]} from All_Doctors_by_district/."""
+    districts = {}
+    for path in sorted(glob.glob(os.path.join(REPO_DIR, "All_Doctors_by_district", "*", "hospitals-*.json"))):
+        district = os.path.basename(os.path.dirname(path))
+        with open(path, 'r', encoding='utf-8') as f:
+            districts[district] = [
+                (hospital["name"], hospital.get("link"), hospital.get("doctors", []))
+                for hospital in json.load(f).get("hospitals", [])
+            ]
+    return districts
+
+
+def write_fixtures(output_dir, profiles=200, listings=50):
+    """Write rendered pages to output_dir/{profiles,listings,archive}/*.html."""
+    for kind in ("profiles", "listings", "archive"):
+        os.makedirs(os.path.join(output_dir, kind), exist_ok=True)
+    doctors = load_profiles(profiles)
+    for i, doctor in enumerate(doctors):
+        with open(os.path.join(output_dir, "profiles", f"{i:05d}.html"), 'w', encoding='utf-8') as f:
+            f.write(render_profile(doctor))
+    for i, (title, _, listing) in enumerate(load_listings(listings)):
+        with open(os.path.join(output_dir, "listings", f"{i:05d}.html"), 'w', encoding='utf-8') as f:
+            f.write(render_listing(title, listing))
+    with open(os.path.join(output_dir, "archive", "doctors.html"), 'w', encoding='utf-8') as f:
+        f.write(render_archive(doctors[:20]))
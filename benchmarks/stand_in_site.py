@@ -0,0 +1,178 @@
+"""Local stand-in for doctorbangladesh.com, for benchmarking the scrapers offline.
+
+Each path serves the page recorded in the page archive (.page_archive/)
+for the same URL on the real site, or else a page rendered by
+site_fixtures from the repository JSON: district listings and the
+profiles they link to. Links to the real site are rewritten to point back
+at the stand-in. Latency, server errors and bursts of 403s can be injected
+to see how the crawler and its rate limiter behave.
+
+    python benchmarks/stand_in_site.py [--port 8000] [--latency 0.05] [--error-rate 0.02]
+                                       [--forbidden-every 200 --forbidden-burst 10]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))  # Repository root, for the shared modules
+sys.path.insert(0, BENCH_DIR)
+import site_fixtures  # noqa: E402
+
+SITE = "https://www.doctorbangladesh.com"
+
+
+def profile_from_card(card):
+    """A minimal profile for a listed doctor without a scraped profile in the repository."""
+    return {
+        "profile_url": card["chamber_link"],
+        "name": card.get("name"),
+        "photo": card.get("photo"),
+        "qualification": card.get("degree"),
+        "specialty": card.get("specialty"),
+        "workplace": card.get("workplace"),
+        "chambers": [],
+    }
+
+
+class StandInSite:
+    """Threaded HTTP server answering for doctorbangladesh.com paths."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, forbidden_every=0, forbidden_burst=0, seed=0, archive=None):
+        self.latency = latency  # Mean seconds per response, spread uniformly over 0.5x-1.5x
+        self.error_rate = error_rate  # Share of responses that are a 503
+        self.forbidden_every = forbidden_every  # Every this many requests...
+        self.forbidden_burst = forbidden_burst  # ...this many in a row get a 403
+        self.archive = archive  # optional page_archive.PageArchive with recorded pages
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages = {}  # path -> (renderer, argument) or rendered bytes
+        self._server = None
+        self.base_url = None
+        self.stats = {"requests": 0, "served": 0, "recorded": 0, "errors": 0, "forbidden": 0, "not_found": 0}
+
+        profiles = {doctor["profile_url"]: doctor for doctor in site_fixtures.load_profiles()}
+        self.listings = site_fixtures.load_district_listings()
+        for listings in self.listings.values():
+            for title, link, cards in listings:
+                if link:
+                    self._pages.setdefault(self.path(link), (site_fixtures.render_listing, (title, cards)))
+                for card in cards:
+                    if card.get("chamber_link"):
+                        doctor = profiles.get(card["chamber_link"]) or profile_from_card(card)
+                        self._pages.setdefault(self.path(card["chamber_link"]), (site_fixtures.render_profile, (doctor,)))
+
+    @staticmethod
+    def path(url):
+        parts = urlsplit(url)
+        return unquote(parts.path) + (f"?{parts.query}" if parts.query else "")
+
+    def local_url(self, url):
+        """The stand-in's URL for a page of the real site."""
+        return self.base_url + self.path(url)
+
+    def _next_status(self):
+        with self._lock:
+            count = self.stats["requests"]
+            self.stats["requests"] += 1
+            if self.forbidden_every and count % self.forbidden_every >= self.forbidden_every - self.forbidden_burst:
+                self.stats["forbidden"] += 1
+                return 403, 0.0
+            delay = self.latency * self._random.uniform(0.5, 1.5) if self.latency else 0.0
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 503, delay
+            return 200, delay
+
+    def body(self, path):
+        """Rendered bytes for a path with links pointing at the stand-in, or None."""
+        page = self._pages.get(path)
+        if page is None:
+            return None
+        if isinstance(page, bytes):
+            return page
+        html = None
+        if self.archive is not None and self.archive.has(SITE + path):
+            html = self.archive.page(SITE + path)
+            self.stats["recorded"] += 1
+        if html is None:
+            render, args = page
+            html = render(*args)
+        body = html.replace(SITE, self.base_url).encode("utf-8")
+        with self._lock:
+            self._pages[path] = body
+        return body
+
+    def start(self, port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                status, delay = site._next_status()
+                if delay:
+                    time.sleep(delay)
+                body = site.body(unquote(self.path)) if status == 200 else b""
+                if body is None:
+                    status, body = 404, b""
+                    site.stats["not_found"] += 1
+                elif status == 200:
+                    site.stats["served"] += 1
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--forbidden-every", type=int, default=0)
+    parser.add_argument("--forbidden-burst", type=int, default=0)
+    parser.add_argument("--no-archive", action="store_true", help="Serve rendered pages only")
+    args = parser.parse_args()
+
+    archive = None
+    if not args.no_archive:
+        from page_archive import PageArchive
+        archive = PageArchive()
+    site = StandInSite(args.latency, args.error_rate, args.forbidden_every, args.forbidden_burst, archive=archive)
+    base_url = site.start(args.port)
+    print(f"Serving {len(site._pages)} pages at {base_url} (Ctrl+C to stop)")
+    for district, listings in site.listings.items():
+        if listings and listings[0][1]:
+            print(f"  {district:<12} {site.local_url(listings[0][1])}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+        print(f"\n{site.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""Parse chamber visiting hours into weekly intervals and index them for "open at" queries.
+
+Visiting hours are free text such as "7pm to 10pm (Closed: Friday)",
+"5pm to 7pm (Sat, Mon & Wed)" or "3pm to 8pm (Sat to Thu), 9am to 5pm (Fri)".
+Times are minutes of the week, Monday 00:00 = 0.
+
+    python chamber_schedule.py
+
+prints how many chambers in the standardized data parse and the most
+common strings that do not.
+"""
+import bisect
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+try:
+    from zoneinfo import ZoneInfo
+    LOCAL_TIMEZONE = ZoneInfo("Asia/Dhaka")
+except Exception:  # No tz database installed
+    LOCAL_TIMEZONE = timezone(timedelta(hours=6))
+
+# Configuration
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+TIME = r"(\d{1,2})(?:[.:](\d{2}))?\s*(am|pm)"
+RANGE_RE = re.compile(rf"{TIME}\s*(?:to|-|–)\s*{TIME}")
+TOKEN_RE = re.compile(rf"(?P<range>{TIME}\s*(?:to|-|–)\s*{TIME})|\((?P<paren>[^)]*)\)|(?P<sep>[,&;]|\band\b)|(?P<words>[a-z:]+(?:\s+[a-z:]+)*)|(?P<space>\s+)")
+EVERY_DAY = ("everyday", "every day", "daily", "all days", "open everyday")
+
+
+def _minutes(hour, minute, meridiem):
+    hour, minute = int(hour), int(minute or 0)
+    if not 1 <= hour <= 12 or minute >= 60:
+        raise ValueError("not a clock time")
+    return (hour % 12 + (12 if meridiem == "pm" else 0)) * 60 + minute
+
+
+def _day(word):
+    """Map a day name or abbreviation (also misspelt ones like 'saturady') to 0-6."""
+    word = word.strip().rstrip(".")
+    if len(word) >= 3 and word.isalpha() and word[:3] in DAYS:
+        return DAYS.index(word[:3])
+    raise ValueError(f"not a day: {word!r}")
+
+
+def parse_days(spec):
+    """Parse a day spec ("Closed: Thu & Friday", "Sat to Thu", "Only Friday") into a set of weekdays."""
+    spec = " ".join(spec.lower().split())
+    if not spec or spec in EVERY_DAY:
+        return set(range(7))
+    closed = False
+    for prefix in ("closed:", "closed", "off:"):
+        if spec.startswith(prefix):
+            spec, closed = spec[len(prefix):].strip(), True
+            break
+    for prefix in ("only ", "every "):
+        if spec.startswith(prefix):
+            spec = spec[len(prefix):]
+    days = set()
+    for part in re.split(r"\s*(?:,|&|\band\b)\s*", spec):
+        if not part:
+            continue
+        if " to " in part:
+            first, last = (_day(word) for word in part.split(" to ", 1))
+            days.update((first + i) % 7 for i in range((last - first) % 7 + 1))
+        else:
+            days.add(_day(part))
+    if not days:
+        raise ValueError("no days")
+    return set(range(7)) - days if closed else days
+
+
+def _weekly(ranges, days):
+    intervals = []
+    for start, end in ranges:
+        for day in days:
+            base = day * MINUTES_PER_DAY
+            if end > start:
+                intervals.append((base + start, base + end))
+            else:
+                # Runs past midnight: split at the end of the week if needed
+                stop = base + MINUTES_PER_DAY + end
+                if stop <= MINUTES_PER_WEEK:
+                    intervals.append((base + start, stop))
+                else:
+                    intervals.append((base + start, MINUTES_PER_WEEK))
+                    intervals.append((0, stop - MINUTES_PER_WEEK))
+    return intervals
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@lru_cache(maxsize=8192)
+def parse_visiting_hour(text):
+    """Parse a visiting hour string into merged weekly (start, end) intervals.
+
+    Returns a tuple of intervals, or None when the text is not a weekly
+    schedule with clock times ("Unknown", "Evening", "2nd Tuesday of Every
+    Month", ...).
+    """
+    if not text:
+        return None
+    text = " ".join(text.lower().split())
+    intervals = []
+    pending_ranges = []  # "4pm to 8pm & 9pm to 10pm" waiting for their "(days)"
+    pending_days = None  # "Thursday" waiting for its "(2.30pm to 8pm)"
+    try:
+        for match in TOKEN_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "range":
+                pending_ranges.append(_range(match.group(0)))
+            elif kind == "paren" or kind == "words":
+                content = match.group(kind).strip()
+                inner = [_range(found.group(0)) for found in RANGE_RE.finditer(content)]
+                if inner:
+                    # Days outside, times inside: "Thursday (2.30pm to 8pm)"
+                    if RANGE_RE.sub("", content).strip(" ,&") or pending_ranges:
+                        return None
+                    intervals += _weekly(inner, pending_days if pending_days is not None else range(7))
+                    pending_days = None
+                elif pending_ranges:
+                    intervals += _weekly(pending_ranges, parse_days(content))
+                    pending_ranges = []
+                elif pending_days is None and kind == "words":
+                    pending_days = parse_days(content)
+                else:
+                    return None
+            elif kind is None:
+                return None
+        if pending_days is not None:
+            return None  # days without any times
+        if pending_ranges:
+            intervals += _weekly(pending_ranges, range(7))
+    except ValueError:
+        return None
+    # TOKEN_RE skips characters it cannot match, so make sure nothing was skipped
+    if sum(len(match.group(0)) for match in TOKEN_RE.finditer(text)) != len(text):
+        return None
+    return tuple(merge_intervals(intervals)) or None
+
+
+def _range(text):
+    match = RANGE_RE.fullmatch(text.strip())
+    start, end = _minutes(*match.group(1, 2, 3)), _minutes(*match.group(4, 5, 6))
+    # "11:30pm to 2pm" or "12am to 2pm" would run 14 hours through midnight;
+    # these are typos for a morning or noon start
+    if (end <= start or start == 0) and (end - start) % MINUTES_PER_DAY > MINUTES_PER_DAY // 2:
+        start = (start + MINUTES_PER_DAY // 2) % MINUTES_PER_DAY
+    return start, end
+
+
+def _clock(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def opening_hours(intervals):
+    """Format weekly intervals as {"mon": ["17:00-20:00"], ...} for the standardized JSON."""
+    hours = {}
+    for start, end in intervals:
+        while start < end:
+            day, offset = divmod(start, MINUTES_PER_DAY)
+            stop = min(end, (day + 1) * MINUTES_PER_DAY)
+            hours.setdefault(DAYS[day], []).append(f"{_clock(offset)}-{_clock(stop - day * MINUTES_PER_DAY)}")
+            start = stop
+    return {day: hours[day] for day in DAYS if day in hours}
+
+
+def intervals_from_hours(hours):
+    """Inverse of opening_hours."""
+    intervals = []
+    for day, ranges in hours.items():
+        base = DAYS.index(day) * MINUTES_PER_DAY
+        for text in ranges:
+            start, end = text.split("-")
+            start_h, start_m = start.split(":")
+            end_h, end_m = end.split(":")
+            intervals.append((base + int(start_h) * 60 + int(start_m), base + int(end_h) * 60 + int(end_m)))
+    return merge_intervals(intervals)
+
+
+def chamber_intervals(chamber):
+    """Weekly intervals of a chamber: its opening_hours if standardized, else parsed from visiting_hour."""
+    hours = chamber.get("opening_hours")
+    if hours:
+        return intervals_from_hours(hours)
+    return parse_visiting_hour(chamber.get("visiting_hour")) or ()
+
+
+def add_opening_hours(chambers):
+    """Return the chambers with an opening_hours field wherever visiting_hour parses."""
+    result = []
+    for chamber in chambers or []:
+        intervals = parse_visiting_hour(chamber.get("visiting_hour"))
+        if intervals:
+            chamber = {**chamber, "opening_hours": opening_hours(intervals)}
+        result.append(chamber)
+    return result
+
+
+def parse_moment(text, now=None):
+    """Parse "now", "tue 18:00", "Tuesday 6pm" or "tue 6.30pm" into a minute of the week."""
+    text = " ".join(text.lower().split())
+    if text == "now":
+        now = now or datetime.now(LOCAL_TIMEZONE)
+        return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+    day, _, clock = text.partition(" ")
+    try:
+        weekday = _day(day)
+        match = re.fullmatch(TIME, clock)
+        if match:
+            minute = _minutes(*match.groups())
+        else:
+            hour, _, minute = clock.partition(":")
+            minute = int(hour) * 60 + int(minute or 0)
+            if not 0 <= minute < MINUTES_PER_DAY:
+                raise ValueError
+    except ValueError:
+        raise ValueError(f"Expected 'now' or '<day> <time>' like 'tue 18:00' or 'tuesday 6pm', got {text!r}")
+    return weekday * MINUTES_PER_DAY + minute
+
+
+def schedule_stats(chambers, parsed, unparseable, top=10):
+    """How many chambers' visiting hours parsed, with the most common texts (a Counter) that did not."""
+    return {
+        "chambers": chambers,
+        "parsed": parsed,
+        "unparseable": sum(unparseable.values()),
+        "top_unparseable": unparseable.most_common(top),
+    }
+
+
+class OpenHoursIndex:
+    """Which doctors have a chamber open at a given minute of the week.
+
+    The week is cut at every interval boundary into elementary segments, each
+    holding the sorted positions open throughout it, so a lookup is one
+    bisect.
+    """
+
+    def __init__(self, doctors):
+        self.chambers = 0
+        self.parsed = 0
+        self.unparseable = Counter()  # visiting_hour text -> chambers
+        events = []
+        for position, doctor in enumerate(doctors):
+            intervals = []
+            for chamber in doctor.get("chambers") or []:
+                self.chambers += 1
+                found = chamber_intervals(chamber)
+                if found:
+                    self.parsed += 1
+                    intervals.extend(found)
+                elif chamber.get("visiting_hour"):
+                    self.unparseable[chamber["visiting_hour"]] += 1
+            for start, end in merge_intervals(intervals):
+                events.append((start, position))
+                events.append((end, ~position))
+
+        self.boundaries = [0]
+        self.segments = [()]
+        active = set()
+        events.sort(key=lambda event: event[0])
+        for minute, position in events:
+            if minute != self.boundaries[-1]:
+                self.segments[-1] = tuple(sorted(active))
+                self.boundaries.append(minute)
+                self.segments.append(())
+            if position >= 0:
+                active.add(position)
+            else:
+                active.discard(~position)
+        self.segments[-1] = tuple(sorted(active))
+
+    @classmethod
+    def from_parts(cls, boundaries, segments, chambers, parsed, unparseable):
+        """Rebuild an index from stored segments (see doctor_snapshot) without reading any doctor."""
+        index = cls.__new__(cls)
+        index.boundaries = boundaries
+        index.segments = segments
+        index.chambers = chambers
+        index.parsed = parsed
+        index.unparseable = Counter(unparseable)
+        return index
+
+    def open_at(self, minute):
+        """Sorted positions of doctors with a chamber open at this minute of the week."""
+        return self.segments[bisect.bisect_right(self.boundaries, minute % MINUTES_PER_WEEK) - 1]
+
+    def stats(self, top=10):
+        return schedule_stats(self.chambers, self.parsed, self.unparseable, top)
+
+
+if __name__ == "__main__":
+    from doctor_store import DoctorStore
+
+    doctors, _ = DoctorStore().read()
+    stats = OpenHoursIndex(doctors).stats(top=25)
+    print(f"Chambers: {stats['chambers']}")
+    print(f"Parsed visiting hours: {stats['parsed']}")
+    print(f"Unparseable visiting hours: {stats['unparseable']}")
+    for text, count in stats["top_unparseable"]:
+        print(f"{count:>5}  {text}")
@@ -0,0 +1,59 @@
+import json
+import os
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of completed profile fetches, used to resume an interrupted crawl.
+
+    Each line is {"url": ..., "details": ...}. Lines are flushed and fsynced
+    as they are written, so at most the line being written when the process
+    died is lost; a torn final line is ignored on load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def load(self):
+        """Return {url: details} for every profile already in the journal."""
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                completed[entry["url"]] = entry["details"]
+        return completed
+
+    def append(self, url, details):
+        """Record one completed profile."""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps({"url": url, "details": details}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Delete the journal once its results have been saved for good."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def count(self):
+        """Return how many distinct profiles the journal holds."""
+        return len(self.load())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,163 @@
+import asyncio
+import time
+import http_client
+import metrics
+import rate_limiter
+
+try:
+    import aiohttp
+except ImportError:  # Fall back to the pooled requests session on worker threads
+    aiohttp = None
+
+# Configuration
+MAX_CONCURRENCY = 5  # Requests in flight at once
+REQUESTS_PER_SECOND = None  # Starting per-host rate; None keeps rate_limiter.INITIAL_RATE
+DEFAULT_TIMEOUT = 10
+
+
+class CrawlEngine:
+    """Fetch pages concurrently on one event loop and hand each body to a parse function."""
+
+    def __init__(self, concurrency=MAX_CONCURRENCY, rate=REQUESTS_PER_SECOND, headers=None, timeout=DEFAULT_TIMEOUT,
+                 cache=None, archive=None):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.headers = headers
+        self.timeout = timeout
+        self.cache = cache  # optional http_cache.HttpCache for conditional GETs
+        self.archive = archive  # optional page_archive.PageArchive keeping every fetched body
+        self._session = None
+        self._semaphore = None
+
+    async def fetch_page(self, url, extra_headers=None):
+        """Fetch a page and return (status, headers, text); raises on HTTP errors once retries are exhausted.
+
+        A 304 Not Modified is returned, not raised, with text None.
+        """
+        headers = {**(self.headers or {}), **(extra_headers or {})}
+        async with self._semaphore:
+            metrics.FETCHES_IN_FLIGHT.inc()
+            try:
+                return await self._request(url, headers)
+            finally:
+                metrics.FETCHES_IN_FLIGHT.dec()
+
+    async def _request(self, url, headers):
+        if self._session is None:
+            # http_client.fetch waits for the host limiter and retries on its own
+            response = await asyncio.to_thread(http_client.fetch, url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                return 304, response.headers, None
+            response.raise_for_status()
+            return self._archived(url, response.status_code, response.headers, response.text)
+
+        limiter = rate_limiter.limiter_for(url)
+        attempt = 0
+        while True:
+            wait = limiter.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            started = time.perf_counter()
+            try:
+                async with self._session.get(url, headers=headers) as response:
+                    body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                http_client.stats.record(time.perf_counter() - started)
+                limiter.record(None)
+                if attempt >= rate_limiter.MAX_RETRIES:
+                    raise
+                await asyncio.sleep(rate_limiter.backoff_delay(attempt))
+                attempt += 1
+                http_client.stats.record_retry()
+                continue
+
+            elapsed = time.perf_counter() - started
+            http_client.stats.record(elapsed, response.status, len(body))
+            retry_after = rate_limiter.parse_retry_after(response.headers.get('Retry-After'))
+            limiter.record(response.status, elapsed, retry_after)
+            if response.status in rate_limiter.RETRY_STATUSES and attempt < rate_limiter.MAX_RETRIES:
+                await asyncio.sleep(rate_limiter.backoff_delay(attempt, retry_after))
+                attempt += 1
+                http_client.stats.record_retry()
+                continue
+            if response.status == 304:
+                return 304, response.headers, None
+            response.raise_for_status()
+            text = body.decode(response.get_encoding() or 'utf-8', errors='replace')
+            return self._archived(url, response.status, response.headers, text)
+
+    def _archived(self, url, status, headers, text):
+        if self.archive is not None:
+            self.archive.append(url, status, headers, text)
+        return status, headers, text
+
+    async def fetch_text(self, url):
+        """Fetch a page body."""
+        _, _, text = await self.fetch_page(url)
+        return text
+
+    async def _fetch_parsed(self, url, parse):
+        if self.cache is None:
+            return metrics.parse_page(parse, await self.fetch_text(url), url)
+        # Conditional GET: a 304 or an unchanged body reuses the result parsed last time
+        status, headers, text = await self.fetch_page(url, self.cache.conditional_headers(url))
+        result = self.cache.resolve(url, status, headers, text, parse)
+        if result is None and status == 304:
+            status, headers, text = await self.fetch_page(url)
+            result = self.cache.resolve(url, status, headers, text, parse)
+        return result
+
+    async def _run_job(self, key, url, parse):
+        try:
+            return key, await self._fetch_parsed(url, parse)
+        except Exception as e:
+            print(f"Error processing {url}: {str(e)}")
+            return key, None
+
+    async def crawl(self, jobs, parse, on_result=None):
+        """Run every (key, url) job and return (key, result) pairs in completion order.
+
+        parse(html, url) turns a page into a result; a failed fetch or parse
+        yields None. on_result(key, result) is called as each job finishes.
+        """
+        await self.start()
+        results = []
+        try:
+            tasks = [asyncio.ensure_future(self._run_job(key, url, parse)) for key, url in jobs]
+            for finished in asyncio.as_completed(tasks):
+                key, result = await finished
+                if on_result is not None:
+                    on_result(key, result)
+                results.append((key, result))
+        finally:
+            await self.stop()
+        return results
+
+    async def start(self):
+        """Open the HTTP session; must run inside the event loop that will fetch."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self.rate is not None:
+            # Starting rate for hosts not crawled yet; ones already seen keep their learned rate
+            rate_limiter.configure(rate=self.rate)
+        if aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=http_client.HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        else:
+            http_client.configure(pool_size=self.concurrency)
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def run_crawl(jobs, parse, on_result=None, concurrency=MAX_CONCURRENCY, rate=REQUESTS_PER_SECOND, headers=None,
+              timeout=DEFAULT_TIMEOUT, cache=None, archive=None):
+    """Synchronous entry point: crawl (key, url) jobs and return (key, result) pairs."""
+    engine = CrawlEngine(concurrency=concurrency, rate=rate, headers=headers, timeout=timeout, cache=cache,
+                         archive=archive)
+    return asyncio.run(engine.crawl(list(jobs), parse, on_result=on_result))
@@ -0,0 +1,329 @@
+"""One persistent, deduplicated crawl over every page type of the site.
+
+The frontier is a SQLite queue plus seen-set of URLs. Seeds come from the
+scrapers' own URL lists (city specialty indexes, hospital indexes and the
+district specialty listings); fetching a page discovers the next ones:
+
+    city / hospitals index -> listing -> profile -> chamber (listing)
+
+Each URL is fetched once per crawl however many pages link to it, and its
+status, attempts and parsed result are kept, so an interrupted crawl
+resumes where it stopped.
+
+    python crawl_frontier.py seed     # queue the seed URLs
+    python crawl_frontier.py run      # crawl until nothing is pending
+    python crawl_frontier.py status   # URLs per kind and status
+    python crawl_frontier.py export   # write hospitals-<district>.json for process_all_districts.py
+    python crawl_frontier.py reset    # start a new crawl over the same URLs
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+import http_client
+import metrics
+from crawl_engine import run_crawl
+from http_cache import HttpCache
+from page_archive import PageArchive
+from html_parsers import parse_doctor_profile, parse_specialty_listing
+from scrape_doctorbangladesh import parse_hospitals
+
+# Configuration
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONTIER_PATH = os.path.join(BASE_DIR, ".crawl_frontier", "frontier.sqlite3")
+EXPORT_DIR = os.path.join(BASE_DIR, "All_Doctors_by_district")  # process_all_districts.py reads its input here
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+MAX_THREADS = 5  # Number of concurrent requests
+REQUESTS_PER_SECOND = 5  # Starting per-host rate; adapts to how the site responds
+BATCH_SIZE = 500  # URLs taken from the frontier per round; results are committed as they arrive
+MAX_ATTEMPTS = 3  # A URL that failed this often is left as failed until the next reset
+FOLLOW_CHAMBER_LINKS = True  # Queue the hospital pages linked from profile chambers
+ALLOWED_HOSTS = {"www.doctorbangladesh.com"}
+USE_HTTP_CACHE = True  # Send conditional GETs and reuse unchanged pages from .http_cache/
+ARCHIVE_PAGES = True  # Keep every fetched page in .page_archive/ for offline re-parsing
+
+KINDS = ("city", "hospitals", "listing", "profile")  # Crawl order within a round
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    district TEXT,
+    name TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    discovered_at REAL NOT NULL,
+    fetched_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS urls_status ON urls (status, kind);
+CREATE TABLE IF NOT EXISTS links (
+    parent TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (parent, url)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def normalize_url(url):
+    """Canonical form used as the seen-set key: no fragment, lowercase scheme and host."""
+    url, _ = urldefrag((url or "").strip())
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def _index_links(items, url_key, name_key):
+    return [(item.get(url_key), item.get(name_key)) for item in items or []]
+
+
+# City specialty indexes and hospital indexes share the 'ul.list li a' markup
+PARSERS = {
+    "city": parse_hospitals,
+    "hospitals": parse_hospitals,
+    "listing": parse_specialty_listing,
+    "profile": parse_doctor_profile,
+}
+
+
+def discovered_links(kind, result):
+    """(kind, url, name) of the pages a parsed page links to."""
+    if kind in ("city", "hospitals"):
+        return [("listing", url, name) for url, name in _index_links(result, "link", "name")]
+    if kind == "listing":
+        return [("profile", url, name) for url, name in _index_links(result, "chamber_link", "name")]
+    if kind == "profile" and FOLLOW_CHAMBER_LINKS:
+        return [("listing", url, name) for url, name in _index_links((result or {}).get("chambers"), "url", "name")]
+    return []
+
+
+class CrawlFrontier:
+    """On-disk queue and seen-set of URLs with their crawl status and parsed results."""
+
+    def __init__(self, path=FRONTIER_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        with self._conn:
+            # A frontier from before crawls were timestamped: none of its results count as current
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('crawl_started', ?)",
+                               (repr(time.time()),))
+        self._lock = threading.Lock()
+
+    def crawl_started(self):
+        """When the current crawl (the last reset) started."""
+        with self._lock:
+            return float(self._conn.execute("SELECT value FROM meta WHERE key = 'crawl_started'").fetchone()[0])
+
+    def add(self, url, kind, district=None, name=None, parent=None):
+        """Queue a URL unless it has been seen; returns True when it is new.
+
+        The link from parent is recorded either way, so a page listed
+        under several others keeps all of them.
+        """
+        url = normalize_url(url)
+        if not url or urlsplit(url).netloc not in ALLOWED_HOSTS:
+            return False
+        with self._lock, self._conn:
+            added = self._conn.execute(
+                "INSERT OR IGNORE INTO urls (url, kind, district, name, discovered_at) VALUES (?, ?, ?, ?, ?)",
+                (url, kind, district, name, time.time()),
+            ).rowcount
+            if parent:
+                self._conn.execute("INSERT OR IGNORE INTO links (parent, url) VALUES (?, ?)", (parent, url))
+        return bool(added)
+
+    def pending(self, limit=BATCH_SIZE):
+        """Up to limit (url, kind) pairs still to fetch in this crawl, seeds and earlier kinds first."""
+        order = " ".join(f"WHEN '{kind}' THEN {i}" for i, kind in enumerate(KINDS))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT url, kind FROM urls WHERE status = 'pending' OR (status = 'failed' AND attempts < ?) "
+                f"ORDER BY CASE kind {order} END, discovered_at LIMIT ?",
+                (MAX_ATTEMPTS, limit),
+            ).fetchall()
+
+    def complete(self, url, result):
+        """Store a fetched page's result and queue the pages it links to; returns how many were new."""
+        url = normalize_url(url)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE urls SET status = 'done', attempts = attempts + 1, fetched_at = ?, result = ? "
+                "WHERE url = ? RETURNING kind, district",
+                (time.time(), json.dumps(result, ensure_ascii=False), url),
+            ).fetchone()
+        if row is None:
+            return 0
+        kind, district = row
+        return sum(self.add(link, link_kind, district, name, parent=url)
+                   for link_kind, link, name in discovered_links(kind, result) if link)
+
+    def fail(self, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE urls SET status = 'failed', attempts = attempts + 1, fetched_at = ? WHERE url = ?",
+                (time.time(), normalize_url(url)),
+            )
+
+    def result(self, url, since=None):
+        """Parsed result of a URL fetched at or after since (default: in the current crawl), or None.
+
+        Older results are kept for export but never handed out, so a later
+        run fetches the page again instead of reusing stale data.
+        """
+        since = self.crawl_started() if since is None else since
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM urls WHERE url = ? AND status = 'done' AND fetched_at >= ?",
+                (normalize_url(url), since),
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def done(self, kind, district=None):
+        """(url, name, district, result) of every fetched URL of a kind, optionally in one district."""
+        sql = "SELECT url, name, district, result FROM urls WHERE status = 'done' AND kind = ?"
+        args = [kind]
+        if district is not None:
+            sql += " AND district = ?"
+            args.append(district)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY discovered_at", args).fetchall()
+        return [(url, name, district, json.loads(result)) for url, name, district, result in rows]
+
+    def districts(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT district FROM urls WHERE district IS NOT NULL ORDER BY district")]
+
+    def reset(self):
+        """Start a new crawl: every known URL is fetched again, once."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE urls SET status = 'pending', attempts = 0")
+            self._conn.execute("UPDATE meta SET value = ? WHERE key = 'crawl_started'", (repr(time.time()),))
+
+    def stats(self):
+        """{kind: {status: count}}"""
+        counts = {}
+        with self._lock:
+            for kind, status, count in self._conn.execute(
+                    "SELECT kind, status, COUNT(*) FROM urls GROUP BY kind, status"):
+                counts.setdefault(kind, {})[status] = count
+        return counts
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def seed(frontier):
+    """Queue the URL lists the individual scrapers start from; returns how many were new."""
+    from scrape_district import city_urls
+    from scrape_doctorbangladesh import CITIES
+    from scrape_doctors_from_every_district import DISTRICTS
+
+    added = sum(frontier.add(url, "city", city) for city, url in city_urls.items())
+    added += sum(frontier.add(url, "hospitals", city) for city, url in CITIES)
+    for district, listings in DISTRICTS.items():
+        added += sum(frontier.add(listing["url"], "listing", district.lower(), listing.get("specialty"))
+                     for listing in listings if "url" in listing)
+    return added
+
+
+def crawl(frontier, concurrency=MAX_THREADS, rate=REQUESTS_PER_SECOND, cache=None, archive=None):
+    """Fetch pending URLs round by round until the frontier has nothing left to fetch."""
+    while True:
+        batch = frontier.pending()
+        if not batch:
+            break
+        for kind in KINDS:
+            urls = [url for url, url_kind in batch if url_kind == kind]
+            if not urls:
+                continue
+            print(f"Fetching {len(urls)} {kind} pages")
+
+            def collect(url, result):
+                metrics.RECORDS.inc(stage=kind if result is not None else f"{kind}_failed")
+                if result is None:
+                    frontier.fail(url)
+                else:
+                    new = frontier.complete(url, result)
+                    print(f"Fetched {url} ({new} new links)")
+
+            run_crawl(((url, url) for url in urls), PARSERS[kind], on_result=collect, concurrency=concurrency,
+                      rate=rate, headers=HEADERS, cache=cache, archive=archive)
+
+
+def export_listings(frontier, output_dir=EXPORT_DIR):
+    """Write each district's listings as <district>/hospitals-<district>.json, the shape
+    scrape_doctors_from_every_district.py saves and process_all_districts.py reads."""
+    for district in frontier.districts():
+        hospitals = [
+            {"name": name or url, "link": url, "doctors": doctors, "count": len(doctors)}
+            for url, name, _, doctors in frontier.done("listing", district) if doctors
+        ]
+        if not hospitals:
+            continue
+        filename = os.path.join(output_dir, district, f"hospitals-{district}.json")
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        total = sum(hospital["count"] for hospital in hospitals)
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({"district": district, "hospitals": hospitals, "total_doctors": total},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Saved {len(hospitals)} listings with {total} doctors to {filename}")
+
+
+def print_status(frontier):
+    for kind, counts in sorted(frontier.stats().items(), key=lambda item: KINDS.index(item[0])):
+        total = sum(counts.values())
+        details = ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+        print(f"{kind:<10} {total:>7} URLs ({details})")
+
+
+def main(command):
+    with CrawlFrontier() as frontier:
+        if command == "seed":
+            print(f"Queued {seed(frontier)} new seed URLs")
+        elif command == "run":
+            cache = HttpCache() if USE_HTTP_CACHE else None
+            archive = PageArchive() if ARCHIVE_PAGES else None
+            try:
+                crawl(frontier, cache=cache, archive=archive)
+            finally:
+                if cache is not None:
+                    print(f"HTTP cache: {cache.stats}")
+                    cache.close()
+                if archive is not None:
+                    print(f"Page archive: {archive.stats}")
+                    archive.close()
+            print(f"Fetch stats: {http_client.stats.summary()}")
+            metrics.save_crawl_summary("crawl_frontier")
+            print_status(frontier)
+        elif command == "status":
+            print_status(frontier)
+        elif command == "export":
+            export_listings(frontier)
+        elif command == "reset":
+            frontier.reset()
+            print("Every known URL will be fetched again on the next run")
+        else:
+            raise SystemExit(f"Unknown command {command!r}; expected seed, run, status, export or reset")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "run")
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import metrics
+from crawl_engine import CrawlEngine, DEFAULT_TIMEOUT, MAX_CONCURRENCY, REQUESTS_PER_SECOND
+
+# Configuration
+PARSE_WORKERS = os.cpu_count() or 2  # Processes in the parse stage
+QUEUE_SIZE = 200  # Fetched pages waiting to be parsed before fetchers block
+BATCH_SIZE = 16  # Pages sent to a parse process at once
+BATCH_WAIT = 0.05  # Seconds to wait for a batch to fill before sending it part-full
+
+
+def parse_batch(parse, batch):
+    """Parse (index, url, html) items in a worker process.
+
+    Returns ([(index, result, error, seconds)], cpu seconds spent, drained
+    counters). parse must be a module-level function so it can be pickled.
+    """
+    started = time.process_time()
+    results = []
+    for index, url, html in batch:
+        page_started = time.perf_counter()
+        try:
+            result, error = parse(html, url), None
+        except Exception as e:
+            result, error = None, str(e)
+        results.append((index, result, error, time.perf_counter() - page_started))
+    # Counters the parser bumped in this process (selector misses) travel back with the results
+    return results, time.process_time() - started, metrics.drain()
+
+
+class PipelineStats:
+    """Counters for both stages of a crawl pipeline."""
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.started = time.perf_counter()
+        self.fetched = 0
+        self.fetch_failures = 0
+        self.fetch_seconds = 0.0
+        self.cache_hits = 0
+        self.parsed = 0
+        self.parse_failures = 0
+        self.parse_cpu_seconds = 0.0
+        self.batches = 0
+        self.pool_restarts = 0
+        self.queue_samples = 0
+        self.queue_depth_total = 0
+        self.queue_depth_max = 0
+
+    def sample_queue(self, depth):
+        metrics.QUEUE_DEPTH.set(depth)
+        metrics.QUEUE_DEPTH_MAX.set_max(depth)
+        self.queue_samples += 1
+        self.queue_depth_total += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "fetch": {
+                "pages": self.fetched,
+                "failures": self.fetch_failures,
+                "cache_hits": self.cache_hits,
+                "pages_per_second": round(self.fetched / elapsed, 2) if elapsed else 0.0,
+                "avg_fetch_seconds": round(self.fetch_seconds / self.fetched, 4) if self.fetched else 0.0,
+            },
+            "queue": {
+                "capacity": self.queue_size,
+                "max_depth": self.queue_depth_max,
+                "avg_depth": round(self.queue_depth_total / self.queue_samples, 2) if self.queue_samples else 0.0,
+            },
+            "parse": {
+                "workers": self.workers,
+                "pages": self.parsed,
+                "failures": self.parse_failures,
+                "batches": self.batches,
+                "pool_restarts": self.pool_restarts,
+                "pages_per_second": round(self.parsed / elapsed, 2) if elapsed else 0.0,
+                "avg_parse_seconds": round(self.parse_cpu_seconds / self.parsed, 4) if self.parsed else 0.0,
+                # What the parse stage could sustain if it were never starved by fetching
+                "capacity_pages_per_second": (
+                    round(self.parsed * self.workers / self.parse_cpu_seconds, 1) if self.parse_cpu_seconds else None
+                ),
+            },
+        }
+
+
+class CrawlPipeline:
+    """Two-stage crawl: async I/O workers fill a bounded queue, a process pool parses it in batches."""
+
+    def __init__(self, engine, parse, workers=PARSE_WORKERS, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE):
+        self.engine = engine
+        self.parse = parse
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.stats = PipelineStats(workers, queue_size)
+        self._pool = None
+
+    def _replace_pool(self, broken):
+        """Swap in a fresh process pool for one whose worker died (once, however many batches noticed)."""
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=metrics.reset)
+            self.stats.pool_restarts += 1
+
+    async def _fetcher(self, jobs, queue, keys, deliver):
+        cache = self.engine.cache
+        for index, (key, url) in jobs:
+            keys[index] = (key, url)
+            started = time.perf_counter()
+            try:
+                headers = cache.conditional_headers(url) if cache is not None else None
+                status, response_headers, text = await self.engine.fetch_page(url, headers)
+                if cache is not None:
+                    result, digest, text = cache.prepare(url, status, response_headers, text, self.parse)
+                    if text is None and result is None:
+                        # 304 without a stored body: fetch it again unconditionally
+                        status, response_headers, text = await self.engine.fetch_page(url)
+                        result, digest, text = cache.prepare(url, status, response_headers, text, self.parse)
+                    if text is None:
+                        self.stats.fetched += 1
+                        self.stats.cache_hits += 1
+                        deliver(index, result)
+                        continue
+                    keys[index] = (key, url, digest)
+            except Exception as e:
+                print(f"Error processing {url}: {str(e)}")
+                self.stats.fetch_failures += 1
+                deliver(index, None)
+                continue
+            finally:
+                self.stats.fetch_seconds += time.perf_counter() - started
+
+            self.stats.fetched += 1
+            await queue.put((index, url, text))
+            self.stats.sample_queue(queue.qsize())
+
+    async def _dispatcher(self, queue, deliver, keys):
+        loop = asyncio.get_running_loop()
+        in_flight = set()
+        slots = asyncio.Semaphore(self.workers * 2)
+
+        async def run_batch(batch):
+            pool = self._pool
+            try:
+                results, cpu_seconds, counters = await loop.run_in_executor(pool, parse_batch, self.parse, batch)
+            except BrokenProcessPool as e:
+                # A worker died (killed, out of memory, crashed in native code): fail this batch, keep crawling
+                print(f"Parse worker died; {len(batch)} pages in its batch count as parse failures ({str(e)})")
+                self._replace_pool(pool)
+                results = [(index, None, "parse worker died", 0.0) for index, _, _ in batch]
+                cpu_seconds, counters = 0.0, []
+            finally:
+                slots.release()
+            self.stats.batches += 1
+            self.stats.parse_cpu_seconds += cpu_seconds
+            metrics.merge(counters)
+            parser = metrics.parser_name(self.parse)
+            for index, result, error, seconds in results:
+                metrics.record_parse(parser, seconds, result is None)
+                self.stats.parsed += 1
+                if error is not None:
+                    self.stats.parse_failures += 1
+                    print(f"Error parsing {keys[index][1]}: {error}")
+                elif self.engine.cache is not None and len(keys[index]) == 3:
+                    self.engine.cache.store_result(keys[index][1], self.parse, keys[index][2], result)
+                deliver(index, result)
+
+        done = False
+        while not done:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + BATCH_WAIT
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+            await slots.acquire()
+            task = asyncio.ensure_future(run_batch(batch))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def run(self, jobs, on_result=None):
+        """Crawl (key, url) jobs and return (key, result) pairs in completion order."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        keys = {}
+        results = []
+
+        def deliver(index, result):
+            key = keys[index][0]
+            if on_result is not None:
+                on_result(key, result)
+            results.append((key, result))
+
+        job_iter = enumerate(jobs)
+        await self.engine.start()
+        try:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=metrics.reset)
+            dispatcher = asyncio.ensure_future(self._dispatcher(queue, deliver, keys))
+            fetchers = [
+                asyncio.ensure_future(self._fetcher(job_iter, queue, keys, deliver))
+                for _ in range(self.engine.concurrency)
+            ]
+            await asyncio.gather(*fetchers)
+            await queue.put(None)
+            await dispatcher
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            await self.engine.stop()
+        return results
+
+
+def run_pipeline(jobs, parse, on_result=None, concurrency=MAX_CONCURRENCY, rate=REQUESTS_PER_SECOND, headers=None,
+                 timeout=DEFAULT_TIMEOUT, cache=None, workers=PARSE_WORKERS, queue_size=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, archive=None):
+    """Synchronous entry point: crawl (key, url) jobs, parsing in worker processes.
+
+    Returns ((key, result) pairs, stage report).
+    """
+    engine = CrawlEngine(concurrency=concurrency, rate=rate, headers=headers, timeout=timeout, cache=cache,
+                         archive=archive)
+    pipeline = CrawlPipeline(engine, parse, workers=workers, queue_size=queue_size, batch_size=batch_size)
+    results = asyncio.run(pipeline.run(jobs, on_result=on_result))
+    return results, pipeline.stats.report()
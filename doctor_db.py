@@ -0,0 +1,511 @@
+"""Load the standardized doctors into SQLite and serve DoctorStore-style queries from it.
+
+    python doctor_db.py [--force]
+
+builds (or refreshes) the database next to the standardized JSON, as does
+the standardize step when run with --database. app.py serves from it when
+started with DATA_BACKEND=sqlite but never builds it: the API picks up a
+rebuilt file, yet nothing rebuilds it when the JSON files change, so there
+is no hot reload from the JSON as with DoctorStore.
+
+Search here is FTS5 with exact and prefix matches only, so it finds fewer
+doctors than the fuzzy in-memory SearchIndex (on the full dataset,
+"Rezwan Kaiser" totals 9 here against 61 there).
+"""
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from chamber_schedule import chamber_intervals, merge_intervals, schedule_stats
+from doctor_store import (DATA_DIR, DEFAULT_PAGE_SIZE, INDEXED_FIELDS, MAX_PAGE_SIZE, RELOAD_CHECK_SECONDS,
+                          DoctorStore, field_value, field_values, normalize_value, project)
+from doctor_records import to_json
+from phone_numbers import chamber_phones, describe_matches, normalize_phone
+from search_index import FIELD_WEIGHTS, MIN_PREFIX_LENGTH, tokenize
+
+# Configuration
+DB_FILE = "doctors.sqlite3"
+DB_PATH = Path(os.environ.get("DOCTOR_DB") or DATA_DIR / DB_FILE)
+HOSPITALS_DIR = Path(__file__).parent.resolve() / "Hospitals"
+POOL_SIZE = 8  # Read-only connections shared by request threads
+INSERT_BATCH = 1000  # Rows per executemany call while loading
+SCHEMA_VERSION = "5"  # Bump when SCHEMA (or what meta holds) changes so existing databases get rebuilt
+
+# Fields stored in lookup tables; the other indexed fields are normalized columns on doctors
+LOOKUP_TABLES = {"specialty": "specialties", "hospital": "hospitals"}
+FTS_COLUMNS = ("name", "specialty", "qualification", "address")
+
+SCHEMA = f"""
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE specialties (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, name TEXT NOT NULL);
+CREATE TABLE hospitals (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, name TEXT NOT NULL, link TEXT, district TEXT);
+CREATE TABLE doctors (
+    id INTEGER PRIMARY KEY,  -- position in the standardized dataset, also the paging cursor
+    profile_url TEXT,
+    name TEXT,
+    district TEXT,
+    district_key TEXT,
+    designation TEXT,
+    designation_key TEXT,
+    workplace TEXT,
+    workplace_key TEXT,
+    qualification TEXT,
+    rating TEXT,
+    photo TEXT,
+    specialty_id INTEGER REFERENCES specialties(id),
+    hospital_id INTEGER REFERENCES hospitals(id),
+    record TEXT NOT NULL  -- the standardized record as JSON, returned as-is
+);
+CREATE TABLE chambers (
+    id INTEGER PRIMARY KEY,
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+    name TEXT,
+    address TEXT,
+    visiting_hour TEXT,
+    appointment TEXT,
+    url TEXT
+);
+-- Every district and profile URL of a doctor; doctors merged by entity_resolution have several
+CREATE TABLE doctor_districts (
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+    district TEXT NOT NULL,
+    district_key TEXT NOT NULL
+);
+CREATE TABLE profile_urls (profile_url TEXT NOT NULL, doctor_id INTEGER NOT NULL REFERENCES doctors(id));
+CREATE TABLE chamber_phones (  -- E.164 numbers of each chamber; chamber_index is its place in the record
+    phone TEXT NOT NULL,
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+    chamber_index INTEGER NOT NULL
+);
+CREATE TABLE opening_hours (  -- merged weekly intervals of each doctor's chambers, minutes from Monday 00:00
+    doctor_id INTEGER NOT NULL REFERENCES doctors(id),
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE doctors_fts USING fts5({", ".join(FTS_COLUMNS)}, tokenize='unicode61 remove_diacritics 2', prefix='{MIN_PREFIX_LENGTH}');
+"""
+
+# Created after the bulk insert, which is faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX profile_urls_url ON profile_urls(profile_url, doctor_id);
+CREATE INDEX doctor_districts_key ON doctor_districts(district_key, doctor_id);
+CREATE INDEX doctors_designation ON doctors(designation_key);
+CREATE INDEX doctors_workplace ON doctors(workplace_key);
+CREATE INDEX doctors_specialty ON doctors(specialty_id);
+CREATE INDEX doctors_hospital ON doctors(hospital_id);
+CREATE INDEX chambers_doctor ON chambers(doctor_id);
+CREATE INDEX chamber_phones_phone ON chamber_phones(phone);
+CREATE INDEX opening_hours_start ON opening_hours(start_minute, end_minute);
+"""
+
+
+def _lookup_id(table, name, rows, link=None, district=None):
+    """Return the id of a specialty/hospital, registering it on first sight."""
+    if not name:
+        return None
+    key = normalize_value(name)
+    entry = rows.get(key)
+    if entry is None:
+        entry = rows[key] = [len(rows) + 1, key, name, link, district] if table == "hospitals" else [len(rows) + 1, key, name]
+    elif table == "hospitals":
+        entry[3] = entry[3] or link
+        entry[4] = entry[4] or district
+    return entry[0]
+
+
+def _hospital_listings(hospitals_dir):
+    """Yield (name, link, district) from Hospitals/hospitals-<district>.json."""
+    for path in sorted(Path(hospitals_dir).glob("hospitals-*.json")):
+        district = path.stem.replace("hospitals-", "")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                hospitals = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Skipping {path.name}: {str(e)}")
+            continue
+        for hospital in hospitals:
+            yield hospital.get("name"), hospital.get("link"), district
+
+
+def built_signature(db_path=DB_PATH):
+    """Return the data file signature a database was built from, or None (also for an older schema)."""
+    if not Path(db_path).exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('signature', 'schema_version')"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return None
+    return meta.get("signature")
+
+
+def build_database(data_dir=DATA_DIR, db_path=DB_PATH, hospitals_dir=HOSPITALS_DIR, force=False):
+    """Load the standardized dataset into a new SQLite file and swap it into place.
+
+    Everything is inserted in one transaction with executemany batches and
+    the indexes are created afterwards. Returns the number of doctors loaded,
+    or None when the database is already built from the current files.
+    """
+    source = DoctorStore(data_dir)
+    if not force and built_signature(db_path) == json.dumps(source.signature()):
+        print(f"{db_path} is up to date")
+        return None
+
+    started = time.perf_counter()
+    doctors, signature = source.read()
+    db_path = Path(db_path)
+    tmp_path = Path(f"{db_path}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # Nothing reads the temp file until it is renamed, so skip journaling
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+
+        specialties, hospitals = {}, {}
+        doctor_rows, chamber_rows, hour_rows, fts_rows = [], [], [], []
+        district_rows, profile_rows, phone_rows = [], [], []
+        hours = {"chambers": 0, "parsed": 0}
+        unparseable = Counter()  # visiting_hour text -> chambers, as in OpenHoursIndex
+
+        def flush():
+            conn.executemany("INSERT INTO doctors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", doctor_rows)
+            conn.executemany(
+                "INSERT INTO chambers (doctor_id, name, address, visiting_hour, appointment, url) "
+                "VALUES (?, ?, ?, ?, ?, ?)", chamber_rows)
+            conn.executemany("INSERT INTO opening_hours VALUES (?, ?, ?)", hour_rows)
+            conn.executemany("INSERT INTO doctor_districts VALUES (?, ?, ?)", district_rows)
+            conn.executemany("INSERT INTO profile_urls VALUES (?, ?)", profile_rows)
+            conn.executemany("INSERT INTO chamber_phones VALUES (?, ?, ?)", phone_rows)
+            conn.executemany(f"INSERT INTO doctors_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                             fts_rows)
+            doctor_rows.clear()
+            chamber_rows.clear()
+            hour_rows.clear()
+            district_rows.clear()
+            profile_rows.clear()
+            phone_rows.clear()
+            fts_rows.clear()
+
+        conn.execute("BEGIN")
+        for position, doctor in enumerate(doctors):
+            source_info = doctor.get("source") or {}
+            keys = {field: normalize_value(field_value(doctor, field)) if field_value(doctor, field) else None
+                    for field in ("district", "designation", "workplace")}
+            chambers = doctor.get("chambers") or []
+            doctor_rows.append((
+                position,
+                doctor.get("profile_url"),
+                doctor.get("name"),
+                doctor.get("district"), keys["district"],
+                doctor.get("designation"), keys["designation"],
+                doctor.get("workplace"), keys["workplace"],
+                doctor.get("qualification"),
+                doctor.get("rating"),
+                doctor.get("photo"),
+                _lookup_id("specialties", doctor.get("specialty"), specialties),
+                _lookup_id("hospitals", source_info.get("hospital"), hospitals, source_info.get("link"),
+                           doctor.get("district")),
+                json.dumps(doctor, ensure_ascii=False, separators=(',', ':'), default=to_json),
+            ))
+            intervals = []
+            for index, chamber in enumerate(chambers):
+                phone_rows.extend((phone, position, index) for phone in chamber_phones(chamber))
+                chamber_rows.append((position, chamber.get("name"), chamber.get("address"),
+                                     chamber.get("visiting_hour"), chamber.get("appointment"), chamber.get("url")))
+                found = chamber_intervals(chamber)
+                hours["chambers"] += 1
+                if found:
+                    hours["parsed"] += 1
+                    intervals.extend(found)
+                elif chamber.get("visiting_hour"):
+                    unparseable[chamber["visiting_hour"]] += 1
+            hour_rows.extend((position, start, end) for start, end in merge_intervals(intervals))
+            district_keys = {}
+            for district in field_values(doctor, "district"):
+                district_keys.setdefault(normalize_value(district), district)
+            district_rows.extend((position, district, key) for key, district in district_keys.items())
+            profile_rows.extend((url, position) for url in dict.fromkeys(field_values(doctor, "profile_url")))
+            fts_rows.append((position, doctor.get("name"), doctor.get("specialty"), doctor.get("qualification"),
+                             " ".join(chamber.get("address") or "" for chamber in chambers)))
+            if len(doctor_rows) >= INSERT_BATCH:
+                flush()
+        flush()
+
+        # Hospitals nobody in the dataset lists as their source still get a row
+        for name, link, district in _hospital_listings(hospitals_dir):
+            _lookup_id("hospitals", name, hospitals, link, district)
+        conn.executemany("INSERT INTO specialties VALUES (?, ?, ?)", specialties.values())
+        conn.executemany("INSERT INTO hospitals VALUES (?, ?, ?, ?, ?)", hospitals.values())
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("signature", json.dumps(signature)),
+            ("schema_version", SCHEMA_VERSION),
+            ("built_at", str(time.time())),
+            ("doctors", str(len(doctors))),
+            ("visiting_hours", json.dumps(schedule_stats(hours["chambers"], hours["parsed"], unparseable),
+                                          ensure_ascii=False)),
+        ])
+        conn.execute("COMMIT")
+
+        conn.executescript(INDEXES)
+        conn.execute("INSERT INTO doctors_fts (doctors_fts) VALUES ('optimize')")
+        conn.execute("ANALYZE")
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    os.replace(tmp_path, db_path)
+    print(f"Loaded {len(doctors)} doctors, {len(hospitals)} hospitals and {len(specialties)} specialties "
+          f"into {db_path} in {time.perf_counter() - started:.2f}s")
+    return len(doctors)
+
+
+def _filter_sql(filters, open_at=None):
+    """Translate DoctorStore-style filters (and an open_at minute of the week) into WHERE clauses and parameters."""
+    clauses, params = [], []
+    if open_at is not None:
+        clauses.append("id IN (SELECT doctor_id FROM opening_hours WHERE start_minute <= ? AND end_minute > ?)")
+        params.extend((open_at, open_at))
+    for field, values in (filters or {}).items():
+        if field not in INDEXED_FIELDS or not values:
+            continue
+        keys = [normalize_value(value) for value in values]
+        marks = ", ".join("?" * len(keys))
+        if field == "district":
+            clauses.append(f"id IN (SELECT doctor_id FROM doctor_districts WHERE district_key IN ({marks}))")
+        elif field in LOOKUP_TABLES:
+            clauses.append(f"{field}_id IN (SELECT id FROM {LOOKUP_TABLES[field]} WHERE key IN ({marks}))")
+        else:
+            clauses.append(f"{field}_key IN ({marks})")
+        params.extend(keys)
+    return clauses, params
+
+
+def _fts_query(token):
+    """FTS5 query for one token, prefix-matched like SearchIndex.expand."""
+    return f'"{token}"*' if len(token) >= MIN_PREFIX_LENGTH else f'"{token}"'
+
+
+class DoctorDatabase:
+    """Read-only SQLite dataset with the same query methods as DoctorStore.
+
+    Connections are pooled and opened with mode=ro, so any number of threads
+    and worker processes can share one file. When build_database replaces the
+    file, pooled connections are reopened on their next use.
+    """
+
+    def __init__(self, db_path=DB_PATH, pool_size=POOL_SIZE, reload_interval=RELOAD_CHECK_SECONDS):
+        self.db_path = Path(db_path).resolve()
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"{self.db_path} not found; build it with python doctor_db.py")
+        self.pool_size = pool_size
+        self.reload_interval = reload_interval
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._version = self._file_version()
+        self._last_check = time.monotonic()
+
+    def _file_version(self):
+        stat = os.stat(self.db_path)
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _connect(self):
+        conn = sqlite3.connect(f"{self.db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _check_version(self):
+        if time.monotonic() - self._last_check < self.reload_interval:
+            return
+        self._last_check = time.monotonic()
+        try:
+            version = self._file_version()
+        except FileNotFoundError:
+            return
+        if version != self._version:
+            self._version = version
+            print(f"Reopening {self.db_path} after rebuild")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled read-only connection."""
+        self._check_version()
+        try:
+            version, conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.pool_size
+                if create:
+                    self._created += 1
+            if create:
+                version, conn = self._version, self._connect()
+            else:
+                version, conn = self._pool.get()
+        if version != self._version:
+            conn.close()
+            version, conn = self._version, self._connect()
+        try:
+            yield conn
+        finally:
+            self._pool.put((version, conn))
+
+    def version(self):
+        """Opaque token that changes whenever the database file is rebuilt."""
+        self._check_version()
+        return self._version
+
+    def _records(self, sql, params=()):
+        with self.connection() as conn:
+            return [json.loads(record) for (record,) in conn.execute(sql, params)]
+
+    def doctors(self):
+        """Return every doctor in the dataset."""
+        return self._records("SELECT record FROM doctors ORDER BY id")
+
+    def get(self, profile_url):
+        """Return the doctor with the given profile URL, or None."""
+        records = self._records("SELECT record FROM doctors WHERE id = "
+                                "(SELECT MIN(doctor_id) FROM profile_urls WHERE profile_url = ?)", (profile_url,))
+        return records[0] if records else None
+
+    def by_district(self, district):
+        """Return the doctors of one district."""
+        return self._records("SELECT record FROM doctors WHERE id IN "
+                             "(SELECT doctor_id FROM doctor_districts WHERE district_key = ?) ORDER BY id",
+                             (normalize_value(district),))
+
+    def query(self, filters=None, offset=0, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, open_at=None):
+        """Return one page of doctors matching the filters (see DoctorStore.query)."""
+        clauses, params = _filter_sql(filters, open_at)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        with self.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM doctors {where}", params).fetchone()[0]
+            if cursor is not None:
+                # Keyset paging: seek past the cursor instead of skipping offset rows
+                after = " AND ".join(clauses + ["id > ?"])
+                offset = total - conn.execute(f"SELECT COUNT(*) FROM doctors WHERE {after}",
+                                              params + [cursor]).fetchone()[0]
+                rows = conn.execute(f"SELECT id, record FROM doctors WHERE {after} ORDER BY id LIMIT ?",
+                                    params + [cursor, limit]).fetchall()
+            else:
+                rows = conn.execute(f"SELECT id, record FROM doctors {where} ORDER BY id LIMIT ? OFFSET ?",
+                                    params + [limit, offset]).fetchall()
+
+        next_cursor = rows[-1][0] if rows and offset + limit < total else None
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "doctors": [project(json.loads(record), fields) for _, record in rows],
+        }
+
+    def search(self, text, offset=0, limit=DEFAULT_PAGE_SIZE, fields=None):
+        """Return one page of doctors ranked by relevance to a free-text query.
+
+        Ranked like SearchIndex (more matched tokens first, then score) using
+        FTS5 bm25 with the same field weights; exact and prefix matches only,
+        typo tolerance needs the in-memory index. The doctors found are a
+        subset of what DoctorStore.search finds, so totals are lower.
+        """
+        tokens = list(dict.fromkeys(tokenize(text)))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        weights = ", ".join(str(FIELD_WEIGHTS[column]) for column in FTS_COLUMNS)
+        scores, matched = {}, {}
+
+        with self.connection() as conn:
+            for token in tokens:
+                for rowid, rank in conn.execute(
+                        f"SELECT rowid, bm25(doctors_fts, {weights}) FROM doctors_fts WHERE doctors_fts MATCH ?",
+                        (_fts_query(token),)):
+                    scores[rowid] = scores.get(rowid, 0.0) - rank  # bm25() is lower-is-better
+                    matched[rowid] = matched.get(rowid, 0) + 1
+            ranked = sorted(scores, key=lambda rowid: (-matched[rowid], -scores[rowid], rowid))
+            page = ranked[offset:offset + limit]
+            records = {}
+            if page:
+                marks = ", ".join("?" * len(page))
+                records = dict(conn.execute(f"SELECT id, record FROM doctors WHERE id IN ({marks})", page))
+
+        return {
+            "query": text,
+            "total": len(ranked),
+            "offset": offset,
+            "limit": limit,
+            "results": [
+                {"score": round(scores[rowid], 4), "doctor": project(json.loads(records[rowid]), fields)}
+                for rowid in page
+            ],
+        }
+
+    def lookup_phone(self, phone):
+        """Return the chambers, doctors and hospitals reachable on a phone number, or None."""
+        phone = normalize_phone(phone)
+        if not phone:
+            return None
+        with self.connection() as conn:
+            refs = conn.execute("SELECT doctor_id, chamber_index FROM chamber_phones WHERE phone = ? "
+                                "ORDER BY doctor_id, chamber_index", (phone,)).fetchall()
+            if not refs:
+                return None
+            ids = sorted({doctor_id for doctor_id, _ in refs})
+            marks = ", ".join("?" * len(ids))
+            records = {doctor_id: json.loads(record) for doctor_id, record in
+                       conn.execute(f"SELECT id, record FROM doctors WHERE id IN ({marks})", ids)}
+        return describe_matches(phone, refs, records.__getitem__)
+
+    def facets(self):
+        """Count doctors per value of every indexed field."""
+        result = {}
+        with self.connection() as conn:
+            for field in INDEXED_FIELDS:
+                if field == "district":
+                    sql = ("SELECT district, COUNT(*), MIN(doctor_id) FROM doctor_districts "
+                           "GROUP BY district_key ORDER BY district_key")
+                elif field in LOOKUP_TABLES:
+                    sql = (f"SELECT t.name, COUNT(*) FROM doctors d JOIN {LOOKUP_TABLES[field]} t "
+                           f"ON t.id = d.{field}_id GROUP BY t.key ORDER BY t.key")
+                else:
+                    # With a single min() aggregate, SQLite takes bare columns from that row: the first-seen label
+                    sql = (f"SELECT {field}, COUNT(*), MIN(id) FROM doctors WHERE {field}_key IS NOT NULL "
+                           f"GROUP BY {field}_key ORDER BY {field}_key")
+                result[field] = {row[0]: row[1] for row in conn.execute(sql)}
+        return result
+
+    def stats(self):
+        """Summarize the loaded dataset."""
+        with self.connection() as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            districts = dict(conn.execute(
+                "SELECT district_key, COUNT(*) FROM doctor_districts GROUP BY district_key ORDER BY district_key"))
+        return {
+            "doctors": int(meta.get("doctors", 0)),
+            "districts": districts,
+            "files": [name for name, _, _ in json.loads(meta.get("signature", "[]"))],
+            "loaded_at": float(meta.get("built_at", 0)),
+            "visiting_hours": json.loads(meta.get("visiting_hours", "{}")),
+        }
+
+
+if __name__ == "__main__":
+    build_database(force="--force" in sys.argv[1:])
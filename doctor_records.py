@@ -0,0 +1,149 @@
+"""Compact record classes for doctors and chambers.
+
+Records are read-only mappings with __slots__, so code written against the
+plain dicts (doctor.get('specialty'), {**doctor, ...}, 'rating' in doctor)
+keeps working. Each record remembers its key order, and to_dict() or the
+to_json hook gives back exactly the JSON of the original dict.
+
+The saving over dicts comes from three things:
+- no per-instance dict
+- one shared tuple of key names per distinct key order
+- one shared string object for each repeated value such as a district,
+  hospital, specialty, "Call Now" or a chamber URL
+"""
+from collections.abc import Mapping
+
+_strings = {}  # Pool of repeated field values
+_key_orders = {}  # Pool of key-order tuples
+
+
+def intern_value(value):
+    """Return the pooled copy of an equal string; other values pass through."""
+    if type(value) is str:
+        return _strings.setdefault(value, value)
+    return value
+
+
+def _plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Record(Mapping):
+    """Base class: a fixed set of slotted fields plus an overflow dict for unknown keys."""
+
+    __slots__ = ("_keys", "_extra")
+    FIELDS = ()
+    INTERNED = frozenset()  # Fields whose string values repeat across records
+    NESTED = {}  # Field -> record class for a nested dict or list of dicts
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Convert a dict (or another mapping) into a record of this class."""
+        if isinstance(data, cls):
+            return data
+        record = cls.__new__(cls)
+        extra = None
+        for key, value in data.items():
+            nested = cls.NESTED.get(key)
+            if nested is not None:
+                if isinstance(value, (list, tuple)):
+                    value = tuple(nested.from_dict(item) if isinstance(item, Mapping) else item for item in value)
+                elif isinstance(value, Mapping):
+                    value = nested.from_dict(value)
+            elif key in cls.INTERNED:
+                value = intern_value(value)
+            if key in cls._field_set:
+                setattr(record, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[intern_value(key)] = value
+        keys = tuple(data)
+        record._keys = _key_orders.setdefault(keys, keys)
+        record._extra = extra
+        return record
+
+    def __getitem__(self, key):
+        if key in self._keys:
+            if key in self._field_set:
+                return getattr(self, key)
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._keys:
+            return self[key]
+        return default
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        elif not isinstance(other, Mapping):
+            return NotImplemented
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def to_dict(self):
+        """Plain dict (nested records and tuples included) in the original key order."""
+        return {key: _plain(self[key]) for key in self._keys}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class ChamberRecord(Record):
+    """One chamber of a doctor profile."""
+
+    FIELDS = ("name", "address", "visiting_hour", "appointment", "url", "opening_hours", "phones")
+    __slots__ = FIELDS
+    # The same chamber is listed on many profiles, so every field repeats
+    INTERNED = frozenset(FIELDS)
+
+
+class SourceRecord(Record):
+    """The hospital listing a standardized doctor was found on."""
+
+    FIELDS = ("hospital", "link")
+    __slots__ = FIELDS
+    INTERNED = frozenset(FIELDS)
+
+
+class DoctorRecord(Record):
+    """A doctor, as scraped from a profile page, merged with its listing, or standardized."""
+
+    FIELDS = (
+        "district", "name", "profile_url", "photo", "qualification", "degree", "specialty", "designation",
+        "workplace", "rating", "chambers", "source", "chamber_link", "hospital_name", "hospital_link",
+        "source_hospital", "source_hospital_link", "districts", "sources", "profile_urls",
+    )
+    __slots__ = FIELDS
+    INTERNED = frozenset((
+        "district", "qualification", "degree", "specialty", "designation", "workplace", "rating",
+        "hospital_name", "hospital_link", "source_hospital", "source_hospital_link",
+    ))
+    NESTED = {"chambers": ChamberRecord, "source": SourceRecord, "sources": SourceRecord}
+
+
+def to_json(value):
+    """json.dump(s) default= hook that writes records as their original dicts."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
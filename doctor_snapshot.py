@@ -0,0 +1,414 @@
+"""Compact, memory-mappable binary snapshot of the standardized dataset.
+
+Layout (little-endian), every section 8-byte aligned:
+
+    MAGIC, uint32 header length, JSON header (section offsets, counts, signature)
+    strings   uint32 offsets[n + 1], UTF-8 blob -- every distinct string once
+    records   uint32 offsets[count + 1], tagged records referring to string ids
+    columns   uint32 string ids per record for profile_url and INDEXED_FIELDS; the
+              further values of merged records (see MULTI_VALUED) are in the header
+    postings  (term id, start, length) per search term, uint32 positions, float64 weights
+    hours     uint32 segment boundaries, offsets and positions of the opening-hours index
+    phones    (phone string id, start, length) per E.164 number, uint32 (position, chamber index) pairs
+
+Workers mmap the file read-only, so the pages are shared through the OS page
+cache instead of each process holding its own copy of the parsed JSON.
+Records and postings are decoded on access.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping, Sequence
+from chamber_schedule import OpenHoursIndex
+from doctor_store import INDEXED_FIELDS, column_value
+from phone_numbers import phone_refs
+from search_index import SearchIndex
+
+MAGIC = b"DOCSNAP1"
+NONE_ID = 0xFFFFFFFF  # Column value for a missing field
+COLUMNS = ("profile_url",) + INDEXED_FIELDS
+
+# Value tags in encoded records
+T_NONE, T_FALSE, T_TRUE, T_INT, T_FLOAT, T_STR, T_LIST, T_DICT = range(8)
+
+U32 = struct.Struct("<I")
+I64 = struct.Struct("<q")
+F64 = struct.Struct("<d")
+
+
+class _StringTable:
+    """Assign ids to distinct strings while writing."""
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+
+def _encode(value, strings, out):
+    if value is None:
+        out.append(T_NONE)
+    elif value is True:
+        out.append(T_TRUE)
+    elif value is False:
+        out.append(T_FALSE)
+    elif isinstance(value, int):
+        out.append(T_INT)
+        out += I64.pack(value)
+    elif isinstance(value, float):
+        out.append(T_FLOAT)
+        out += F64.pack(value)
+    elif isinstance(value, str):
+        out.append(T_STR)
+        out += U32.pack(strings.id(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(T_LIST)
+        out += U32.pack(len(value))
+        for item in value:
+            _encode(item, strings, out)
+    elif isinstance(value, Mapping):  # dicts and doctor_records records
+        out.append(T_DICT)
+        out += U32.pack(len(value))
+        for key, item in value.items():
+            out += U32.pack(strings.id(key))
+            _encode(item, strings, out)
+    else:
+        raise TypeError(f"Cannot store {type(value).__name__} in a snapshot")
+
+
+def _pad(buffer):
+    buffer += b"\0" * (-len(buffer) % 8)
+
+
+def write_snapshot(doctors, path, signature=()):
+    """Write doctors (and their search postings) to a snapshot file, atomically.
+
+    signature identifies the JSON files the records came from, so loaders can
+    tell when the snapshot is out of date.
+    """
+    strings = _StringTable()
+
+    records = bytearray()
+    record_offsets = [0]
+    for doctor in doctors:
+        _encode(doctor, strings, records)
+        record_offsets.append(len(records))
+
+    columns = bytearray()
+    extra_values = {}  # field -> {position: every value} for records with several
+    for field in COLUMNS:
+        for position, doctor in enumerate(doctors):
+            value = column_value(doctor, field)
+            if isinstance(value, list):
+                extra_values.setdefault(field, {})[str(position)] = value
+                value = value[0]
+            columns += U32.pack(strings.id(value) if value else NONE_ID)
+
+    index = SearchIndex(doctors)
+    terms = bytearray()
+    positions = bytearray()
+    weights = bytearray()
+    start = 0
+    for term in index.vocabulary:
+        postings = index.postings[term]
+        terms += struct.pack("<III", strings.id(term), start, len(postings))
+        for position, weight in postings.items():
+            positions += U32.pack(position)
+            weights += F64.pack(weight)
+        start += len(postings)
+
+    hours = OpenHoursIndex(doctors)
+    hour_offsets = [0]
+    hour_positions = []
+    for segment in hours.segments:
+        hour_positions.extend(segment)
+        hour_offsets.append(len(hour_positions))
+
+    phones = bytearray()
+    phone_pairs = bytearray()
+    start = 0
+    refs = phone_refs(doctors)
+    for phone, pairs in refs.items():
+        phones += struct.pack("<III", strings.id(phone), start, len(pairs))
+        for position, chamber_index in pairs:
+            phone_pairs += struct.pack("<II", position, chamber_index)
+        start += len(pairs)
+
+    blob = bytearray()
+    string_offsets = [0]
+    for value in strings.strings:
+        blob += value.encode("utf-8")
+        string_offsets.append(len(blob))
+
+    sections = {}
+    body = bytearray()
+
+    def add(name, *parts):
+        _pad(body)
+        sections[name] = len(body)
+        for part in parts:
+            body.extend(part)
+
+    add("string_offsets", struct.pack(f"<{len(string_offsets)}I", *string_offsets))
+    add("string_blob", blob)
+    add("record_offsets", struct.pack(f"<{len(record_offsets)}I", *record_offsets))
+    add("records", records)
+    add("columns", columns)
+    add("terms", terms)
+    add("positions", positions)
+    add("weights", weights)
+    add("hour_boundaries", struct.pack(f"<{len(hours.boundaries)}I", *hours.boundaries))
+    add("hour_offsets", struct.pack(f"<{len(hour_offsets)}I", *hour_offsets))
+    add("hour_positions", struct.pack(f"<{len(hour_positions)}I", *hour_positions))
+    add("phones", phones)
+    add("phone_pairs", phone_pairs)
+
+    header = json.dumps({
+        "count": len(doctors),
+        "strings": len(strings.strings),
+        "terms": len(index.vocabulary),
+        "columns": list(COLUMNS),
+        "phones": len(refs),
+        "extra_values": extra_values,
+        "sections": sections,
+        "signature": signature,
+        "hours": {
+            "segments": len(hours.segments),
+            "chambers": hours.chambers,
+            "parsed": hours.parsed,
+            "unparseable": dict(hours.unparseable),
+        },
+    }).encode("utf-8")
+    prefix = bytearray(MAGIC + U32.pack(len(header)) + header)
+    _pad(prefix)
+    # Section offsets are relative to the end of the header
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(prefix) + len(body)
+
+
+class MappedDoctors(Sequence):
+    """Read-only sequence of doctor records decoded from a snapshot on access."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("doctor index out of range")
+        return self._snapshot.record(index)
+
+
+class MappedPostings(Mapping):
+    """term -> {position: weight}, read from the snapshot's postings section per lookup."""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._terms = {}
+        view = snapshot.section("terms", snapshot.terms * 12).cast("I")
+        for i in range(snapshot.terms):
+            term_id, start, length = view[3 * i], view[3 * i + 1], view[3 * i + 2]
+            self._terms[snapshot.string(term_id)] = (start, length)
+
+    def counts(self):
+        """Number of records per term, without decoding the postings."""
+        return {term: length for term, (start, length) in self._terms.items()}
+
+    def __getitem__(self, term):
+        start, length = self._terms[term]
+        positions = self._snapshot.section("positions", 4 * (start + length)).cast("I")[start:start + length]
+        weights = self._snapshot.section("weights", 8 * (start + length)).cast("d")[start:start + length]
+        return dict(zip(positions.tolist(), weights.tolist()))
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def __iter__(self):
+        return iter(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+
+class MappedPhones(Mapping):
+    """E.164 number -> [(position, chamber index)], read from the snapshot's phone section per lookup."""
+
+    def __init__(self, snapshot, count):
+        self._snapshot = snapshot
+        self._phones = {}
+        view = snapshot.section("phones", count * 12).cast("I")
+        for i in range(count):
+            self._phones[snapshot.string(view[3 * i])] = (view[3 * i + 1], view[3 * i + 2])
+
+    def __getitem__(self, phone):
+        start, length = self._phones[phone]
+        pairs = self._snapshot.section("phone_pairs", 8 * (start + length)).cast("I")[2 * start:]
+        return [(pairs[2 * i], pairs[2 * i + 1]) for i in range(length)]
+
+    def __contains__(self, phone):
+        return phone in self._phones
+
+    def __iter__(self):
+        return iter(self._phones)
+
+    def __len__(self):
+        return len(self._phones)
+
+
+class MappedSegments(Sequence):
+    """Opening-hours segments (sorted positions per slice of the week), read per lookup."""
+
+    def __init__(self, offsets, positions):
+        self._offsets = offsets
+        self._positions = positions
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return self._positions[self._offsets[index]:self._offsets[index + 1]].tolist()
+
+
+class DoctorSnapshotFile:
+    """A snapshot file opened with mmap; safe to share between threads."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if self._view[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a doctor snapshot")
+        (header_length,) = U32.unpack_from(self._map, len(MAGIC))
+        start = len(MAGIC) + U32.size
+        header = json.loads(bytes(self._view[start:start + header_length]))
+        self._base = start + header_length + (-(start + header_length) % 8)
+        self.count = header["count"]
+        self.terms = header["terms"]
+        self.signature = header["signature"]
+        self._hours = header.get("hours")
+        self._extra_values = header.get("extra_values", {})
+        self._phone_count = header.get("phones")
+        self._sections = header["sections"]
+        self._string_offsets = self.section("string_offsets", 4 * (header["strings"] + 1)).cast("I")
+        self._string_blob = self._base + self._sections["string_blob"]
+        self._record_offsets = self.section("record_offsets", 4 * (self.count + 1)).cast("I")
+        self._records = self._base + self._sections["records"]
+        # Decoded strings are cached so every record shares one object per distinct string
+        self._strings = [None] * header["strings"]
+
+    def section(self, name, length):
+        """Zero-copy view of the first length bytes of a section."""
+        start = self._base + self._sections[name]
+        return self._view[start:start + length]
+
+    def string(self, string_id):
+        value = self._strings[string_id]
+        if value is None:
+            start = self._string_blob + self._string_offsets[string_id]
+            end = self._string_blob + self._string_offsets[string_id + 1]
+            value = self._strings[string_id] = sys.intern(str(self._view[start:end], "utf-8"))
+        return value
+
+    def _decode(self, offset):
+        tag = self._map[offset]
+        offset += 1
+        if tag == T_STR:
+            return self.string(U32.unpack_from(self._map, offset)[0]), offset + 4
+        if tag == T_DICT:
+            (length,) = U32.unpack_from(self._map, offset)
+            offset += 4
+            value = {}
+            for _ in range(length):
+                key = self.string(U32.unpack_from(self._map, offset)[0])
+                value[key], offset = self._decode(offset + 4)
+            return value, offset
+        if tag == T_LIST:
+            (length,) = U32.unpack_from(self._map, offset)
+            offset += 4
+            value = []
+            for _ in range(length):
+                item, offset = self._decode(offset)
+                value.append(item)
+            return value, offset
+        if tag == T_NONE:
+            return None, offset
+        if tag == T_TRUE:
+            return True, offset
+        if tag == T_FALSE:
+            return False, offset
+        if tag == T_INT:
+            return I64.unpack_from(self._map, offset)[0], offset + 8
+        if tag == T_FLOAT:
+            return F64.unpack_from(self._map, offset)[0], offset + 8
+        raise ValueError(f"Corrupt snapshot record at byte {offset - 1}")
+
+    def record(self, position):
+        """Decode one doctor record."""
+        return self._decode(self._records + self._record_offsets[position])[0]
+
+    def doctors(self):
+        return MappedDoctors(self)
+
+    def columns(self):
+        """{field: [value, list of values or None per record]} for profile_url and the indexed fields."""
+        view = self.section("columns", 4 * self.count * len(COLUMNS)).cast("I")
+        columns = {}
+        for i, field in enumerate(COLUMNS):
+            ids = view[i * self.count:(i + 1) * self.count]
+            columns[field] = [None if string_id == NONE_ID else self.string(string_id) for string_id in ids]
+            for position, values in self._extra_values.get(field, {}).items():
+                columns[field][int(position)] = values
+        return columns
+
+    def search_index(self):
+        """SearchIndex over the snapshot's stored postings."""
+        return SearchIndex.from_postings(self.count, MappedPostings(self))
+
+    def phones(self):
+        """Phone lookup over the snapshot's stored refs, or None for snapshots written without one."""
+        if self._phone_count is None:
+            return None
+        return MappedPhones(self, self._phone_count)
+
+    def open_hours(self):
+        """OpenHoursIndex over the snapshot's stored segments, or None for snapshots written without one."""
+        if self._hours is None:
+            return None
+        segments = self._hours["segments"]
+        offsets = self.section("hour_offsets", 4 * (segments + 1)).cast("I")
+        return OpenHoursIndex.from_parts(
+            self.section("hour_boundaries", 4 * segments).cast("I").tolist(),
+            MappedSegments(offsets, self.section("hour_positions", 4 * offsets[-1]).cast("I")),
+            self._hours["chambers"], self._hours["parsed"], self._hours["unparseable"],
+        )
+
+
+def snapshot_signature(path):
+    """Return the JSON file signature a snapshot was written from, or None."""
+    try:
+        return DoctorSnapshotFile(path).signature
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,377 @@
+import bisect
+import json
+import threading
+import time
+from pathlib import Path
+from chamber_schedule import OpenHoursIndex
+from doctor_records import DoctorRecord
+from jsonl_io import iter_jsonl, latest_outputs
+from phone_numbers import describe_matches, normalize_phone, phone_refs
+from search_index import SearchIndex
+
+# Configuration
+DATA_DIR = Path(__file__).parent.resolve() / "Standardized_Doctor_Details"
+COMBINED_FILE = "all-doctors-combined"  # .json or .jsonl, whichever was written last
+DISTRICT_PATTERN = "standardized-*.json*"
+SNAPSHOT_FILE = "all-doctors-combined.snapshot"  # Binary snapshot written by standardize_pipeline
+RELOAD_CHECK_SECONDS = 2  # How often to stat the data files for changes
+INDEXED_FIELDS = ("district", "specialty", "designation", "workplace", "hospital")
+# Fields that entity_resolution may give several values, and the list field holding them all
+MULTI_VALUED = {"district": "districts", "profile_url": "profile_urls"}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def load_json_data(filename):
+    """Load JSON data from file."""
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def normalize_value(value):
+    """Normalize a field value for exact, case-insensitive index lookups."""
+    return " ".join(str(value).split()).casefold()
+
+
+def field_value(doctor, field):
+    """Read an indexed field from a standardized doctor record."""
+    if field == "hospital":
+        return (doctor.get("source") or {}).get("hospital")
+    return doctor.get(field)
+
+
+def field_values(doctor, field):
+    """All values of a field: every district of a doctor merged across districts, else just field_value."""
+    values = doctor.get(MULTI_VALUED.get(field, ""))
+    if values:
+        return list(values)
+    value = field_value(doctor, field)
+    return [value] if value else []
+
+
+def column_value(doctor, field):
+    """Value of a field for DoctorSnapshot columns: a list when a merged record has several."""
+    values = field_values(doctor, field)
+    return (values if len(values) > 1 else values[0]) if values else None
+
+
+def project(doctor, fields):
+    """Keep only the requested top-level fields of a doctor record."""
+    if not fields:
+        return doctor
+    return {field: doctor[field] for field in fields if field in doctor}
+
+
+class DoctorSnapshot:
+    """One immutable, indexed version of the standardized dataset."""
+
+    def __init__(self, doctors, signature, columns=None, search_index=None, open_hours=None, phones=None):
+        """doctors is a list of records or any sequence of them (see doctor_snapshot).
+
+        columns optionally supplies {field: [value per record]} for profile_url
+        and the indexed fields, so the indexes can be built without decoding
+        every record. A value may be a list for records with several (see
+        MULTI_VALUED).
+        """
+        self.doctors = doctors
+        self.signature = signature
+        self.loaded_at = time.time()
+        self.by_profile = {}
+        self._search_index = search_index
+        self._open_hours = open_hours
+        self._phones = phones
+        # field -> normalized value -> ascending list of record positions
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        # field -> normalized value -> value as first seen, for facet listings
+        self.labels = {field: {} for field in INDEXED_FIELDS}
+
+        if columns is None:
+            columns = {
+                field: [column_value(doctor, field) for doctor in doctors]
+                for field in ("profile_url",) + INDEXED_FIELDS
+            }
+        for position, profile_urls in enumerate(columns["profile_url"]):
+            for profile_url in profile_urls if isinstance(profile_urls, list) else [profile_urls]:
+                if profile_url:
+                    self.by_profile.setdefault(profile_url, position)
+        for field in INDEXED_FIELDS:
+            for position, values in enumerate(columns[field]):
+                seen = set()
+                for value in values if isinstance(values, list) else [values]:
+                    if not value:
+                        continue
+                    key = normalize_value(value)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    self.indexes[field].setdefault(key, []).append(position)
+                    self.labels[field].setdefault(key, value)
+
+    @property
+    def search_index(self):
+        """Full-text index over the snapshot, built on first use."""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.doctors)
+        return self._search_index
+
+    @property
+    def open_hours(self):
+        """Chamber opening-hours interval index, built on first use."""
+        if self._open_hours is None:
+            self._open_hours = OpenHoursIndex(self.doctors)
+        return self._open_hours
+
+    @property
+    def phones(self):
+        """E.164 number -> [(position, chamber index)], built on first use."""
+        if self._phones is None:
+            self._phones = phone_refs(self.doctors)
+        return self._phones
+
+    def match(self, filters, open_at=None):
+        """Return the ascending positions of records matching every filter.
+
+        filters maps an indexed field to a list of accepted values; values of
+        one field are OR-ed, different fields are AND-ed. open_at (a minute of
+        the week, see chamber_schedule) keeps only doctors with a chamber open
+        at that time.
+        """
+        candidate_sets = []
+        if open_at is not None:
+            candidate_sets.append(self.open_hours.open_at(open_at))
+        for field, values in filters.items():
+            index = self.indexes[field]
+            if len(values) == 1:
+                candidate_sets.append(index.get(normalize_value(values[0]), []))
+            else:
+                merged = set()
+                for value in values:
+                    merged.update(index.get(normalize_value(value), []))
+                candidate_sets.append(sorted(merged))
+        if not candidate_sets:
+            return range(len(self.doctors))
+
+        candidate_sets.sort(key=len)
+        smallest = candidate_sets[0]
+        if len(candidate_sets) == 1:
+            return smallest
+        others = [set(positions) for positions in candidate_sets[1:]]
+        return [position for position in smallest if all(position in other for other in others)]
+
+
+class DoctorStore:
+    """Serve the standardized doctor files from memory, reloading them when they change on disk."""
+
+    def __init__(self, data_dir=DATA_DIR, reload_interval=RELOAD_CHECK_SECONDS, use_snapshot=False):
+        self.data_dir = Path(data_dir)
+        self.reload_interval = reload_interval
+        self.use_snapshot = use_snapshot
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+    def _data_files(self):
+        """List the combined file followed by the per-district files, sorted by name."""
+        combined = latest_outputs(self.data_dir.glob(f"{COMBINED_FILE}.json*"))
+        files = combined + latest_outputs(self.data_dir.glob(DISTRICT_PATTERN))
+        snapshot_path = self.data_dir / SNAPSHOT_FILE
+        if self.use_snapshot and snapshot_path.exists():
+            files.append(snapshot_path)
+        return files
+
+    def _signature(self, files):
+        """Fingerprint the data files by name, size and modification time."""
+        signature = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature.append((path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def _read_doctors(self, files):
+        """Read the combined file, then add any district it does not already cover."""
+        doctors = []
+        covered_districts = set()
+        for path in files:
+            district = None
+            if path.name == SNAPSHOT_FILE:
+                continue
+            if path.stem != COMBINED_FILE:
+                district = path.stem.replace("standardized-", "")
+                if district in covered_districts:
+                    continue
+            records = list(iter_jsonl(path)) if path.suffix == ".jsonl" else load_json_data(path)
+            if not isinstance(records, list):
+                print(f"Skipping {path.name} - expected a list of doctors")
+                continue
+            # Slotted records with pooled strings take well under half the memory of the dicts
+            records = [DoctorRecord.from_dict(doctor) for doctor in records]
+            doctors.extend(records)
+            if district:
+                covered_districts.add(district)
+            else:
+                covered_districts.update(district.lower() for doctor in records
+                                         for district in field_values(doctor, 'district'))
+        return doctors
+
+    def signature(self):
+        """Fingerprint of the data files currently on disk."""
+        return self._signature(self._data_files())
+
+    def _open_snapshot(self, files, signature):
+        """Build a snapshot from the mmapped binary file if it matches the JSON files, else None."""
+        # Imported here: doctor_snapshot builds on this module
+        from doctor_snapshot import DoctorSnapshotFile
+
+        if not files or files[-1].name != SNAPSHOT_FILE:
+            return None
+        json_signature = [list(entry) for entry in self._signature(files[:-1])]
+        try:
+            mapped = DoctorSnapshotFile(files[-1])
+        except (OSError, ValueError) as e:
+            print(f"Ignoring {SNAPSHOT_FILE}: {str(e)}")
+            return None
+        if mapped.signature != json_signature:
+            print(f"Ignoring {SNAPSHOT_FILE}: older than the JSON files")
+            return None
+        return DoctorSnapshot(mapped.doctors(), signature, columns=mapped.columns(),
+                              search_index=mapped.search_index(), open_hours=mapped.open_hours(),
+                              phones=mapped.phones())
+
+    def read(self):
+        """Read the current data files without indexing them; returns (doctors, signature)."""
+        files = self._data_files()
+        return self._read_doctors(files), self._signature(files)
+
+    def load(self):
+        """Load (or reload) the dataset from disk and swap it in atomically."""
+        with self._lock:
+            files = self._data_files()
+            signature = self._signature(files)
+            if self._snapshot is not None and self._snapshot.signature == signature:
+                self._last_check = time.monotonic()
+                return self._snapshot
+            snapshot = self._open_snapshot(files, signature) if self.use_snapshot else None
+            if snapshot is not None:
+                self._snapshot = snapshot
+                self._last_check = time.monotonic()
+                print(f"Mapped {len(snapshot.doctors)} doctors from {self.data_dir / SNAPSHOT_FILE}")
+                return self._snapshot
+            try:
+                doctors = self._read_doctors(files)
+            except (OSError, json.JSONDecodeError) as e:
+                # Keep serving the previous version if a file is mid-write or broken.
+                print(f"Failed to load doctor data from {self.data_dir}: {str(e)}")
+                if self._snapshot is None:
+                    self._snapshot = DoctorSnapshot([], ())
+                return self._snapshot
+            snapshot = DoctorSnapshot(doctors, signature)
+            # Build before swapping in so requests never pay for it
+            snapshot.search_index
+            snapshot.open_hours
+            snapshot.phones
+            self._snapshot = snapshot
+            self._last_check = time.monotonic()
+            print(f"Loaded {len(doctors)} doctors from {self.data_dir}")
+            return self._snapshot
+
+    def snapshot(self):
+        """Return the current dataset, reloading first if the files changed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.load()
+        if time.monotonic() - self._last_check >= self.reload_interval:
+            self._last_check = time.monotonic()
+            if self._signature(self._data_files()) != snapshot.signature:
+                return self.load()
+        return snapshot
+
+    def version(self):
+        """Opaque token that changes whenever the served dataset does."""
+        return self.snapshot().signature
+
+    def doctors(self):
+        """Return every doctor in the dataset."""
+        doctors = self.snapshot().doctors
+        return doctors if isinstance(doctors, list) else list(doctors)
+
+    def get(self, profile_url):
+        """Return the doctor with the given profile URL, or None."""
+        snapshot = self.snapshot()
+        position = snapshot.by_profile.get(profile_url)
+        return snapshot.doctors[position] if position is not None else None
+
+    def by_district(self, district):
+        """Return the doctors of one district."""
+        snapshot = self.snapshot()
+        return [snapshot.doctors[i] for i in snapshot.indexes["district"].get(normalize_value(district), [])]
+
+    def query(self, filters=None, offset=0, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, open_at=None):
+        """Return one page of doctors matching the filters (and open at open_at, if given).
+
+        Pages are addressed either by offset or by cursor; the cursor returned
+        as next_cursor is the position of the last record on the page and
+        stays valid while the dataset version does not change.
+        """
+        snapshot = self.snapshot()
+        positions = snapshot.match(filters or {}, open_at)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        if cursor is not None:
+            offset = bisect.bisect_right(positions, cursor)
+        page = positions[offset:offset + limit]
+        next_cursor = page[-1] if page and offset + limit < len(positions) else None
+
+        return {
+            "total": len(positions),
+            "offset": offset,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "doctors": [project(snapshot.doctors[i], fields) for i in page],
+        }
+
+    def search(self, text, offset=0, limit=DEFAULT_PAGE_SIZE, fields=None):
+        """Return one page of doctors ranked by relevance to a free-text query."""
+        snapshot = self.snapshot()
+        ranked = snapshot.search_index.search(text)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return {
+            "query": text,
+            "total": len(ranked),
+            "offset": offset,
+            "limit": limit,
+            "results": [
+                {"score": score, "doctor": project(snapshot.doctors[position], fields)}
+                for score, position in ranked[offset:offset + limit]
+            ],
+        }
+
+    def lookup_phone(self, phone):
+        """Return the chambers, doctors and hospitals reachable on a phone number, or None."""
+        snapshot = self.snapshot()
+        phone = normalize_phone(phone)
+        refs = snapshot.phones.get(phone) if phone else None
+        if not refs:
+            return None
+        return describe_matches(phone, refs, snapshot.doctors.__getitem__)
+
+    def facets(self):
+        """Count doctors per value of every indexed field."""
+        snapshot = self.snapshot()
+        return {
+            field: {snapshot.labels[field][key]: len(positions) for key, positions in sorted(index.items())}
+            for field, index in snapshot.indexes.items()
+        }
+
+    def stats(self):
+        """Summarize the loaded dataset."""
+        snapshot = self.snapshot()
+        return {
+            "doctors": len(snapshot.doctors),
+            "districts": {district: len(ids) for district, ids in sorted(snapshot.indexes["district"].items())},
+            "files": [name for name, _, _ in snapshot.signature],
+            "loaded_at": snapshot.loaded_at,
+            "visiting_hours": snapshot.open_hours.stats(),
+        }
@@ -0,0 +1,149 @@
+"""Merge records of the same doctor across districts and hospital listings.
+
+Two records are the same doctor when they share a profile URL, or when
+they share a normalized name and a chamber phone number and their
+specialties overlap. Candidates come from hash blocks keyed on
+(name, phone), so the cost grows with the number of records rather than
+the number of pairs. The specialty check keeps two doctors with a common
+name apart when they only share a hospital's switchboard number.
+"""
+import re
+from collections import defaultdict
+from phone_numbers import chamber_phones
+
+# Configuration
+MAX_BLOCK_SIZE = 50  # Larger (name, phone) blocks are too generic to be evidence
+SPECIALTY_OVERLAP = 0.5  # Minimum Jaccard overlap of specialty words for a name + phone match
+
+TITLES = {"dr", "prof", "professor", "assoc", "asst", "associate", "assistant", "lt", "col", "brig", "gen",
+          "major", "maj", "capt", "retd", "rtd"}
+MD_SPELLINGS = {"md", "mohammad", "mohammed", "muhammad", "muhammed", "mohamad", "mohammod", "mohd"}
+SPECIALTY_STOPWORDS = {"specialist", "surgeon", "and", "diseases", "consultant"}
+
+
+def name_key(name):
+    """Normalize a doctor's name for blocking: lowercase, no titles or punctuation, one spelling of 'Md.'."""
+    words = re.findall(r"[a-z]+", (name or "").lower())
+    return " ".join("md" if word in MD_SPELLINGS else word for word in words if word not in TITLES)
+
+
+def phone_keys(doctor):
+    """E.164 chamber phone numbers of a doctor."""
+    return {phone for chamber in doctor.get("chambers") or [] for phone in chamber_phones(chamber)}
+
+
+def _specialty_words(doctor):
+    return set(re.findall(r"[a-z]+", (doctor.get("specialty") or "").lower())) - SPECIALTY_STOPWORDS
+
+
+def same_specialty(first, second):
+    """True when the specialties overlap enough, or either record has none."""
+    a, b = _specialty_words(first), _specialty_words(second)
+    if not a or not b:
+        return True
+    return len(a & b) / len(a | b) >= SPECIALTY_OVERLAP
+
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        # The earlier record stays the representative
+        if second < first:
+            first, second = second, first
+        self.parent[second] = first
+        return True
+
+
+def _chamber_key(chamber):
+    return tuple(" ".join(str(chamber.get(field) or "").lower().split())
+                 for field in ("address", "visiting_hour", "appointment"))
+
+
+def merge_records(records):
+    """Merge one doctor's records: the first wins, gaps are filled from the rest, chambers are unioned.
+
+    Records from several districts, hospital listings or profile URLs keep
+    them all in 'districts', 'sources' and 'profile_urls'.
+    """
+    merged = dict(records[0])
+    chambers = list(merged.get("chambers") or [])
+    seen_chambers = {_chamber_key(chamber) for chamber in chambers}
+    districts, sources, profile_urls = [], [], []
+    for record in records:
+        for key, value in record.items():
+            if value and not merged.get(key):
+                merged[key] = value
+        for chamber in record.get("chambers") or []:
+            key = _chamber_key(chamber)
+            if key not in seen_chambers:
+                seen_chambers.add(key)
+                chambers.append(chamber)
+        for values, value in ((districts, record.get("district")), (sources, record.get("source")),
+                              (profile_urls, record.get("profile_url"))):
+            if value and value not in values:
+                values.append(value)
+    if chambers:
+        merged["chambers"] = chambers
+    if len(districts) > 1:
+        merged["districts"] = districts
+    if len(sources) > 1:
+        merged["sources"] = [dict(source) for source in sources]
+    if len(profile_urls) > 1:
+        merged["profile_urls"] = profile_urls
+    return merged
+
+
+def resolve_doctors(doctors):
+    """Group the records of the same doctor and merge each group.
+
+    Returns (resolved records in order of first appearance, stats).
+    """
+    doctors = list(doctors)
+    groups = _DisjointSet(len(doctors))
+    by_url = {}
+    blocks = defaultdict(list)
+    url_merges = fuzzy_merges = 0
+
+    for position, doctor in enumerate(doctors):
+        profile_url = doctor.get("profile_url")
+        if profile_url:
+            first = by_url.setdefault(profile_url, position)
+            if first != position and groups.union(first, position):
+                url_merges += 1
+        name = name_key(doctor.get("name"))
+        if name:
+            for phone in phone_keys(doctor):
+                blocks[(name, phone)].append(position)
+
+    for block in blocks.values():
+        if len(block) < 2 or len(block) > MAX_BLOCK_SIZE:
+            continue
+        for i, first in enumerate(block):
+            for second in block[i + 1:]:
+                if groups.find(first) != groups.find(second) and same_specialty(doctors[first], doctors[second]):
+                    groups.union(first, second)
+                    fuzzy_merges += 1
+
+    members = defaultdict(list)
+    for position in range(len(doctors)):
+        members[groups.find(position)].append(doctors[position])
+    resolved = [merge_records(group) if len(group) > 1 else group[0] for group in members.values()]
+
+    return resolved, {
+        "records": len(doctors),
+        "doctors": len(resolved),
+        "merged_by_profile_url": url_merges,
+        "merged_by_name_and_phone": fuzzy_merges,
+        "multi_district": sum(1 for doctor in resolved if doctor.get("districts")),
+    }
@@ -0,0 +1,337 @@
+import os
+from bs4 import BeautifulSoup
+import metrics
+
+try:
+    import lxml  # noqa: F401
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Configuration
+BACKENDS = ("html.parser", "lxml", "selectolax")
+# Override with PARSER_BACKEND=html.parser|lxml|selectolax; defaults to the fastest installed backend
+PARSER_BACKEND = os.environ.get("PARSER_BACKEND") or ("selectolax" if LexborHTMLParser else "lxml" if lxml else "html.parser")
+
+
+def available_backends():
+    """Return the parser backends that can be used in this environment."""
+    available = ["html.parser"]
+    if lxml is not None:
+        available.append("lxml")
+    if LexborHTMLParser is not None:
+        available.append("selectolax")
+    return available
+
+
+def _resolve(backend):
+    backend = backend or PARSER_BACKEND
+    if backend not in available_backends():
+        raise ValueError(f"Parser backend '{backend}' is not installed (available: {', '.join(available_backends())})")
+    return backend
+
+
+def make_soup(html, backend=None):
+    """Build a BeautifulSoup tree with the html.parser or lxml tree builder."""
+    backend = _resolve(backend)
+    return BeautifulSoup(html, 'lxml' if backend == 'lxml' else 'html.parser')
+
+
+# --- selectolax helpers mirroring the BeautifulSoup calls used below ---
+
+def _lx_text(node, separator='', strip=False):
+    """Equivalent of Tag.get_text(separator, strip=strip) for a selectolax node."""
+    parts = []
+    for child in node.traverse(include_text=True):
+        if not child.is_text_node:
+            continue
+        text = child.text_content or ''
+        if strip:
+            text = text.strip()
+            if not text:
+                continue
+        parts.append(text)
+    return separator.join(parts)
+
+
+def _lx_find_next(node, tag):
+    """Equivalent of Tag.find_next(tag): the first matching element after node's start tag."""
+    inside = node.css_first(tag)
+    if inside is not None:
+        return inside
+    current = node
+    while current is not None:
+        sibling = current.next
+        while sibling is not None:
+            if sibling.is_element_node:
+                if sibling.tag == tag:
+                    return sibling
+                found = sibling.css_first(tag)
+                if found is not None:
+                    return found
+            sibling = sibling.next
+        current = current.parent
+    return None
+
+
+# --- doctor profile pages (process_all_districts.scrape_doctor_details) ---
+
+def _chamber_from_lines(chamber_info):
+    chamber = {}
+    for line in chamber_info:
+        if 'address' in line.lower():
+            chamber["address"] = line.split(':', 1)[-1].strip()
+        elif 'hour' in line.lower():
+            chamber["visiting_hour"] = line.split(':', 1)[-1].strip() if ':' in line else line.strip()
+        elif 'appointment' in line.lower():
+            chamber["appointment"] = line.split(':', 1)[-1].strip()
+        else:
+            chamber["name"] = line.strip()
+    return chamber
+
+
+def _count_misses(parser, checks):
+    """Count the (selector, found) elements a parser expected but did not find."""
+    for selector, found in checks:
+        if not found:
+            metrics.SELECTOR_MISSES.inc(parser=parser, selector=selector)
+
+
+def _empty_profile(url):
+    return {
+        "profile_url": url,
+        "name": None,
+        "photo": None,
+        "qualification": None,
+        "specialty": None,
+        "designation": None,
+        "workplace": None,
+        "rating": None,
+        "chambers": []
+    }
+
+
+def _profile_bs4(html, url, backend):
+    soup = make_soup(html, backend)
+    doctor_data = _empty_profile(url)
+
+    # Extract basic info
+    header = soup.find('header', class_='entry-header')
+    if header:
+        photo = header.find('img')
+        if photo:
+            doctor_data["photo"] = photo.get('src')
+
+        name = header.find('h1', class_='entry-title')
+        if name:
+            doctor_data["name"] = name.get_text(strip=True)
+
+        info_items = header.select('div.info ul li')
+        for key, item in zip(("qualification", "specialty", "designation", "workplace"), info_items):
+            doctor_data[key] = item.get_text(strip=True)
+
+        rating_div = header.find('div', class_='ssr-rating')
+        if rating_div:
+            doctor_data["rating"] = rating_div.get_text(strip=True)
+
+    # Extract chamber information
+    entry_content = soup.find('div', class_='entry-content')
+    if entry_content:
+        chambers = []
+        for h2 in entry_content.find_all('h2'):
+            if 'chamber' in h2.get_text().lower() or 'appointment' in h2.get_text().lower():
+                next_p = h2.find_next('p')
+                if next_p:
+                    chamber = _chamber_from_lines(next_p.get_text('\n', strip=True).split('\n'))
+                    chamber_link = next_p.find('a')
+                    if chamber_link:
+                        chamber["url"] = chamber_link.get('href')
+                    chambers.append(chamber)
+        doctor_data["chambers"] = chambers
+
+    return doctor_data
+
+
+def _profile_selectolax(html, url):
+    tree = LexborHTMLParser(html)
+    doctor_data = _empty_profile(url)
+
+    header = tree.css_first('header.entry-header')
+    if header:
+        photo = header.css_first('img')
+        if photo:
+            doctor_data["photo"] = photo.attributes.get('src')
+
+        name = header.css_first('h1.entry-title')
+        if name:
+            doctor_data["name"] = _lx_text(name, strip=True)
+
+        info_items = header.css('div.info ul li')
+        for key, item in zip(("qualification", "specialty", "designation", "workplace"), info_items):
+            doctor_data[key] = _lx_text(item, strip=True)
+
+        rating_div = header.css_first('div.ssr-rating')
+        if rating_div:
+            doctor_data["rating"] = _lx_text(rating_div, strip=True)
+
+    entry_content = tree.css_first('div.entry-content')
+    if entry_content:
+        chambers = []
+        for h2 in entry_content.css('h2'):
+            heading = _lx_text(h2).lower()
+            if 'chamber' in heading or 'appointment' in heading:
+                next_p = _lx_find_next(h2, 'p')
+                if next_p:
+                    chamber = _chamber_from_lines(_lx_text(next_p, '\n', strip=True).split('\n'))
+                    chamber_link = next_p.css_first('a')
+                    if chamber_link:
+                        chamber["url"] = chamber_link.attributes.get('href')
+                    chambers.append(chamber)
+        doctor_data["chambers"] = chambers
+
+    return doctor_data
+
+
+def parse_doctor_profile(html, url, backend=None):
+    """Extract a doctor's details and chambers from a profile page."""
+    backend = _resolve(backend)
+    if backend == 'selectolax':
+        profile = _profile_selectolax(html, url)
+    else:
+        profile = _profile_bs4(html, url, backend)
+    _count_misses("profile", (
+        ("header.entry-header h1.entry-title", profile["name"]),
+        ("header.entry-header div.info ul li", profile["qualification"]),
+        ("div.entry-content h2 + p", profile["chambers"]),
+    ))
+    return profile
+
+
+# --- specialty/hospital listing pages (scrape_doctor_info) ---
+
+def _listing_bs4(html, url, backend):
+    soup = make_soup(html, backend)
+    hospital_doctors = []
+    for doctor in soup.select('ul.doctors li.doctor'):
+        try:
+            title = doctor.select_one('h3.title a')
+            photo = doctor.select_one('.photo img')
+            info_items = doctor.select('.info ul li')
+            hospital_doctors.append({
+                "name": title.get_text(strip=True),
+                "photo": photo['src'] if photo else None,
+                "degree": info_items[0].get_text(strip=True) if len(info_items) > 0 else "N/A",
+                "specialty": info_items[1].get_text(strip=True) if len(info_items) > 1 else "N/A",
+                "workplace": info_items[2].get_text(strip=True) if len(info_items) > 2 else "N/A",
+                "chamber_link": title['href']
+            })
+        except Exception as e:
+            print(f"Error parsing doctor from {url}: {str(e)}")
+            metrics.SELECTOR_MISSES.inc(parser="listing", selector="li.doctor h3.title a")
+            continue
+    return hospital_doctors
+
+
+def _listing_selectolax(html, url):
+    tree = LexborHTMLParser(html)
+    hospital_doctors = []
+    for doctor in tree.css('ul.doctors li.doctor'):
+        try:
+            title = doctor.css_first('h3.title a')
+            photo = doctor.css_first('.photo img')
+            info_items = doctor.css('.info ul li')
+            hospital_doctors.append({
+                "name": _lx_text(title, strip=True),
+                "photo": photo.attributes['src'] if photo else None,
+                "degree": _lx_text(info_items[0], strip=True) if len(info_items) > 0 else "N/A",
+                "specialty": _lx_text(info_items[1], strip=True) if len(info_items) > 1 else "N/A",
+                "workplace": _lx_text(info_items[2], strip=True) if len(info_items) > 2 else "N/A",
+                "chamber_link": title.attributes['href']
+            })
+        except Exception as e:
+            print(f"Error parsing doctor from {url}: {str(e)}")
+            metrics.SELECTOR_MISSES.inc(parser="listing", selector="li.doctor h3.title a")
+            continue
+    return hospital_doctors
+
+
+def parse_specialty_listing(html, url, backend=None):
+    """Extract the doctor cards from a specialty or hospital listing page."""
+    backend = _resolve(backend)
+    if backend == 'selectolax':
+        doctors = _listing_selectolax(html, url)
+    else:
+        doctors = _listing_bs4(html, url, backend)
+    _count_misses("listing", (("ul.doctors li.doctor", doctors),))
+    return doctors
+
+
+# --- the /doctors/ archive page (app.get_doctors) ---
+
+def _articles_bs4(html, backend):
+    soup = make_soup(html, backend)
+    doctors = []
+    for article in soup.select('article.post.entry'):
+        header = article.select_one('header.entry-header')
+        if not header:
+            continue
+
+        name_tag = header.select_one('h2.entry-title a')
+        degree_tag = header.select_one('ul li[title="Degree"]')
+        speciality_tag = header.select_one('li.speciality')
+        designation_tag = header.select_one('li[title="Designation"] strong')
+        workplace_tag = header.select_one('li[title="Workplace"]')
+        img_tag = header.select_one('.photo img')
+
+        doctors.append({
+            'name': name_tag.text.strip() if name_tag else None,
+            'link': name_tag['href'] if name_tag else None,
+            'degree': degree_tag.text.strip() if degree_tag else None,
+            'speciality': speciality_tag.text.strip() if speciality_tag else None,
+            'designation': designation_tag.text.strip() if designation_tag else None,
+            'workplace': workplace_tag.text.strip() if workplace_tag else None,
+            'photo': img_tag['src'] if img_tag else None
+        })
+    return doctors
+
+
+def _articles_selectolax(html):
+    tree = LexborHTMLParser(html)
+    doctors = []
+    for article in tree.css('article.post.entry'):
+        header = article.css_first('header.entry-header')
+        if not header:
+            continue
+
+        name_tag = header.css_first('h2.entry-title a')
+        degree_tag = header.css_first('ul li[title="Degree"]')
+        speciality_tag = header.css_first('li.speciality')
+        designation_tag = header.css_first('li[title="Designation"] strong')
+        workplace_tag = header.css_first('li[title="Workplace"]')
+        img_tag = header.css_first('.photo img')
+
+        doctors.append({
+            'name': _lx_text(name_tag).strip() if name_tag else None,
+            'link': name_tag.attributes['href'] if name_tag else None,
+            'degree': _lx_text(degree_tag).strip() if degree_tag else None,
+            'speciality': _lx_text(speciality_tag).strip() if speciality_tag else None,
+            'designation': _lx_text(designation_tag).strip() if designation_tag else None,
+            'workplace': _lx_text(workplace_tag).strip() if workplace_tag else None,
+            'photo': img_tag.attributes['src'] if img_tag else None
+        })
+    return doctors
+
+
+def parse_doctor_articles(html, backend=None):
+    """Extract the doctor entries from the /doctors/ archive page."""
+    backend = _resolve(backend)
+    if backend == 'selectolax':
+        doctors = _articles_selectolax(html)
+    else:
+        doctors = _articles_bs4(html, backend)
+    _count_misses("articles", (("article.post.entry header.entry-header", doctors),))
+    return doctors
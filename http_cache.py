@@ -0,0 +1,191 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+import html_parsers
+import http_client
+import metrics
+
+# Configuration
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache", "responses.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT NOT NULL,
+    body BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    validated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS parsed (
+    url TEXT NOT NULL,
+    parser TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (url, parser)
+);
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def parser_key(parse):
+    """Identify a parse function by name, the code it runs and the parser backend.
+
+    The function itself is often a thin dispatcher, so the key covers the
+    source of its whole module and of html_parsers (whose backend helpers
+    most parsers end up in), plus the backend they resolve to. Editing any
+    of them, or switching PARSER_BACKEND, invalidates the cached results.
+    """
+    digest = hashlib.sha1()
+    code = getattr(parse, '__code__', None)
+    if code is not None:
+        digest.update(code.co_code + repr(code.co_consts).encode())
+    module = sys.modules.get(getattr(parse, '__module__', None))
+    for path in dict.fromkeys((getattr(module, '__file__', None), html_parsers.__file__)):
+        if path:
+            digest.update(_source_digest(path))
+    digest.update(html_parsers.PARSER_BACKEND.encode())
+    return f"{parse.__module__}.{parse.__qualname__}:{digest.hexdigest()[:12]}"
+
+
+def body_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class HttpCache:
+    """On-disk cache of page bodies, their validators and the results parsed from them."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.stats = {"not_modified": 0, "unchanged": 0, "parsed": 0, "uncached": 0}
+
+    def conditional_headers(self, url):
+        """Return If-None-Match / If-Modified-Since headers for a URL seen before."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def _cached_body(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT body_hash, body FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None, None
+        return row[0], zlib.decompress(row[1]).decode('utf-8')
+
+    def _cached_result(self, url, parser, digest):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM parsed WHERE url = ? AND parser = ? AND body_hash = ?", (url, parser, digest)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store_result(self, url, parser, digest, result):
+        if result is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed (url, parser, body_hash, result) VALUES (?, ?, ?, ?)",
+                (url, parser, digest, json.dumps(result, ensure_ascii=False)),
+            )
+
+    def prepare(self, url, status, response_headers, text, parse):
+        """Record one (possibly 304) response and look up the result parsed from its body.
+
+        Returns (result, digest, text_to_parse): result is the stored parse
+        result when the body is unchanged; otherwise text_to_parse is the body
+        that still has to be parsed and passed to store_result() with digest.
+        All three are None if a 304 arrives for a URL with no stored body.
+        """
+        parser = parser_key(parse)
+        now = time.time()
+
+        if status == 304:
+            digest, cached_text = self._cached_body(url)
+            if digest is None:
+                self.stats["uncached"] += 1
+                return None, None, None
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE responses SET validated_at = ? WHERE url = ?", (now, url))
+            result = self._cached_result(url, parser, digest)
+            if result is not None:
+                self.stats["not_modified"] += 1
+                return result, digest, None
+            return None, digest, cached_text
+
+        body = text.encode('utf-8')
+        digest = body_hash(body)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO responses (url, etag, last_modified, body_hash, body, fetched_at, validated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET etag = excluded.etag, last_modified = excluded.last_modified, "
+                "body_hash = excluded.body_hash, body = excluded.body, fetched_at = excluded.fetched_at, "
+                "validated_at = excluded.validated_at",
+                (url, response_headers.get('ETag'), response_headers.get('Last-Modified'), digest,
+                 zlib.compress(body), now, now),
+            )
+        result = self._cached_result(url, parser, digest)
+        if result is not None:
+            self.stats["unchanged"] += 1
+            return result, digest, None
+        return None, digest, text
+
+    def store_result(self, url, parse, digest, result):
+        """Remember what parse produced from the body with the given digest."""
+        self.stats["parsed"] += 1
+        self._store_result(url, parser_key(parse), digest, result)
+
+    def resolve(self, url, status, response_headers, text, parse):
+        """Turn one (possibly 304) response into a parsed result, parsing only new bodies.
+
+        Returns None if a 304 arrives for a URL with no stored body.
+        """
+        result, digest, text_to_parse = self.prepare(url, status, response_headers, text, parse)
+        if text_to_parse is None:
+            return result
+        result = metrics.parse_page(parse, text_to_parse, url)
+        self.store_result(url, parse, digest, result)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_parsed(url, parse, cache, headers=None, timeout=10):
+    """Fetch a URL with a conditional GET and return parse(html, url), reusing cached results."""
+    conditional = cache.conditional_headers(url)
+    response = http_client.fetch(url, headers={**(headers or {}), **conditional}, timeout=timeout)
+    if response.status_code == 304:
+        result = cache.resolve(url, 304, response.headers, None, parse)
+        if result is not None:
+            return result
+        response = http_client.fetch(url, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return cache.resolve(url, response.status_code, response.headers, response.text, parse)
@@ -0,0 +1,154 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+import rate_limiter
+
+# Configuration
+DEFAULT_POOL_SIZE = 5  # Connections kept alive per host; match the scraper's worker count
+DEFAULT_TIMEOUT = 10
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Connection': 'keep-alive',
+}
+
+
+def _accept_encoding():
+    """Advertise brotli only when urllib3 can decode it."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+
+class FetchStats:
+    """Thread-safe counters and timings for every fetch made through the shared session."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.retries = 0
+            self.bytes = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            self.status_codes = {}
+
+    def record(self, seconds, status=None, size=0):
+        metrics.FETCH_SECONDS.observe(seconds)
+        if status is None:
+            metrics.FETCH_ERRORS.inc()
+        else:
+            metrics.FETCH_RESPONSES.inc(status=status)
+            metrics.FETCH_BYTES.observe(size)
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if status is None:
+                self.errors += 1
+            else:
+                self.status_codes[status] = self.status_codes.get(status, 0) + 1
+                self.bytes += size
+
+    def record_retry(self):
+        metrics.FETCH_RETRIES.inc()
+        with self._lock:
+            self.retries += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "bytes": self.bytes,
+                "avg_seconds": self.total_seconds / self.requests if self.requests else 0.0,
+                "max_seconds": self.max_seconds,
+                "status_codes": dict(self.status_codes),
+                "hosts": rate_limiter.stats(),
+            }
+
+
+stats = FetchStats()
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session(pool_size):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.headers['Accept-Encoding'] = _accept_encoding()
+    # pool_block makes extra threads wait for a free connection instead of opening throwaway ones
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def configure(pool_size=DEFAULT_POOL_SIZE):
+    """(Re)create the shared session with a connection pool of pool_size per host."""
+    global _session
+    session = _build_session(pool_size)
+    with _session_lock:
+        previous, _session = _session, session
+    if previous is not None:
+        previous.close()
+    return session
+
+
+def get_session():
+    """Return the shared keep-alive session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(DEFAULT_POOL_SIZE)
+    return _session
+
+
+def fetch(url, headers=None, timeout=DEFAULT_TIMEOUT, retries=rate_limiter.MAX_RETRIES, **kwargs):
+    """GET a URL through the shared pooled session and record how long it took.
+
+    Every attempt waits for the host's shared rate limiter, and 403/429/5xx
+    responses or connection errors are retried with jittered exponential
+    backoff. Behaves like requests.get otherwise: the final response is
+    returned as-is, so callers still decide when to call raise_for_status().
+    """
+    limiter = rate_limiter.limiter_for(url)
+    attempt = 0
+    while True:
+        limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = get_session().get(url, headers=headers, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            stats.record(time.perf_counter() - started)
+            limiter.record(None)
+            if attempt >= retries:
+                raise
+            time.sleep(rate_limiter.backoff_delay(attempt))
+            attempt += 1
+            stats.record_retry()
+            continue
+
+        elapsed = time.perf_counter() - started
+        stats.record(elapsed, response.status_code, len(response.content))
+        retry_after = rate_limiter.parse_retry_after(response.headers.get('Retry-After'))
+        limiter.record(response.status_code, elapsed, retry_after)
+        if response.status_code not in rate_limiter.RETRY_STATUSES or attempt >= retries:
+            return response
+        time.sleep(rate_limiter.backoff_delay(attempt, retry_after))
+        attempt += 1
+        stats.record_retry()
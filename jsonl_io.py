@@ -0,0 +1,125 @@
+import json
+import os
+from pathlib import Path
+from doctor_records import to_json
+
+try:
+    import ijson
+except ImportError:  # Legacy .json files are then loaded whole
+    ijson = None
+
+# Configuration
+# "json" keeps the original pretty-printed documents; "jsonl" streams one compact record per line
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "json")
+
+
+class JsonlWriter:
+    """Write one compact JSON record per line to a temp file, renamed into place on commit.
+
+    Readers never see a half-written file: until commit() the records live in
+    <path>.tmp, and an exception inside a with block discards them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=to_json))
+        self._file.write('\n')
+        self.count += 1
+
+    def commit(self):
+        """Flush the records to disk and atomically replace the destination file."""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+def iter_jsonl(path):
+    """Yield the records of a JSONL file one line at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping invalid JSON on line {line_number} of {path}")
+
+
+def iter_records(path, key=None):
+    """Yield records from a .jsonl file, or from a .json list / {key: [...]} document.
+
+    .json documents are streamed with ijson when it is installed and loaded
+    whole otherwise.
+    """
+    if str(path).endswith('.jsonl'):
+        yield from iter_jsonl(path)
+        return
+
+    if ijson is not None:
+        prefix = f"{key}.item" if key else "item"
+        with open(path, 'rb') as f:
+            # use_float keeps numbers as int/float instead of Decimal
+            yield from ijson.items(f, prefix, use_float=True)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if key and isinstance(data, dict):
+        data = data.get(key, [])
+    yield from data
+
+
+def output_path(path, output_format=None):
+    """Swap a .json/.jsonl output path to the extension of the chosen format."""
+    output_format = output_format or OUTPUT_FORMAT
+    base, _ = os.path.splitext(str(path))
+    return f"{base}.{output_format}"
+
+
+def latest_outputs(paths):
+    """Keep one file per stem from .json/.jsonl outputs, preferring the most recently written.
+
+    Lets readers pick up whichever format the last run produced; .tmp files
+    from unfinished runs are ignored.
+    """
+    latest = {}
+    for path in paths:
+        path = Path(path)
+        if path.suffix not in (".json", ".jsonl"):
+            continue
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if path.stem not in latest or mtime > latest[path.stem][0]:
+            latest[path.stem] = (mtime, path)
+    return [latest[stem][1] for stem in sorted(latest)]
@@ -0,0 +1,295 @@
+"""Process-wide counters, gauges and histograms for the crawlers and the API.
+
+Metrics render as Prometheus text (app.py serves them on /metrics) or as
+a JSON summary that each crawl prints and saves at the end of a run.
+Parse worker processes hand their counters back to the parent with
+drain()/merge(), so parse failures counted in a worker are not lost. Pools
+start their workers with reset(): a forked worker inherits the parent's
+counts, and drain() would otherwise send them back to be merged again.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Configuration
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SUMMARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".crawl_metrics")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+    def summary(self):
+        with self._lock:
+            if not self.labels:
+                return self._values.get((), 0)
+            return {",".join(key): value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_max(self, value, **labels):
+        """Raise the gauge to value if it is higher (for high-water marks)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, count, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.buckets, counts):
+                    cumulative += bucket
+                    samples.append((f"{self.name}_bucket", key + (repr(float(bound)),), cumulative))
+                samples.append((f"{self.name}_bucket", key + ("+Inf",), count))
+                samples.append((f"{self.name}_count", key, count))
+                samples.append((f"{self.name}_sum", key, total))
+        return samples
+
+    def _quantile(self, counts, count, q):
+        rank = q * count
+        cumulative = 0
+        for bound, bucket in zip(self.buckets, counts):
+            cumulative += bucket
+            if cumulative >= rank:
+                return bound
+        return None  # above the last bucket
+
+    def summary(self):
+        """{labels: {count, sum, avg, p50, p95}}; quantiles are the upper bound of their bucket."""
+        result = {}
+        with self._lock:
+            for key, (counts, count, total) in sorted(self._values.items()):
+                result[",".join(key) or "all"] = {
+                    "count": count,
+                    "sum": round(total, 4),
+                    "avg": round(total / count, 6) if count else 0.0,
+                    "p50": self._quantile(counts, count, 0.5),
+                    "p95": self._quantile(counts, count, 0.95),
+                }
+        return result
+
+
+class Registry:
+    """The set of metrics one process exposes."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _get(self, cls, name, help, labels, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labels, **kwargs)
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, labels, buckets=buckets)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            labels = metric.labels + (("le",) if metric.kind == "histogram" else ())
+            for name, key, value in metric.samples():
+                names = labels if name.endswith("_bucket") else metric.labels
+                lines.append(f"{name}{_label_text(names, key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """JSON-friendly snapshot of every metric with data."""
+        return {name: metric.summary() for name, metric in self._metrics.items() if metric._values}
+
+    def drain(self):
+        """Return and reset this process's counters, for merge() in the parent process."""
+        drained = []
+        for metric in list(self._metrics.values()):
+            if metric.kind == "counter":
+                with metric._lock:
+                    values, metric._values = metric._values, {}
+                drained.append((metric.name, metric.help, metric.labels, values))
+        return drained
+
+    def merge(self, drained):
+        for name, help, labels, values in drained:
+            metric = self.counter(name, help, labels)
+            for key, value in values.items():
+                metric.inc(value, **dict(zip(labels, key)))
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.clear()
+        self.started = time.time()
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+summary = REGISTRY.summary
+reset = REGISTRY.reset
+drain = REGISTRY.drain
+merge = REGISTRY.merge
+
+# Metrics shared by the crawl modules
+FETCH_SECONDS = histogram("crawl_fetch_seconds", "Time per HTTP request, including failed attempts")
+FETCH_BYTES = histogram("crawl_fetch_bytes", "Response body size", buckets=SIZE_BUCKETS)
+FETCH_RESPONSES = counter("crawl_fetch_responses_total", "HTTP responses by status code", ("status",))
+FETCH_ERRORS = counter("crawl_fetch_errors_total", "Requests that got no response (connection errors, timeouts)")
+FETCH_RETRIES = counter("crawl_fetch_retries_total", "Requests retried after an error or a retryable status")
+FETCHES_IN_FLIGHT = gauge("crawl_fetches_in_flight", "Requests currently being made by the crawl engine")
+PARSE_SECONDS = histogram("crawl_parse_seconds", "Time to parse one page", ("parser",))
+PARSE_FAILURES = counter("crawl_parse_failures_total", "Pages whose parser raised or returned nothing", ("parser",))
+SELECTOR_MISSES = counter("crawl_selector_misses_total", "Page elements a parser expected but did not find",
+                          ("parser", "selector"))
+QUEUE_DEPTH = gauge("crawl_parse_queue_depth", "Fetched pages waiting for the parse stage")
+QUEUE_DEPTH_MAX = gauge("crawl_parse_queue_depth_max", "Highest parse queue depth seen")
+STAGE_SECONDS = histogram("crawl_stage_seconds", "Time per record (or per saved file) in the merge and write stages",
+                          ("stage",))
+RECORDS = counter("crawl_records_total", "Records that passed each stage", ("stage",))
+
+
+def parser_name(parse):
+    return getattr(parse, "__name__", "parse")
+
+
+def record_parse(parser, seconds, failed):
+    PARSE_SECONDS.observe(seconds, parser=parser)
+    if failed:
+        PARSE_FAILURES.inc(parser=parser)
+
+
+def parse_page(parse, html, url):
+    """Call parse(html, url), timing it and counting a raise or a None result as a failure."""
+    started = time.perf_counter()
+    result = None
+    try:
+        result = parse(html, url)
+        return result
+    finally:
+        record_parse(parser_name(parse), time.perf_counter() - started, result is None)
+
+
+def crawl_summary(name, elapsed=None):
+    """Summarize a crawl: every metric plus records/second per stage and where the time went."""
+    elapsed = elapsed if elapsed is not None else time.time() - REGISTRY.started
+    records = RECORDS.summary() if RECORDS._values else {}
+    stage_seconds = {stage: values["sum"] for stage, values in STAGE_SECONDS.summary().items()}
+    stage_seconds["fetch"] = round(sum(values["sum"] for values in FETCH_SECONDS.summary().values()), 4)
+    stage_seconds["parse"] = round(sum(values["sum"] for values in PARSE_SECONDS.summary().values()), 4)
+    return {
+        "crawl": name,
+        "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_seconds": round(elapsed, 3),
+        "records_per_second": {stage: round(count / elapsed, 2) if elapsed else 0.0 for stage, count in records.items()},
+        # Fetch time is summed over concurrent requests, so it can exceed the elapsed time
+        "stage_seconds": stage_seconds,
+        "metrics": summary(),
+    }
+
+
+def save_crawl_summary(name, elapsed=None, directory=SUMMARY_DIR):
+    """Print the crawl summary as one JSON line and save it to directory/<name>-<time>.json."""
+    result = crawl_summary(name, elapsed)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Crawl metrics: {json.dumps(result)}")
+    print(f"Saved crawl metrics to {path}")
+    return result
@@ -0,0 +1,285 @@
+"""Append-only archive of every fetched page, and offline re-parsing from it.
+
+Pages are stored as WARC/1.0 response records, one gzip member each, in
+.page_archive/pages-NNNNN.warc.gz segments that standard WARC tools can
+read. index.jsonl holds one line per fetch: {"url", "date", "status",
+"digest", "file", "offset", "length"}. A refetched page whose body has not
+changed gets an index line pointing at the record already stored.
+
+replay() runs a scraper's (key, url) jobs against the archive instead of
+the site, parsing in worker processes, so a parser fix can be applied to
+the whole corpus without any network I/O:
+
+    python page_archive.py stats
+    python page_archive.py import-cache   # archive the bodies already in .http_cache/
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+import metrics
+
+# Configuration
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".page_archive")
+SEGMENT_BYTES = 256 * 1024 * 1024  # Start a new .warc.gz segment past this size
+COMPRESS_LEVEL = 6
+PARSE_WORKERS = os.cpu_count() or 2  # Processes re-parsing archived pages
+BATCH_SIZE = 64  # Archived pages sent to a parse process at once
+KEPT_HEADERS = ("ETag", "Last-Modified", "Date")  # Response headers stored with each page
+
+
+def _warc_record(url, status, headers, body, digest, date):
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    http_headers = [f"HTTP/1.1 {status} {reason}", "Content-Type: text/html; charset=utf-8",
+                    f"Content-Length: {len(body)}"]
+    http_headers += [f"{name}: {headers[name]}" for name in KEPT_HEADERS if headers and headers.get(name)]
+    block = ("\r\n".join(http_headers) + "\r\n\r\n").encode("utf-8") + body
+    warc_headers = [
+        "WARC/1.0",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {date}",
+        f"WARC-Target-URI: {url}",
+        f"WARC-Payload-Digest: sha256:{digest}",
+        "Content-Type: application/http; msgtype=response",
+        f"Content-Length: {len(block)}",
+    ]
+    return ("\r\n".join(warc_headers) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+
+
+def read_record(path, offset, length):
+    """Return the HTML body of the record stored at offset in a segment."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        record = gzip.decompress(f.read(length))
+    warc_end = record.index(b"\r\n\r\n")
+    block_length = int(next(line.split(b":", 1)[1] for line in record[:warc_end].split(b"\r\n")
+                            if line.lower().startswith(b"content-length:")))
+    block = record[warc_end + 4:warc_end + 4 + block_length]
+    return block[block.index(b"\r\n\r\n") + 4:].decode("utf-8")
+
+
+class PageArchive:
+    """Compressed, append-only store of fetched pages with a URL/timestamp/status index."""
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._latest = None
+        self._segment = None
+        self._index = None
+        self._lock = threading.Lock()
+        self.stats = {"stored": 0, "unchanged": 0, "bytes": 0}
+
+    def latest(self):
+        """{url: index entry of its most recent fetch}; a torn final line is ignored."""
+        if self._latest is None:
+            self._latest = {}
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        self._latest[entry["url"]] = entry
+        return self._latest
+
+    def _segment_path(self):
+        segments = sorted(name for name in os.listdir(self.directory) if name.endswith(".warc.gz"))
+        path = os.path.join(self.directory, segments[-1]) if segments else None
+        if path is None or os.path.getsize(path) >= SEGMENT_BYTES:
+            path = os.path.join(self.directory, f"pages-{len(segments):05d}.warc.gz")
+        return path
+
+    def append(self, url, status, headers, text):
+        """Archive one fetched page."""
+        body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock:
+            if self._index is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._index = open(self.index_path, "a", encoding="utf-8")
+            previous = self.latest().get(url)
+            if previous is not None and previous["digest"] == digest:
+                entry = {**previous, "date": date, "status": status}
+                self.stats["unchanged"] += 1
+            else:
+                if self._segment is None or self._segment.tell() >= SEGMENT_BYTES:
+                    self._open_segment()
+                record = gzip.compress(_warc_record(url, status, headers, body, digest, date), COMPRESS_LEVEL)
+                entry = {"url": url, "date": date, "status": status, "digest": digest,
+                         "file": os.path.basename(self._segment.name), "offset": self._segment.tell(),
+                         "length": len(record)}
+                self._segment.write(record)
+                self._segment.flush()
+                self.stats["stored"] += 1
+                self.stats["bytes"] += len(record)
+            # The record is on disk before the index line that points at it
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+            self._latest[url] = entry
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment = open(self._segment_path(), "ab")
+
+    def has(self, url):
+        return url in self.latest()
+
+    def page(self, url):
+        """Latest archived body of a URL, or None."""
+        entry = self.latest().get(url)
+        if entry is None:
+            return None
+        with self._lock:
+            if self._segment is not None:
+                self._segment.flush()
+        return read_record(os.path.join(self.directory, entry["file"]), entry["offset"], entry["length"])
+
+    def close(self):
+        with self._lock:
+            for f in (self._segment, self._index):
+                if f is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+            self._segment = self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_records(parse, directory, batch):
+    """Read and parse (url, file, offset, length) records in a worker process.
+
+    Returns ([(url, result, error, seconds)], cpu seconds spent, drained counters).
+    """
+    started = time.process_time()
+    results = []
+    for url, name, offset, length in batch:
+        page_started = time.perf_counter()
+        try:
+            result, error = parse(read_record(os.path.join(directory, name), offset, length), url), None
+        except Exception as e:
+            result, error = None, str(e)
+        results.append((url, result, error, time.perf_counter() - page_started))
+    return results, time.process_time() - started, metrics.drain()
+
+
+def replay(jobs, parse, on_result=None, archive=None, workers=PARSE_WORKERS, batch_size=BATCH_SIZE):
+    """Run (key, url) jobs against the archive instead of the site.
+
+    Each archived URL is parsed once, in worker processes, however many jobs
+    share it; a URL missing from the archive yields None like a failed
+    fetch. Returns ((key, result) pairs, report) like crawl_pipeline.run_pipeline.
+    """
+    archive = archive or PageArchive()
+    started = time.perf_counter()
+    keys_by_url = {}
+    for key, url in jobs:
+        keys_by_url.setdefault(url, []).append(key)
+    latest = archive.latest()
+    records = [(url, latest[url]["file"], latest[url]["offset"], latest[url]["length"])
+               for url in keys_by_url if url in latest]
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    results = []
+    report = {"pages": 0, "missing": 0, "failures": 0, "workers": workers, "parse_cpu_seconds": 0.0}
+
+    def deliver(url, result):
+        for key in keys_by_url[url]:
+            if on_result is not None:
+                on_result(key, result)
+            results.append((key, result))
+
+    parser = metrics.parser_name(parse)
+
+    def collect(batch_results, cpu_seconds, counters):
+        report["parse_cpu_seconds"] += cpu_seconds
+        metrics.merge(counters)
+        for url, result, error, seconds in batch_results:
+            metrics.record_parse(parser, seconds, result is None)
+            report["pages"] += 1
+            if error is not None:
+                report["failures"] += 1
+                print(f"Error parsing {url}: {error}")
+            deliver(url, result)
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=metrics.reset) as pool:
+            for batch_results, cpu_seconds, counters in pool.map(parse_records, [parse] * len(batches),
+                                                                 [archive.directory] * len(batches), batches):
+                collect(batch_results, cpu_seconds, counters)
+    else:
+        for batch in batches:
+            collect(*parse_records(parse, archive.directory, batch))
+
+    for url in keys_by_url:
+        if url not in latest:
+            report["missing"] += 1
+            print(f"Not in archive: {url}")
+            deliver(url, None)
+
+    elapsed = time.perf_counter() - started
+    report["parse_cpu_seconds"] = round(report["parse_cpu_seconds"], 3)
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["pages_per_second"] = round(report["pages"] / elapsed, 1) if elapsed else 0.0
+    return results, report
+
+
+def import_http_cache(archive, cache_path=None):
+    """Archive the bodies held by the HTTP cache for URLs the archive does not have yet."""
+    import sqlite3
+    import zlib
+    from http_cache import CACHE_PATH
+
+    conn = sqlite3.connect(cache_path or CACHE_PATH)
+    imported = 0
+    try:
+        for url, etag, last_modified, body in conn.execute(
+                "SELECT url, etag, last_modified, body FROM responses ORDER BY fetched_at"):
+            if not archive.has(url):
+                archive.append(url, 200, {"ETag": etag, "Last-Modified": last_modified},
+                               zlib.decompress(body).decode("utf-8"))
+                imported += 1
+    finally:
+        conn.close()
+    return imported
+
+
+def archive_stats(archive):
+    latest = archive.latest()
+    segments = [name for name in os.listdir(archive.directory) if name.endswith(".warc.gz")] \
+        if os.path.isdir(archive.directory) else []
+    return {
+        "urls": len(latest),
+        "segments": len(segments),
+        "bytes": sum(os.path.getsize(os.path.join(archive.directory, name)) for name in segments),
+        "statuses": {str(status): sum(1 for entry in latest.values() if entry["status"] == status)
+                     for status in sorted({entry["status"] for entry in latest.values()})},
+    }
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    with PageArchive() as page_archive:
+        if command == "import-cache":
+            print(f"Imported {import_http_cache(page_archive)} pages from the HTTP cache")
+        elif command != "stats":
+            raise SystemExit(f"Unknown command {command!r}; expected stats or import-cache")
+        print(json.dumps(archive_stats(page_archive), indent=2))
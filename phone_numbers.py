@@ -0,0 +1,108 @@
+"""Normalize chamber phone numbers to E.164 and look chambers up by number.
+
+Appointment fields hold one or more numbers in many shapes: "+8801711240969",
+"+8801734-535555", "01782402628", "+88 01817706725", "+8801407-075714-5"
+(ending in 4 or 5), "+8809609004444 (Press 0 after calling for operator help)".
+Every Bangladeshi number becomes +880 followed by the national number
+without its trunk 0. Short hotlines such as "10606" have no E.164 form and
+are left out.
+"""
+import re
+
+# Configuration
+COUNTRY_CODE = "880"
+PHONE_RE = re.compile(r"\+?\d[\d\s-]*\d")
+MOBILE_RE = re.compile(r"1[3-9]\d{8}")  # 01X-XXXXXXXX without the trunk 0
+LANDLINE_RE = re.compile(r"[2-9]\d{6,9}")  # Area code + subscriber number, or 096XX/09XXX service numbers
+
+
+def normalize_phone(text):
+    """Return the E.164 form of one Bangladeshi phone number, or None."""
+    digits = re.sub(r"\D", "", text or "")
+    if digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    elif digits.startswith("88") and digits[2:3] == "0":
+        digits = digits[2:]  # "+88 01..." written without the country code's 0
+    if digits.startswith("0"):
+        digits = digits[1:]
+    if MOBILE_RE.fullmatch(digits) or (LANDLINE_RE.fullmatch(digits) and not digits.startswith("1")):
+        return f"+{COUNTRY_CODE}{digits}"
+    return None
+
+
+def extract_phones(text):
+    """All E.164 numbers in an appointment string, in order and without repeats."""
+    phones = []
+    for candidate in PHONE_RE.findall(text or ""):
+        found = normalize_phone(candidate)
+        if found:
+            phones.append(found)
+            continue
+        suffix = re.search(r"-(\d{1,2})$", candidate)
+        if suffix:
+            # "+8801407-075714-5": the number, and the same number ending in 5
+            found = normalize_phone(candidate[:suffix.start()])
+            if found:
+                phones.append(found)
+                phones.append(found[:-len(suffix.group(1))] + suffix.group(1))
+                continue
+        # Several numbers separated by spaces only
+        phones.extend(filter(None, (normalize_phone(part) for part in candidate.split())))
+    return list(dict.fromkeys(phones))
+
+
+def chamber_phones(chamber):
+    """E.164 numbers of a chamber: its phones field if standardized, else parsed from appointment."""
+    phones = chamber.get("phones")
+    if phones is not None:
+        return list(phones)
+    return extract_phones(chamber.get("appointment"))
+
+
+def add_phones(chambers):
+    """Return the chambers with a phones field holding their E.164 numbers."""
+    result = []
+    for chamber in chambers or []:
+        phones = extract_phones(chamber.get("appointment"))
+        if phones:
+            chamber = {**chamber, "phones": phones}
+        result.append(chamber)
+    return result
+
+
+def phone_refs(doctors):
+    """{E.164 number: [(doctor position, chamber index), ...]} over every chamber."""
+    refs = {}
+    for position, doctor in enumerate(doctors):
+        for index, chamber in enumerate(doctor.get("chambers") or []):
+            for phone in chamber_phones(chamber):
+                refs.setdefault(phone, []).append((position, index))
+    return refs
+
+
+def describe_matches(phone, refs, doctor_at):
+    """Build the lookup response for a number from its (position, chamber index) refs.
+
+    doctor_at(position) returns a doctor record. Hospitals are the doctors'
+    listings whose link is the chamber's page.
+    """
+    matches, hospitals = [], {}
+    for position, index in refs:
+        doctor = doctor_at(position)
+        chamber = doctor["chambers"][index]
+        matches.append({
+            "name": doctor.get("name"),
+            "profile_url": doctor.get("profile_url"),
+            "district": doctor.get("district"),
+            "specialty": doctor.get("specialty"),
+            "chamber": chamber,
+        })
+        for source in doctor.get("sources") or [doctor.get("source") or {}]:
+            if source.get("link") and source.get("link") == chamber.get("url"):
+                hospitals.setdefault(source["link"], {"name": source.get("hospital"), "link": source["link"]})
+    return {
+        "phone": phone,
+        "doctors": len({match["profile_url"] for match in matches}),
+        "matches": matches,
+        "hospitals": list(hospitals.values()),
+    }
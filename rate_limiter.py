@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Configuration
+INITIAL_RATE = 2.0  # Requests per second a new host starts at
+MIN_RATE = 0.2
+MAX_RATE = 10.0
+BURST = 2  # Requests that may start back-to-back after an idle period
+INCREASE_STEP = 0.05  # Requests/second added after each healthy response
+DECREASE_FACTOR = 0.5  # Rate multiplier after a 403/429/5xx
+SLOW_FACTOR = 0.8  # Rate multiplier when latency climbs above the baseline
+SLOW_LATENCY_RATIO = 2.0  # Latency this many times the baseline counts as "rising"
+SLOW_LATENCY_FLOOR = 0.5  # ...but only once it is also above this many seconds
+DECREASE_COOLDOWN = 1.0  # Seconds during which further throttle signals are ignored
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class HostRateLimiter:
+    """Token bucket for one host whose refill rate adapts AIMD-style to the host's responses."""
+
+    def __init__(self, host, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, burst=BURST):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._latency_baseline = None
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self.throttled = 0
+        self.slowdowns = 0
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait before sending.
+
+        Tokens may go negative: each reservation queues behind the previous
+        ones, so sync callers can time.sleep() and async callers
+        asyncio.sleep() the returned delay. During a Retry-After pause the
+        bucket refills from the end of the pause, so reservations made
+        meanwhile are released 1/rate apart after it rather than all at once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # _updated is still in the future while paused
+            wait = self._updated - now
+            if self.tokens < 0:
+                wait -= self.tokens / self.rate
+            return wait
+
+    def _refill(self, now):
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def acquire(self):
+        """Block the current thread until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _decrease(self, factor, now):
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return False
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * factor)
+        return True
+
+    def record(self, status=None, latency=None, retry_after=None):
+        """Adapt the rate to one response; status None means the request failed outright."""
+        with self._lock:
+            now = time.monotonic()
+            if status is None or status in RETRY_STATUSES:
+                # When the reservations already handed out will have been sent, at the old rate
+                self._refill(now)
+                queued_until = self._updated - min(self.tokens, 0.0) / self.rate
+                if self._decrease(DECREASE_FACTOR, now):
+                    self.throttled += 1
+                if retry_after and now + retry_after > self._paused_until:
+                    self._paused_until = now + retry_after
+                    # Restart the bucket at the end of the pause (or after those reservations, if
+                    # later): the next request goes then, the ones after it 1/rate apart
+                    self.tokens = 0.0
+                    self._updated = max(self._paused_until - 1 / self.rate, queued_until)
+                return
+
+            if latency is not None:
+                if self._latency_baseline is None:
+                    self._latency_baseline = latency
+                elif latency > max(SLOW_LATENCY_FLOOR, SLOW_LATENCY_RATIO * self._latency_baseline):
+                    if self._decrease(SLOW_FACTOR, now):
+                        self.slowdowns += 1
+                    return
+                else:
+                    self._latency_baseline = 0.9 * self._latency_baseline + 0.1 * latency
+
+            self.rate = min(self.max_rate, self.rate + INCREASE_STEP)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "throttled": self.throttled,
+                "slowdowns": self.slowdowns,
+                "latency_baseline": self._latency_baseline,
+            }
+
+
+_defaults = {"rate": INITIAL_RATE, "min_rate": MIN_RATE, "max_rate": MAX_RATE}
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def configure(rate=None, min_rate=None, max_rate=None):
+    """Change the starting rate and bounds for hosts.
+
+    The starting rate only applies to hosts not seen yet: a host's limiter
+    keeps the rate it has learned, so the next crawl of it does not start
+    over at full speed. The bounds apply to every host.
+    """
+    with _registry_lock:
+        for name, value in (("rate", rate), ("min_rate", min_rate), ("max_rate", max_rate)):
+            if value is not None:
+                _defaults[name] = value
+        for limiter in _limiters.values():
+            with limiter._lock:
+                limiter.min_rate = _defaults["min_rate"]
+                limiter.max_rate = _defaults["max_rate"]
+                limiter.rate = min(max(limiter.rate, limiter.min_rate), limiter.max_rate)
+
+
+def limiter_for(url):
+    """Return the limiter shared by every request to url's host."""
+    host = urlsplit(url).netloc.lower()
+    limiter = _limiters.get(host)
+    if limiter is None:
+        with _registry_lock:
+            limiter = _limiters.get(host)
+            if limiter is None:
+                limiter = HostRateLimiter(host, **_defaults)
+                _limiters[host] = limiter
+    return limiter
+
+
+def stats():
+    """Return the current rate and throttle counters of every host."""
+    return {host: limiter.stats() for host, limiter in list(_limiters.items())}
+
+
+def parse_retry_after(value):
+    """Read a Retry-After header given in seconds; HTTP dates are ignored."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
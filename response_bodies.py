@@ -0,0 +1,108 @@
+"""Serialized, precompressed API response bodies with strong ETags.
+
+An EncodedBody holds one JSON body in every content-coding the API offers
+(identity, gzip and, when the brotli package is installed, br), so a
+request only picks bytes that already exist. BodyCache keeps one
+EncodedBody per key and rebuilds it only when the dataset version changes.
+"""
+import gzip
+import hashlib
+import threading
+
+try:
+    import brotli
+except ImportError:  # br is only offered when the package is installed
+    brotli = None
+
+# Configuration
+GZIP_LEVEL = 9  # Precomputed once per dataset version, so the slowest level is affordable
+BROTLI_QUALITY = 11
+DYNAMIC_GZIP_LEVEL = 5  # For per-request bodies (filtered queries, search), compressed on the fly
+MIN_COMPRESS_BYTES = 1024  # Smaller bodies are sent as they are
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)  # In order of preference
+
+
+def compress(data, encoding, level=None):
+    if encoding == "gzip":
+        return gzip.compress(data, GZIP_LEVEL if level is None else level, mtime=0)
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY if level is None else level)
+    return data
+
+
+def choose_encoding(accept_encodings, available):
+    """Pick the content-coding to send from werkzeug's parsed Accept-Encoding header.
+
+    Falls back to identity, even if the client refused it, rather than answering 406.
+    """
+    best, best_quality = "identity", 0
+    for encoding in available:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def etag_matches(if_none_match, etags):
+    """True if an If-None-Match header value names any of the given ETags (or is *)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return not candidates.isdisjoint(etags.values())
+
+
+class EncodedBody:
+    """One response body in every offered content-coding, each with its own strong ETag."""
+
+    def __init__(self, data, encodings=ENCODINGS, level=None, mimetype="application/json"):
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(data).hexdigest()[:32]
+        self.bodies = {"identity": data}
+        if len(data) >= MIN_COMPRESS_BYTES:
+            for encoding in encodings:
+                self.bodies[encoding] = compress(data, encoding, level)
+        # A strong ETag names exact bytes, so each coding gets its own
+        self.etags = {encoding: f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+                      for encoding in self.bodies}
+
+    def sizes(self):
+        return {encoding: len(body) for encoding, body in self.bodies.items()}
+
+
+class BodyCache:
+    """EncodedBody per key, built at most once per dataset version.
+
+    Concurrent requests for a body that is being built wait for that build
+    instead of starting their own.
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> (version, EncodedBody)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "builds": 0}
+
+    def get(self, key, version, build):
+        """Return the EncodedBody for key at this version, calling build() to make it if needed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._counters["hits"] += 1
+            return entry[1]
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._counters["hits"] += 1
+                return entry[1]
+            body = build()
+            self._entries[key] = (version, body)
+            self._counters["builds"] += 1
+            return body
+
+    def stats(self):
+        stats = dict(self._counters)
+        stats["bodies"] = {key: body.sizes() for key, (_, body) in list(self._entries.items())}
+        return stats
@@ -0,0 +1,112 @@
+import threading
+import time
+
+
+class ResponseCache:
+    """Cache the result of a zero-argument loader with a TTL, single-flight fetching and stale-while-revalidate.
+
+    - A fresh value (younger than ttl) is returned straight from memory.
+    - A stale value (older than ttl but younger than ttl + stale_ttl) is returned
+      immediately while one background thread refreshes it.
+    - With no usable value, callers block on a single shared fetch; concurrent
+      callers wait for that fetch instead of starting their own.
+    """
+
+    def __init__(self, loader, ttl=300, stale_ttl=3600):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._value = None
+        self._fetched_at = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._inflight = None  # threading.Event set when the current fetch finishes
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+        }
+
+    def _age(self):
+        return time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+
+    def _refresh(self, done):
+        """Run the loader once and publish its result to every waiter."""
+        try:
+            value = self.loader()
+        except Exception as e:
+            with self._lock:
+                self._error = e
+                self._counters["refresh_errors"] += 1
+                self._inflight = None
+            print(f"Cache refresh failed: {str(e)}")
+        else:
+            with self._lock:
+                self._value = value
+                self._fetched_at = time.monotonic()
+                self._error = None
+                self._counters["refreshes"] += 1
+                self._inflight = None
+        finally:
+            done.set()
+
+    def _start_refresh(self):
+        """Register a new in-flight fetch; must be called with the lock held."""
+        done = threading.Event()
+        self._inflight = done
+        return done
+
+    def get(self):
+        """Return the cached value, fetching or revalidating it as needed."""
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                self._counters["hits"] += 1
+                return self._value
+
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self._counters["stale_hits"] += 1
+                if self._inflight is None:
+                    done = self._start_refresh()
+                    threading.Thread(target=self._refresh, args=(done,), daemon=True).start()
+                return self._value
+
+            if self._inflight is not None:
+                self._counters["waits"] += 1
+                done = self._inflight
+                leader = False
+            else:
+                self._counters["misses"] += 1
+                done = self._start_refresh()
+                leader = True
+
+        if leader:
+            self._refresh(done)
+        else:
+            done.wait()
+
+        with self._lock:
+            if self._fetched_at is None or self._age() >= self.ttl + self.stale_ttl:
+                raise RuntimeError(f"No cached value available: {self._error}")
+            return self._value
+
+    def invalidate(self):
+        """Drop the cached value so the next call fetches again."""
+        with self._lock:
+            self._value = None
+            self._fetched_at = None
+
+    def stats(self):
+        """Return hit/miss/refresh counters and the current value's age."""
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["waits"]
+            stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+            stats["age_seconds"] = self._age()
+            stats["refreshing"] = self._inflight is not None
+            stats["ttl"] = self.ttl
+            stats["stale_ttl"] = self.stale_ttl
+            return stats
@@ -2,6 +2,7 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import json
+from http_client import fetch
 
 # URL to scrape
 url = "https://www.doctorbangladesh.com/anesthesiologist-barisal/"
@@ -19,7 +20,7 @@ headers = {
 
 try:
     # Make the request with headers
-    response = requests.get(url, headers=headers, timeout=10)
+    response = fetch(url, headers=headers, timeout=10)
     response.raise_for_status()  # Check for HTTP errors
     
     # Parse the HTML
@@ -67,9 +68,10 @@ try:
     
 except requests.exceptions.HTTPError as http_err:
     if response.status_code == 403:
-        print("403 Forbidden - The website is blocking our request. Try:")
+        # fetch() has already backed off and retried; the block outlasted every retry
+        print("403 Forbidden - The website kept blocking our request after backing off. Try:")
         print("1. Using a different User-Agent header")
-        print("2. Adding delays between requests")
+        print("2. Lowering rate_limiter.INITIAL_RATE / MAX_RATE")
         print("3. Using a rotating proxy")
     else:
         print(f"HTTP error occurred: {http_err}")
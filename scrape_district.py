@@ -1,11 +1,12 @@
-import requests
 from bs4 import BeautifulSoup
+from http_client import fetch
 import json
-import time
+from crawl_engine import run_crawl
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
+REQUESTS_PER_SECOND = 1  # Be polite with requests (starting rate, adapts to the site)
 
 city_urls = {
     "dhaka": "https://www.doctorbangladesh.com/doctors-dhaka/",
@@ -26,31 +27,35 @@ city_urls = {
 def scrape_city_specialties(url):
     try:
         print(f"Fetching: {url}")
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetch(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # Select all <li><a> in <ul class="list">
-        links = soup.select('ul.list li a')
-        result = []
-        for a in links:
-            specialty = a.text.strip()
-            link = a['href']
-            result.append({"specialty": specialty, "url": link})
-        print(f"✔ Found {len(result)} categories")
-        return result
+        return parse_city_specialties(response.text, url)
     except Exception as e:
         print(f"🚨 Error: {e}")
         return []
 
+def parse_city_specialties(html, url):
+    soup = BeautifulSoup(html, 'html.parser')
+    # Select all <li><a> in <ul class="list">
+    links = soup.select('ul.list li a')
+    result = []
+    for a in links:
+        specialty = a.text.strip()
+        link = a['href']
+        result.append({"specialty": specialty, "url": link})
+    print(f"✔ Found {len(result)} categories at {url}")
+    return result
+
+def save_city(city, data):
+    print(f"\n=== {city.upper()} ===")
+    if data:
+        with open(f"doctors_{city}.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Saved to doctors_{city}.json")
+    else:
+        print("No data found.")
+
 if __name__ == "__main__":
-    for city, url in city_urls.items():
-        print(f"\n=== {city.upper()} ===")
-        data = scrape_city_specialties(url)
-        if data:
-            with open(f"doctors_{city}.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"Saved to doctors_{city}.json")
-        else:
-            print("No data found.")
-        time.sleep(1)
+    run_crawl(city_urls.items(), parse_city_specialties, on_result=save_city,
+              concurrency=2, rate=REQUESTS_PER_SECOND, headers=HEADERS)
     print("\n✅ All city category scrapes complete!")
\ No newline at end of file
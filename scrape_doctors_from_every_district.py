@@ -1,9 +1,14 @@
 import os
+import sys
 import requests
-from bs4 import BeautifulSoup
 import json
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import http_client
+import metrics
+from http_client import fetch
+from crawl_engine import run_crawl
+from http_cache import HttpCache, fetch_parsed
+from html_parsers import parse_specialty_listing
+from page_archive import PageArchive, replay
 
 # Configuration
 HEADERS = {
@@ -14,7 +19,9 @@ HEADERS = {
     'Accept-Language': 'en-US,en;q=0.9'
 }
 MAX_THREADS = 5  # Number of concurrent requests
-DELAY_SECONDS = 1  # Delay between requests to avoid getting blocked
+REQUESTS_PER_SECOND = 5  # Starting per-host rate; adapts to how the site responds
+USE_HTTP_CACHE = True  # Send conditional GETs and reuse unchanged listings from .http_cache/
+ARCHIVE_PAGES = True  # Keep every fetched listing in .page_archive/ for --from-archive re-parsing
 
 # Load hospital data
 DISTRICTS = {
@@ -183,95 +190,115 @@ def create_directory_structure():
             os.makedirs(district_dir)
 
 
-def scrape_doctor_info(url):
+def scrape_doctor_info(url, cache=None):
     """Scrape doctor information from a single specialty page."""
     try:
-        time.sleep(DELAY_SECONDS)
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        if cache is not None:
+            return fetch_parsed(url, parse_doctor_info, cache, headers=HEADERS, timeout=10)
+        response = fetch(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        doctors = soup.select('ul.doctors li.doctor')
-        hospital_doctors = []
-        
-        for doctor in doctors:
-            try:
-                name = doctor.select_one('h3.title a').get_text(strip=True)
-                photo = doctor.select_one('.photo img')['src'] if doctor.select_one('.photo img') else None
-                info_items = doctor.select('.info ul li')
-                
-                degree = info_items[0].get_text(strip=True) if len(info_items) > 0 else "N/A"
-                specialty = info_items[1].get_text(strip=True) if len(info_items) > 1 else "N/A"
-                workplace = info_items[2].get_text(strip=True) if len(info_items) > 2 else "N/A"
-                chamber_link = doctor.select_one('h3.title a')['href'] if doctor.select_one('h3.title a') else None
-                
-                hospital_doctors.append({
-                    "name": name,
-                    "photo": photo,
-                    "degree": degree,
-                    "specialty": specialty,
-                    "workplace": workplace,
-                    "chamber_link": chamber_link
-                })
-            except Exception as e:
-                print(f"Error parsing doctor from {url}: {str(e)}")
-                continue
-                
-        return hospital_doctors
+        return parse_doctor_info(response.text, url)
 
     except requests.exceptions.RequestException as e:
         print(f"Failed to fetch {url}: {str(e)}")
         return None
 
 
-def process_district(district_name, hospitals):
-    """Process all specialties in a district."""
+def parse_doctor_info(html, url):
+    """Extract doctor information from a specialty page."""
+    return parse_specialty_listing(html, url)
+
+
+def load_saved_listings(filename):
+    """{listing URL: saved hospital entry} from a district's previous output."""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return {hospital["link"]: hospital for hospital in json.load(f).get("hospitals", [])}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def process_district(district_name, hospitals, from_archive=False):
+    """Process all specialties in a district, from the site or, with from_archive, from the page archive.
+
+    Listings the archive does not have keep the doctors saved for them before.
+    """
     print(f"\nProcessing district: {district_name}")
     district_data = {
         "district": district_name,
         "hospitals": [],
         "total_doctors": 0
     }
-
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        future_to_hospital = {
-            executor.submit(scrape_doctor_info, hospital["url"]): hospital
-            for hospital in hospitals if "url" in hospital
-        }
-        
-        for future in as_completed(future_to_hospital):
-            hospital = future_to_hospital[future]
-            try:
-                doctors = future.result()
-                if doctors:
-                    hospital_data = {
-                        "name": hospital.get("specialty", hospital.get("name", "Unknown")),
-                        "link": hospital["url"],
-                        "doctors": doctors,
-                        "count": len(doctors)
-                    }
-                    district_data["hospitals"].append(hospital_data)
-                    district_data["total_doctors"] += len(doctors)
-                    print(f"Processed {hospital.get('specialty', hospital.get('name', 'Unknown'))} - {len(doctors)} doctors")
-            except Exception as e:
-                print(f"Error processing {hospital.get('specialty', hospital.get('name', 'Unknown'))}: {str(e)}")
-
     filename = os.path.join(
         'Doctors by district',
         district_name.lower(),
         f'hospitals-{district_name.lower()}.json'
     )
-    with open(filename, 'w', encoding='utf-8') as f:
+    missing = []
+
+    def collect(hospital, doctors):
+        metrics.RECORDS.inc(stage="fetch" if doctors is not None else "fetch_failed")
+        if doctors is None:
+            missing.append(hospital)
+        if doctors:
+            hospital_data = {
+                "name": hospital.get("specialty", hospital.get("name", "Unknown")),
+                "link": hospital["url"],
+                "doctors": doctors,
+                "count": len(doctors)
+            }
+            district_data["hospitals"].append(hospital_data)
+            district_data["total_doctors"] += len(doctors)
+            print(f"Processed {hospital.get('specialty', hospital.get('name', 'Unknown'))} - {len(doctors)} doctors")
+
+    jobs = ((hospital, hospital["url"]) for hospital in hospitals if "url" in hospital)
+    cache = HttpCache() if USE_HTTP_CACHE and not from_archive else None
+    archive = PageArchive() if ARCHIVE_PAGES or from_archive else None
+    try:
+        if from_archive:
+            _, report = replay(jobs, parse_doctor_info, on_result=collect, archive=archive)
+            print(f"Replay: {json.dumps(report)}")
+            saved = load_saved_listings(filename)
+            kept = [saved[hospital["url"]] for hospital in missing if hospital["url"] in saved]
+            for hospital_data in kept:
+                district_data["hospitals"].append(hospital_data)
+                district_data["total_doctors"] += hospital_data.get("count", len(hospital_data["doctors"]))
+            print(f"Kept the saved doctors of {len(kept)} listings not in the archive")
+        else:
+            run_crawl(
+                jobs,
+                parse_doctor_info,
+                on_result=collect,
+                concurrency=MAX_THREADS,
+                rate=REQUESTS_PER_SECOND,
+                headers=HEADERS,
+                cache=cache,
+                archive=archive
+            )
+    finally:
+        if archive is not None:
+            archive.close()
+    if cache is not None:
+        print(f"HTTP cache: {cache.stats}")
+        cache.close()
+
+    with metrics.STAGE_SECONDS.time(stage="write"), open(filename, 'w', encoding='utf-8') as f:
         json.dump(district_data, f, ensure_ascii=False, indent=2)
+    metrics.RECORDS.inc(district_data["total_doctors"], stage="write")
 
     print(f"Saved data for {district_name} district with {district_data['total_doctors']} total doctors")
 
 
-def main():
+def main(from_archive=False):
     create_directory_structure()
     for district_name, hospitals in DISTRICTS.items():
-        process_district(district_name, hospitals)
+        process_district(district_name, hospitals, from_archive)
+    metrics.save_crawl_summary("scrape_doctors_from_every_district" + ("-archive" if from_archive else ""))
+    if not from_archive:
+        print(f"Fetch stats: {http_client.stats.summary()}")
 
 
 if __name__ == "__main__":
-    main()
+    # --from-archive re-parses the archived listings without touching the network
+    main(from_archive="--from-archive" in sys.argv[1:])
     print("Processing district: Kustia")
\ No newline at end of file
@@ -0,0 +1,152 @@
+import bisect
+import math
+import re
+
+# Relative weight of a term hit in each searchable field
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "specialty": 2.0,
+    "qualification": 1.5,
+    "address": 1.0,
+}
+MIN_SIMILARITY = 0.45  # Trigram (Dice) similarity below which a term is not a typo match
+MAX_FUZZY_TERMS = 8  # Most similar vocabulary terms considered per query token
+MIN_PREFIX_LENGTH = 3  # Shortest token expanded as a prefix ("rez" -> "rezwan")
+
+TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.casefold())
+
+
+def trigrams(term):
+    """Return the padded character trigrams of a term."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def searchable_fields(doctor):
+    """Yield (field, text) pairs for every searchable part of a doctor record."""
+    for field in ("name", "specialty", "qualification"):
+        yield field, doctor.get(field)
+    for chamber in doctor.get("chambers") or []:
+        yield "address", chamber.get("address")
+
+
+class SearchIndex:
+    """Tokenized inverted index with trigram typo tolerance over doctor records."""
+
+    def __init__(self, doctors):
+        self.size = len(doctors)
+        self.postings = {}  # term -> {position: weighted term frequency}
+        self.trigram_terms = {}  # trigram -> set of terms containing it
+
+        for position, doctor in enumerate(doctors):
+            for field, text in searchable_fields(doctor):
+                weight = FIELD_WEIGHTS[field]
+                for term in tokenize(text):
+                    postings = self.postings.setdefault(term, {})
+                    postings[position] = postings.get(position, 0.0) + weight
+
+        self._build_lookups()
+
+    @classmethod
+    def from_postings(cls, size, postings):
+        """Build an index around existing postings, e.g. read from a snapshot file.
+
+        postings maps term -> {position: weight}; if it has a counts() method
+        the per-term record counts are taken from it instead of the postings.
+        """
+        index = cls.__new__(cls)
+        index.size = size
+        index.postings = postings
+        index.trigram_terms = {}
+        index._build_lookups()
+        return index
+
+    def _build_lookups(self):
+        """Derive the vocabulary, trigram lookup and idf from the postings."""
+        self.vocabulary = sorted(self.postings)
+        self.term_trigrams = {}
+        for term in self.vocabulary:
+            grams = trigrams(term)
+            self.term_trigrams[term] = grams
+            for gram in grams:
+                self.trigram_terms.setdefault(gram, set()).add(term)
+
+        if hasattr(self.postings, "counts"):
+            counts = self.postings.counts()
+        else:
+            counts = {term: len(postings) for term, postings in self.postings.items()}
+        self.idf = {
+            term: math.log(1 + (self.size - count + 0.5) / (count + 0.5))
+            for term, count in counts.items()
+        }
+
+    def _prefix_terms(self, token):
+        """Return vocabulary terms that start with token."""
+        start = bisect.bisect_left(self.vocabulary, token)
+        matches = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def expand(self, token):
+        """Map a query token to {vocabulary term: similarity}."""
+        expansions = {}
+        if token in self.postings:
+            expansions[token] = 1.0
+
+        if len(token) >= MIN_PREFIX_LENGTH:
+            for term in self._prefix_terms(token):
+                # Prefix hits rank just below an exact hit, shorter completions first
+                expansions.setdefault(term, 0.9 * len(token) / len(term) + 0.05)
+
+        query_grams = trigrams(token)
+        shared = {}
+        for gram in query_grams:
+            for term in self.trigram_terms.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        fuzzy = []
+        for term, count in shared.items():
+            similarity = 2 * count / (len(query_grams) + len(self.term_trigrams[term]))
+            if similarity >= MIN_SIMILARITY and term not in expansions:
+                fuzzy.append((similarity, term))
+        fuzzy.sort(reverse=True)
+        for similarity, term in fuzzy[:MAX_FUZZY_TERMS]:
+            expansions[term] = similarity * 0.8
+
+        return expansions
+
+    def search(self, query):
+        """Rank record positions for a free-text query.
+
+        Returns a list of (score, position), best first. Records matching more
+        query tokens always rank above records matching fewer.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        scores = {}
+        matched = {}
+        for token in tokens:
+            best = {}
+            for term, similarity in self.expand(token).items():
+                idf = self.idf[term]
+                for position, frequency in self.postings[term].items():
+                    score = similarity * idf * (1 + math.log(frequency))
+                    if score > best.get(position, 0.0):
+                        best[position] = score
+            for position, score in best.items():
+                scores[position] = scores.get(position, 0.0) + score
+                matched[position] = matched.get(position, 0) + 1
+
+        ranked = sorted(scores, key=lambda position: (-matched[position], -scores[position], position))
+        return [(round(scores[position], 4), position) for position in ranked]
@@ -1,8 +1,35 @@
 import os
-import json
+import sys
 from pathlib import Path
+from chamber_schedule import add_opening_hours
+from phone_numbers import add_phones
+from standardize_pipeline import WRITE_DATABASE, WRITE_SNAPSHOT, standardize_all
+from static_shards import build_shards
 
-def standardize_data_format():
+def standardize_record(doctor, district, profile_url):
+    """Map a scraped doctor record onto the standardized format."""
+    standardized = {
+        'district': district,
+        'name': doctor.get('name'),
+        'profile_url': profile_url,
+        'photo': doctor.get('photo'),
+        'qualification': doctor.get('qualification') or doctor.get('degree'),
+        'specialty': doctor.get('specialty'),
+        'designation': doctor.get('designation'),
+        'workplace': doctor.get('workplace'),
+        'rating': doctor.get('rating'),
+        # visiting_hour parsed into weekly hours, appointment numbers into E.164 phones
+        'chambers': add_phones(add_opening_hours(doctor.get('chambers', []))),
+        'source': {
+            'hospital': doctor.get('hospital_name') or doctor.get('source_hospital'),
+            'link': doctor.get('hospital_link') or doctor.get('source_hospital_link')
+        }
+    }
+    
+    # Remove empty fields
+    return {k: v for k, v in standardized.items() if v}
+
+def standardize_data_format(force=False, snapshot=WRITE_SNAPSHOT, shards=True, database=WRITE_DATABASE):
     # Get the absolute path to the current script's directory
     script_dir = Path(__file__).parent.resolve()
     
@@ -13,84 +40,37 @@ def standardize_data_format():
     output_dir = script_dir / "Standardized_Doctor_Details"
     output_dir.mkdir(exist_ok=True)
     
-    # Get all JSON files in Doctor_Details folder automatically
-    district_files = list(input_dir.glob("doctors-details-*.json"))
+    # Districts are standardized in parallel; ones whose input is unchanged since the
+    # last run keep their previous output, and the combined file is merged from them
+    summary = standardize_all(standardize_record, input_dir, output_dir, force=force, snapshot=snapshot,
+                               database=database)
     
-    if not district_files:
+    if not summary["inputs"]:
         print(f"No district files found in {input_dir}")
-        print(f"Looking for files named: doctors-details-*.json")
+        print(f"Looking for files named: doctors-details-*.json or doctors-details-*.jsonl")
         return
     
-    all_doctors = []
-    duplicates_removed = 0
-    
-    for file_path in district_files:
-        try:
-            district = file_path.stem.replace("doctors-details-", "")
-            print(f"\nProcessing {district}...")
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                standardized_doctors = []
-                seen_profiles = set()
-                
-                for doctor in data.get('doctors', []):
-                    profile_url = doctor.get('profile_url') or doctor.get('chamber_link')
-                    if not profile_url:
-                        continue
-                        
-                    if profile_url in seen_profiles:
-                        duplicates_removed += 1
-                        continue
-                    seen_profiles.add(profile_url)
-                    
-                    standardized = {
-                        'district': district,
-                        'name': doctor.get('name'),
-                        'profile_url': profile_url,
-                        'photo': doctor.get('photo'),
-                        'qualification': doctor.get('qualification') or doctor.get('degree'),
-                        'specialty': doctor.get('specialty'),
-                        'designation': doctor.get('designation'),
-                        'workplace': doctor.get('workplace'),
-                        'rating': doctor.get('rating'),
-                        'chambers': doctor.get('chambers', []),
-                        'source': {
-                            'hospital': doctor.get('hospital_name') or doctor.get('source_hospital'),
-                            'link': doctor.get('hospital_link') or doctor.get('source_hospital_link')
-                        }
-                    }
-                    
-                    # Remove empty fields
-                    standardized = {k: v for k, v in standardized.items() if v}
-                    standardized_doctors.append(standardized)
-                
-                # Save individual district file
-                output_path = output_dir / f"standardized-{district}.json"
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(standardized_doctors, f, ensure_ascii=False, indent=2)
-                
-                all_doctors.extend(standardized_doctors)
-                print(f"✅ Processed {len(standardized_doctors)} doctors")
-                
-        except Exception as e:
-            print(f"❌ Error processing {file_path.name}: {str(e)}")
-    
-    if all_doctors:
-        # Save combined file
-        combined_path = output_dir / "all-doctors-combined.json"
-        with open(combined_path, 'w', encoding='utf-8') as f:
-            json.dump(all_doctors, f, ensure_ascii=False, indent=2)
-        
+    if summary["doctors"]:
         print("\n" + "="*50)
         print(f"Standardization complete!")
-        print(f"🏥 Total districts processed: {len(district_files)}")
-        print(f"👨‍⚕️ Total doctors: {len(all_doctors)}")
-        print(f"🚫 Duplicates removed: {duplicates_removed}")
+        print(f"🏥 Total districts processed: {summary['processed']} ({summary['skipped']} unchanged)")
+        print(f"👨‍⚕️ Total doctors: {summary['doctors']}")
+        print(f"🚫 Duplicates removed: {summary['duplicates']}")
+        print(f"🔗 Merged across districts: {summary['resolved_doctors']} distinct doctors "
+              f"({summary['merged_by_profile_url']} by profile URL, "
+              f"{summary['merged_by_name_and_phone']} by name and phone)")
+        print(f"🕒 Visiting hours parsed: {summary['visiting_hours_parsed']} "
+              f"({summary['visiting_hours_unparseable']} unparseable, see python chamber_schedule.py)")
         print(f"📁 Output directory: {output_dir}")
+        if shards:
+            # Static per-district/per-specialty JSON for nginx or a CDN; only changed shards are rewritten
+            build_shards(output_dir, force=force)
     else:
         print("\nNo doctors were processed. Please check your input files.")
 
 if __name__ == "__main__":
-    standardize_data_format()
\ No newline at end of file
+    # Pass --force to reprocess every district, --no-shards to skip the static API shards,
+    # --database to also rebuild the SQLite file for DATA_BACKEND=sqlite
+    standardize_data_format(force="--force" in sys.argv[1:], snapshot=WRITE_SNAPSHOT or "--snapshot" in sys.argv[1:],
+                            shards="--no-shards" not in sys.argv[1:],
+                            database=WRITE_DATABASE or "--database" in sys.argv[1:])
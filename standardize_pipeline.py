@@ -0,0 +1,279 @@
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import chamber_schedule
+import entity_resolution
+import phone_numbers
+from doctor_db import DATA_DIR, DB_FILE, DB_PATH, build_database
+from doctor_records import DoctorRecord, to_json
+from doctor_snapshot import snapshot_signature, write_snapshot
+from doctor_store import SNAPSHOT_FILE, DoctorStore
+from entity_resolution import resolve_doctors
+from jsonl_io import OUTPUT_FORMAT, JsonlWriter, iter_records, latest_outputs
+
+# Configuration
+STANDARDIZE_WORKERS = os.cpu_count() or 2  # Processes standardizing districts in parallel
+MANIFEST_FILE = ".standardize-manifest.json"  # Kept in the output directory
+INPUT_PATTERN = "doctors-details-*.json*"
+COMBINED_NAME = "all-doctors-combined"
+WRITE_SNAPSHOT = os.environ.get("WRITE_SNAPSHOT", "") == "1"  # Also write the binary snapshot app.py can mmap
+WRITE_DATABASE = os.environ.get("WRITE_DATABASE", "") == "1"  # Also rebuild the SQLite file for DATA_BACKEND=sqlite
+
+
+def file_sha256(path):
+    """Hash a file in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def standardizer_id(standardize_record):
+    """Fingerprint the code producing the output, so editing it reprocesses every district."""
+    digest = hashlib.sha256()
+    for path in (inspect.getsourcefile(standardize_record), __file__, chamber_schedule.__file__,
+                 entity_resolution.__file__, phone_numbers.__file__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(output_dir):
+    """Load the manifest of the previous run, or an empty one."""
+    try:
+        with open(Path(output_dir) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"districts": {}}
+
+
+def save_manifest(manifest, output_dir):
+    """Write the manifest atomically."""
+    path = Path(output_dir) / MANIFEST_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _write_json(data, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=to_json)
+    os.replace(tmp_path, path)
+
+
+def standardize_district(standardize_record, input_path, output_dir, output_format):
+    """Standardize one doctors-details file into standardized-<district>; runs in a worker process.
+
+    Duplicate profile URLs within the district are dropped. Returns the
+    district's manifest fields.
+    """
+    district = Path(input_path).stem.replace("doctors-details-", "")
+    output_path = Path(output_dir) / f"standardized-{district}.{output_format}"
+    writer = JsonlWriter(output_path) if output_format == "jsonl" else None
+    standardized_doctors = []
+    seen_profiles = set()
+    duplicates = 0
+    hours_parsed = hours_unparseable = 0
+
+    try:
+        for doctor in iter_records(input_path, key='doctors'):
+            profile_url = doctor.get('profile_url') or doctor.get('chamber_link')
+            if not profile_url:
+                continue
+            if profile_url in seen_profiles:
+                duplicates += 1
+                continue
+            seen_profiles.add(profile_url)
+
+            standardized = standardize_record(doctor, district, profile_url)
+            for chamber in standardized.get('chambers') or []:
+                if chamber.get('opening_hours'):
+                    hours_parsed += 1
+                elif chamber.get('visiting_hour'):
+                    hours_unparseable += 1
+            if writer is not None:
+                writer.write(standardized)
+            else:
+                standardized_doctors.append(DoctorRecord.from_dict(standardized))
+    except BaseException:
+        if writer is not None:
+            writer.discard()
+        raise
+
+    if writer is not None:
+        writer.commit()
+    else:
+        _write_json(standardized_doctors, output_path)
+    return {
+        "district": district,
+        "output": output_path.name,
+        "doctors": len(seen_profiles),
+        "duplicates": duplicates,
+        "visiting_hours": {"parsed": hours_parsed, "unparseable": hours_unparseable},
+    }
+
+
+def write_combined(paths, combined_path, output_format):
+    """Write the combined file from the per-district outputs, merging each doctor's records across districts.
+
+    Returns the entity_resolution stats.
+    """
+    doctors = [doctor for path in paths for doctor in iter_records(path)]
+    resolved, stats = resolve_doctors(doctors)
+    if output_format == "jsonl":
+        with JsonlWriter(combined_path) as writer:
+            for doctor in resolved:
+                writer.write(doctor)
+    else:
+        _write_json(resolved, combined_path)
+    return stats
+
+
+def _unchanged(entry, input_path, signature, output_dir):
+    """Whether a district's previous output can be reused, hashing only when the mtime moved."""
+    if not entry or entry.get("input") != input_path.name:
+        return False
+    if not (Path(output_dir) / entry["output"]).exists():
+        return False
+    if entry.get("size") == signature["size"] and entry.get("mtime_ns") == signature["mtime_ns"]:
+        return True
+    if entry.get("size") != signature["size"]:
+        return False
+    signature["sha256"] = file_sha256(input_path)
+    return entry.get("sha256") == signature["sha256"]
+
+
+def refresh_snapshot(output_dir, force=False):
+    """Rewrite the binary snapshot unless it already matches the JSON files; returns its path or None."""
+    source = DoctorStore(output_dir)
+    snapshot_path = Path(output_dir) / SNAPSHOT_FILE
+    signature = [list(entry) for entry in source.signature()]
+    if not force and snapshot_signature(snapshot_path) == signature:
+        return None
+    doctors, signature = source.read()
+    size = write_snapshot(doctors, snapshot_path, [list(entry) for entry in signature])
+    print(f"Wrote {len(doctors)} doctors to {snapshot_path} ({size / 1e6:.1f} MB)")
+    return snapshot_path
+
+
+def standardize_all(standardize_record, input_dir, output_dir, output_format=OUTPUT_FORMAT,
+                    workers=STANDARDIZE_WORKERS, force=False, snapshot=WRITE_SNAPSHOT, database=WRITE_DATABASE):
+    """Standardize the districts whose input changed since the last run and rebuild the combined file.
+
+    standardize_record(doctor, district, profile_url) maps one scraped record
+    to the standardized schema; it must be a module-level function so worker
+    processes can use it. With snapshot=True the binary snapshot is refreshed
+    after the JSON, and with database=True the SQLite database. Returns a
+    summary of the run.
+    """
+    input_dir, output_dir = Path(input_dir), Path(output_dir)
+    input_files = latest_outputs(input_dir.glob(INPUT_PATTERN))
+    standardizer = standardizer_id(standardize_record)
+
+    manifest = load_manifest(output_dir)
+    if force or manifest.get("standardizer") != standardizer or manifest.get("format") != output_format:
+        # Different code or output format: nothing from the previous run can be reused
+        manifest = {"districts": {}}
+    previous = manifest.get("districts", {})
+
+    districts = {}
+    changed = []
+    skipped = []
+    for input_path in input_files:
+        district = input_path.stem.replace("doctors-details-", "")
+        stat = input_path.stat()
+        signature = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        entry = previous.get(district)
+        if _unchanged(entry, input_path, signature, output_dir):
+            districts[district] = {**entry, **signature}
+            skipped.append(district)
+            print(f"Skipping {district} - unchanged since last run")
+        else:
+            changed.append((district, input_path, signature))
+
+    failed = []
+
+    def record(district, input_path, signature, result):
+        districts[district] = {
+            "input": input_path.name,
+            **signature,
+            "sha256": signature.get("sha256") or file_sha256(input_path),
+            "output": result["output"],
+            "doctors": result["doctors"],
+            "duplicates": result["duplicates"],
+            "visiting_hours": result["visiting_hours"],
+        }
+        print(f"Processed {result['doctors']} doctors in {district}")
+
+    if len(changed) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(changed))) as pool:
+            futures = {}
+            for district, input_path, signature in changed:
+                print(f"Processing {district}...")
+                future = pool.submit(standardize_district, standardize_record, input_path, output_dir, output_format)
+                futures[future] = (district, input_path, signature)
+            for future, (district, input_path, signature) in futures.items():
+                try:
+                    record(district, input_path, signature, future.result())
+                except Exception as e:
+                    failed.append(district)
+                    print(f"Error processing {input_path.name}: {str(e)}")
+    else:
+        for district, input_path, signature in changed:
+            print(f"Processing {district}...")
+            try:
+                record(district, input_path, signature,
+                       standardize_district(standardize_record, input_path, output_dir, output_format))
+            except Exception as e:
+                failed.append(district)
+                print(f"Error processing {input_path.name}: {str(e)}")
+
+    # Rebuild the combined file only when its set of district outputs changed
+    combined_path = output_dir / f"{COMBINED_NAME}.{output_format}"
+    combined = {"output": combined_path.name, "districts": sorted(districts)}
+    total_doctors = sum(entry["doctors"] for entry in districts.values())
+    resolution = manifest.get("resolution") or {}
+    rebuilt = False
+    if districts and (changed or manifest.get("combined") != combined or not combined_path.exists()):
+        resolution = write_combined([output_dir / districts[d]["output"] for d in sorted(districts)],
+                                    combined_path, output_format)
+        rebuilt = True
+
+    save_manifest({
+        "standardizer": standardizer,
+        "format": output_format,
+        "districts": districts,
+        "combined": combined if districts else None,
+        "resolution": resolution,
+    }, output_dir)
+
+    snapshot_path = refresh_snapshot(output_dir, force=force) if snapshot and districts else None
+    database_loaded = None
+    if database and districts:
+        # Built here rather than when app.py starts, so API workers never build it
+        db_path = DB_PATH if output_dir.resolve() == DATA_DIR else output_dir / DB_FILE
+        database_loaded = build_database(output_dir, db_path, force=force)
+
+    return {
+        "inputs": len(input_files),
+        "processed": len(changed) - len(failed),
+        "skipped": len(skipped),
+        "failed": failed,
+        "doctors": total_doctors,
+        "duplicates": sum(entry["duplicates"] for entry in districts.values()),
+        "visiting_hours_parsed": sum(entry.get("visiting_hours", {}).get("parsed", 0) for entry in districts.values()),
+        "visiting_hours_unparseable": sum(entry.get("visiting_hours", {}).get("unparseable", 0)
+                                          for entry in districts.values()),
+        "resolved_doctors": resolution.get("doctors", total_doctors),
+        "merged_by_profile_url": resolution.get("merged_by_profile_url", 0),
+        "merged_by_name_and_phone": resolution.get("merged_by_name_and_phone", 0),
+        "combined": str(combined_path) if rebuilt else None,
+        "snapshot": str(snapshot_path) if snapshot_path else None,
+        "database": database_loaded,
+    }
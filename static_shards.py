@@ -0,0 +1,228 @@
+"""Pre-rendered, precompressed JSON shards of the standardized data, for nginx or a CDN to serve.
+
+Built from Standardized_Doctor_Details/ after standardize_data_format():
+
+    Static_API/doctors/district/<district>.json
+    Static_API/doctors/specialty/<specialty>.json
+    Static_API/doctors/district/<district>/specialty/<specialty>.json
+    Static_API/manifest.json                            districts and specialties: name, total
+    Static_API/doctors/district/<district>/index.json   that district's specialties: name, total
+
+File names are the lowercased value with every run of other characters
+turned into "-" ("Cardiology Specialist" -> cardiology-specialist), so
+clients can build shard URLs without the manifest. Only values that would
+share a name (or have no a-z0-9 characters at all) get a short hash
+suffix; the manifest lists those too.
+
+Each shard is {"district", "specialty", "total", "doctors"} next to a .gz
+(and, with the brotli package installed, a .br) copy for gzip_static /
+brotli_static. Only shards whose records changed are rewritten, and
+nothing is read at all while the standardized files are unchanged, so
+proxies keep their cached copies of everything else. The content hashes
+this relies on are kept in .build-state.json. app.py is left with the
+dynamic queries (filters, search, open_at, pagination).
+
+    python static_shards.py [--force]
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from doctor_records import to_json
+from doctor_store import DATA_DIR, DoctorStore, field_values, normalize_value
+from response_bodies import ENCODINGS, EncodedBody
+
+# Configuration
+STATIC_DIR = Path(__file__).parent.resolve() / "Static_API"
+MANIFEST_FILE = "manifest.json"
+DISTRICT_INDEX_FILE = "index.json"
+STATE_FILE = ".build-state.json"  # Shard hashes and the source signature, for incremental builds
+MAX_SLUG_LENGTH = 60
+HASH_LENGTH = 16  # Hex digits of each shard's sha256 kept in the manifest
+SUFFIXES = {"identity": "", "gzip": ".gz", "br": ".br"}  # File suffix per content-coding
+
+
+def slug(value):
+    """Predictable file name for a field value: lowercase a-z0-9 words joined by "-"."""
+    text = re.sub(r"[^a-z0-9]+", "-", normalize_value(value)).strip("-")
+    return text[:MAX_SLUG_LENGTH].rstrip("-")
+
+
+def assign_slugs(keys):
+    """{normalized value: file name}, adding a hash suffix only where values collide.
+
+    Of the values sharing a name, the first in sorted order keeps it plain;
+    a value's name only changes when the values it collides with change.
+    """
+    by_slug = {}
+    for key in sorted(keys):
+        by_slug.setdefault(slug(key), []).append(key)
+    names = {}
+    for text, colliding in by_slug.items():
+        for i, key in enumerate(colliding):
+            if text and i == 0:
+                names[key] = text
+            else:
+                digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+                names[key] = f"{text}-{digest}" if text else digest
+    return names
+
+
+def group_shards(doctors):
+    """{shard path: {"district", "specialty", "doctors"}} for every district, specialty and pair."""
+    names = {field: assign_slugs({normalize_value(value) for doctor in doctors
+                                  for value in field_values(doctor, field)})
+             for field in ("district", "specialty")}
+    shards = {}
+
+    def add(path, doctor, **labels):
+        shard = shards.get(path)
+        if shard is None:
+            shard = shards[path] = {"district": None, "specialty": None, **labels, "doctors": []}
+        shard["doctors"].append(doctor)
+
+    for doctor in doctors:
+        # A doctor merged across districts is in each district's shards, but only once in each
+        districts = {names["district"][normalize_value(value)]: value for value in field_values(doctor, "district")}
+        specialties = {names["specialty"][normalize_value(value)]: value
+                       for value in field_values(doctor, "specialty")}
+        for district_slug, district in districts.items():
+            add(f"doctors/district/{district_slug}", doctor, district=district)
+        for specialty_slug, specialty in specialties.items():
+            add(f"doctors/specialty/{specialty_slug}", doctor, specialty=specialty)
+            for district_slug, district in districts.items():
+                add(f"doctors/district/{district_slug}/specialty/{specialty_slug}", doctor,
+                    district=district, specialty=specialty)
+    return shards
+
+
+def render_shard(shard):
+    """Compact, deterministic JSON body of one shard."""
+    document = {"district": shard["district"], "specialty": shard["specialty"],
+                "total": len(shard["doctors"]), "doctors": shard["doctors"]}
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":"), default=to_json).encode("utf-8")
+
+
+def _write_bytes(data, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def write_body(body, path):
+    """Write a body and its compressed copies; the plain file goes last so it never pairs with an old .gz."""
+    for encoding, suffix in SUFFIXES.items():
+        if encoding not in body.bodies:
+            # Too small to compress now, or brotli went away: drop the copy of an older version
+            _remove(f"{path}{suffix}")
+    for encoding, data in sorted(body.bodies.items(), key=lambda item: item[0] == "identity"):
+        _write_bytes(data, Path(f"{path}{SUFFIXES[encoding]}"))
+
+
+def remove_shard(static_dir, path):
+    for suffix in SUFFIXES.values():
+        _remove(static_dir / f"{path}.json{suffix}")
+    try:
+        os.removedirs((static_dir / path).parent)  # Directories it leaves empty
+    except OSError:
+        pass
+
+
+def load_state(static_dir):
+    try:
+        with open(static_dir / STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"shards": {}}
+
+
+def _write_json(data, path):
+    """Write a small JSON document (and its compressed copies) compactly, unless it is unchanged."""
+    data = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    if path.exists() and path.read_bytes() == data:
+        return
+    write_body(EncodedBody(data), path)
+
+
+def write_manifests(entries, doctors, static_dir):
+    """Write manifest.json (districts and specialties) and each district's index.json (its specialties)."""
+    # No build time in it: an unchanged build leaves the manifest (and proxies' copies of it) alone
+    manifest = {"doctors": doctors, "districts": {}, "specialties": {}}
+    district_indexes = {}
+    for path, entry in entries.items():
+        parts = path.split("/")
+        if len(parts) == 3:
+            kind = "districts" if parts[1] == "district" else "specialties"
+            manifest[kind][parts[2]] = {"name": entry["district"] or entry["specialty"], "total": entry["total"]}
+        else:
+            district_indexes.setdefault(parts[2], {})[parts[4]] = {"name": entry["specialty"], "total": entry["total"]}
+    _write_json(manifest, static_dir / MANIFEST_FILE)
+    for district_slug, specialties in district_indexes.items():
+        _write_json({"district": manifest["districts"][district_slug]["name"], "specialties": specialties},
+                    static_dir / "doctors" / "district" / district_slug / DISTRICT_INDEX_FILE)
+
+
+def build_shards(data_dir=DATA_DIR, static_dir=STATIC_DIR, force=False):
+    """Render the shards whose records changed since the last build; returns a summary of the run."""
+    static_dir = Path(static_dir)
+    source = DoctorStore(data_dir)
+    signature = [list(entry) for entry in source.signature()]
+    state = load_state(static_dir)
+    encodings = sorted(("identity",) + ENCODINGS)
+    summary = {"shards": len(state["shards"]), "written": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+    if not signature:
+        print(f"No standardized files in {data_dir}")
+        return summary
+    if force or state.get("encodings") != encodings:
+        # Also rewrite everything when brotli becomes available (or goes away)
+        state = {"shards": {}}
+    elif state.get("source") == signature and (static_dir / MANIFEST_FILE).exists():
+        print(f"Static shards are up to date with {data_dir}")
+        summary["unchanged"] = len(state["shards"])
+        return summary
+
+    doctors, _ = source.read()
+    previous = state["shards"]
+    entries = {}
+    for path, shard in sorted(group_shards(doctors).items()):
+        data = render_shard(shard)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        entries[path] = {"district": shard["district"], "specialty": shard["specialty"],
+                         "total": len(shard["doctors"]), "hash": digest}
+        if previous.get(path, {}).get("hash") == digest and (static_dir / f"{path}.json").exists():
+            summary["unchanged"] += 1
+            continue
+        body = EncodedBody(data)
+        write_body(body, static_dir / f"{path}.json")
+        summary["written"] += 1
+        summary["bytes"] += sum(body.sizes().values())
+    for path in previous.keys() - entries.keys():
+        remove_shard(static_dir, path)
+        summary["removed"] += 1
+
+    for district_slug in {path.split("/")[2] for path in previous} - {path.split("/")[2] for path in entries}:
+        remove_shard(static_dir, f"doctors/district/{district_slug}/index")
+
+    write_manifests(entries, len(doctors), static_dir)
+    # Written last: an interrupted build leaves the old state, so the next one redoes the work
+    _write_bytes(json.dumps({"encodings": encodings, "source": signature, "shards": entries},
+                            ensure_ascii=False).encode("utf-8"), static_dir / STATE_FILE)
+    summary["shards"] = len(entries)
+    print(f"Static shards: {summary['written']} written, {summary['unchanged']} unchanged, "
+          f"{summary['removed']} removed ({summary['bytes'] / 1e6:.1f} MB) in {static_dir}")
+    return summary
+
+
+if __name__ == "__main__":
+    build_shards(force="--force" in sys.argv[1:])
@@ -0,0 +1,130 @@
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules live at the repository root, not in a package
+sys.path.insert(0, ROOT)
+
+import rate_limiter  # noqa: E402
+from doctor_db import DoctorDatabase, build_database  # noqa: E402
+from doctor_store import DoctorStore  # noqa: E402
+from standardize_pipeline import refresh_snapshot  # noqa: E402
+
+SAMPLE_DISTRICTS = {"barisal": 40, "dhaka": 40}  # Doctors taken from the start of each standardized file
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    """A small copy of the standardized data: the first doctors of a few districts."""
+    directory = tmp_path_factory.mktemp("standardized")
+    for district, count in SAMPLE_DISTRICTS.items():
+        with open(os.path.join(ROOT, "Standardized_Doctor_Details", f"standardized-{district}.json"),
+                  encoding="utf-8") as f:
+            doctors = json.load(f)[:count]
+        with open(directory / f"standardized-{district}.json", "w", encoding="utf-8") as f:
+            json.dump(doctors, f, ensure_ascii=False)
+    refresh_snapshot(directory)
+    build_database(directory, directory / "doctors.sqlite3", hospitals_dir=directory / "no-hospitals")
+    return directory
+
+
+@pytest.fixture(scope="session", params=["json", "snapshot", "sqlite"])
+def store(request, data_dir):
+    """The sample data behind each DATA_BACKEND app.py supports."""
+    if request.param == "sqlite":
+        return DoctorDatabase(data_dir / "doctors.sqlite3")
+    store = DoctorStore(data_dir, use_snapshot=request.param == "snapshot")
+    store.load()
+    return store
+
+
+def load_script(path):
+    """Import a script from a folder that is not a package, by its path from the repository root."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def districts(tmp_path, monkeypatch):
+    """process_all_districts.py working in tmp_path on one district listing doctors a, b and c."""
+    module = load_script(os.path.join("All_Doctors_by_district", "process_all_districts.py"))
+    monkeypatch.setattr(module, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(module, "USE_FRONTIER", False)
+    monkeypatch.setattr(module, "USE_HTTP_CACHE", False)
+    monkeypatch.setattr(module, "ARCHIVE_PAGES", False)
+    monkeypatch.setattr(module, "OUTPUT_FORMAT", "json")
+    os.makedirs(tmp_path / "testdistrict")
+    listing = {"district": "testdistrict", "hospitals": [{"name": "General Hospital", "link": "", "doctors": [
+        {"name": name, "chamber_link": f"https://example.com/doctor/{name}/"} for name in ("a", "b", "c")]}]}
+    with open(tmp_path / "testdistrict" / "hospitals-testdistrict.json", "w", encoding="utf-8") as f:
+        json.dump(listing, f)
+    return module
+
+
+class StubSite:
+    """A local HTTP server with fixed pages, strong ETags and a log of the requests it got."""
+
+    def __init__(self):
+        self.pages = {}  # path -> HTML
+        self.requests = []  # (path, If-None-Match)
+        self.statuses = {}  # path -> error statuses to answer with before serving the page
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, self.headers.get("If-None-Match")))
+                if site.statuses.get(self.path):
+                    self.send_response(site.statuses[self.path].pop(0))
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = site.pages.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = body.encode("utf-8")
+                etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def url(self, path):
+        return self.base_url + path
+
+
+@pytest.fixture
+def site(monkeypatch):
+    # A new port is a new host to the rate limiter: let it start (and stay) fast
+    monkeypatch.setattr(rate_limiter, "_defaults", {"rate": 1000.0, "min_rate": rate_limiter.MIN_RATE,
+                                                    "max_rate": 1000.0})
+    site = StubSite()
+    yield site
+    site.server.shutdown()
+    site.server.server_close()
@@ -0,0 +1,106 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import pytest
+from conftest import ROOT
+from doctor_store import DoctorStore
+from response_bodies import BodyCache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def client(data_dir, monkeypatch):
+    import app
+    store = DoctorStore(data_dir)
+    store.load()
+    monkeypatch.setattr(app, "store", store)
+    monkeypatch.setattr(app, "bodies", BodyCache())
+    return app.app.test_client()
+
+
+def test_doctors_come_from_the_loaded_dataset_without_scraping(client, monkeypatch):
+    import app
+
+    def fetch(*args, **kwargs):
+        raise AssertionError("scraped the live site")
+
+    monkeypatch.setattr(app, "fetch", fetch)
+    response = client.get("/api/doctors")
+    assert response.status_code == 200
+    assert response.json == [doctor.to_dict() for doctor in app.store.doctors()]
+
+
+def test_live_source_is_scraped_once_and_cached(client, monkeypatch):
+    import app
+    calls = []
+    monkeypatch.setattr(app, "live_doctors", ResponseCache(lambda: calls.append(1) or [{"name": "Dr. A"}], ttl=60))
+    for _ in range(3):
+        assert client.get("/api/doctors?source=live").json == [{"name": "Dr. A"}]
+    assert calls == [1]
+
+
+def test_dataset_responses_carry_an_etag_and_revalidate_to_304(client):
+    response = client.get("/api/doctors")
+    assert response.status_code == 200
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+    etag = response.headers["ETag"]
+    assert len(response.json) == 80
+
+    response = client.get("/api/doctors", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_gzip_bodies_have_their_own_etag(client):
+    plain = client.get("/api/doctors")
+    compressed = client.get("/api/doctors", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.json
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    # Either coding's ETag revalidates
+    assert client.get("/api/doctors", headers={"If-None-Match": plain.headers["ETag"],
+                                                "Accept-Encoding": "gzip"}).status_code == 304
+
+
+def test_filtered_queries_get_an_etag_too(client):
+    response = client.get("/api/doctors?district=barisal&limit=5")
+    assert response.status_code == 200
+    assert client.get("/api/doctors?district=barisal&limit=5",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_the_snapshot_backend_does_not_build_the_doctors_body_at_import():
+    # A fresh interpreter, since app.py picks its backend when it is imported
+    code = "import app; print(app.bodies.stats()['builds'])"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+                            env={**os.environ, "DATA_BACKEND": "snapshot"}).stdout
+    assert output.splitlines()[-1] == "0"
+
+
+@pytest.mark.parametrize("query", ["page=0", "page=-1", "page=x", "limit=0", "offset=-1", "open_at=someday"])
+def test_invalid_paging_is_rejected(client, query):
+    response = client.get(f"/api/doctors?{query}")
+    assert response.status_code == 400
+    assert "error" in response.json
+
+
+def test_page_selects_by_limit(client):
+    first = client.get("/api/doctors?district=barisal&limit=5").json
+    second = client.get("/api/doctors?district=barisal&limit=5&page=2").json
+    assert second["offset"] == 5
+    assert [d["profile_url"] for d in first["doctors"]] != [d["profile_url"] for d in second["doctors"]]
+
+
+def test_search_requires_a_query(client):
+    assert client.get("/api/search").status_code == 400
+    results = client.get("/api/search?q=rezwan&limit=1").json
+    assert results["total"] >= 1 and "Rezwan" in results["results"][0]["doctor"]["name"]
+
+
+def test_phone_lookup(client):
+    assert client.get("/api/phones/+880%201711-240969").json["phone"] == "+8801711240969"
+    assert client.get("/api/phones/123").status_code == 404
@@ -0,0 +1,47 @@
+import json
+from chamber_schedule import MINUTES_PER_DAY, OpenHoursIndex, parse_moment, parse_visiting_hour
+from doctor_store import DoctorStore
+
+
+def at(day, hour, minute=0):
+    return day * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def test_parse_visiting_hour():
+    # Closed on Friday: 7pm-10pm on every other day
+    intervals = parse_visiting_hour("7pm to 10pm (Closed: Friday)")
+    assert len(intervals) == 6
+    assert (at(0, 19), at(0, 22)) in intervals
+    assert (at(4, 19), at(4, 22)) not in intervals
+    assert parse_visiting_hour("5pm to 7pm (Sat, Mon & Wed)") == ((at(0, 17), at(0, 19)), (at(2, 17), at(2, 19)),
+                                                                  (at(5, 17), at(5, 19)))
+    assert parse_visiting_hour("Call for appointment") is None
+
+
+def test_parse_moment():
+    assert parse_moment("tue 18:00") == at(1, 18)
+    assert parse_moment("tuesday 6pm") == at(1, 18)
+
+
+def test_open_at():
+    doctors = [{"chambers": [{"visiting_hour": "7pm to 10pm (Closed: Friday)"}]},
+               {"chambers": [{"visiting_hour": "9am to 5pm (Fri)"}, {"visiting_hour": "by appointment"}]}]
+    index = OpenHoursIndex(doctors)
+    assert index.open_at(at(0, 20)) == (0,)
+    assert index.open_at(at(4, 20)) == ()
+    assert index.open_at(at(4, 10)) == (1,)
+    assert index.stats() == {"chambers": 3, "parsed": 2, "unparseable": 1, "top_unparseable": [("by appointment", 1)]}
+
+
+def test_every_backend_answers_open_at_and_visiting_hours_alike(store, data_dir):
+    doctors, _ = DoctorStore(data_dir).read()
+    expected = OpenHoursIndex(doctors).stats()
+    assert expected["top_unparseable"]
+    # The API serializes the stats as JSON, where the (text, count) pairs become lists
+    assert json.loads(json.dumps(store.stats()["visiting_hours"])) == json.loads(json.dumps(expected))
+
+    moment = at(1, 18)
+    open_now = store.query({}, limit=1000, open_at=moment)
+    expected_urls = {doctors[position]["profile_url"] for position in OpenHoursIndex(doctors).open_at(moment)}
+    assert {doctor["profile_url"] for doctor in open_now["doctors"]} == expected_urls
+    assert open_now["total"] == len(expected_urls)
@@ -0,0 +1,49 @@
+import json
+import os
+from checkpoint_journal import CheckpointJournal
+
+
+def fake_pipeline(fetched, requested):
+    """A run_pipeline that records the URLs it was asked for and only "fetches" the given ones."""
+    def run_pipeline(jobs, parse, on_result=None, **kwargs):
+        for key, url in jobs:
+            requested.append(url)
+            result = {"name": url.rstrip("/").rsplit("/", 1)[1], "profile_url": url} if url in fetched else None
+            on_result(key, result)
+        return [], {}
+    return run_pipeline
+
+
+def test_load_ignores_a_torn_final_line(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"))
+    journal.append("https://example.com/a/", {"name": "a"})
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://example.com/b/", "deta')
+    assert journal.load() == {"https://example.com/a/": {"name": "a"}}
+
+
+def test_resume_skips_journaled_profiles_and_keeps_the_journal_until_all_are_fetched(districts, monkeypatch,
+                                                                                      capsys):
+    url = "https://example.com/doctor/{}/".format
+    journal = CheckpointJournal(districts.checkpoint_path("testdistrict"))
+    journal.append(url("a"), {"name": "a", "profile_url": url("a")})
+    # A profile the listing no longer has must not count towards completion
+    journal.append(url("gone"), {"name": "gone", "profile_url": url("gone")})
+    journal.close()
+
+    requested = []
+    monkeypatch.setattr(districts, "run_pipeline", fake_pipeline({url("b")}, requested))
+    districts.process_district("testdistrict")
+    assert requested == [url("b"), url("c")]
+    assert os.path.exists(journal.path)
+    assert "1 profiles failed" in capsys.readouterr().out
+
+    requested.clear()
+    monkeypatch.setattr(districts, "run_pipeline", fake_pipeline({url("c")}, requested))
+    districts.process_district("testdistrict")
+    assert requested == [url("c")]
+    assert not os.path.exists(journal.path)
+    with open(districts.output_file("testdistrict", "json"), encoding="utf-8") as f:
+        saved = json.load(f)
+    assert sorted(doctor["name"] for doctor in saved["doctors"]) == ["a", "b", "c"]
@@ -0,0 +1,32 @@
+import pytest
+import rate_limiter
+from crawl_engine import run_crawl
+
+
+def parse_title(html, url):
+    return html.split("<h1>", 1)[1].split("</h1>", 1)[0]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backoff_delay", lambda attempt, retry_after=None: 0)
+
+
+def test_every_job_gets_its_result(site):
+    for i in range(20):
+        site.pages[f"/doctor/{i}/"] = f"<h1>Doctor {i}</h1>"
+    finished = []
+    results = run_crawl([(i, site.url(f"/doctor/{i}/")) for i in range(20)], parse_title,
+                        on_result=lambda key, result: finished.append(key), concurrency=5, rate=1000)
+    assert dict(results) == {i: f"Doctor {i}" for i in range(20)}
+    assert sorted(finished) == list(range(20))
+
+
+def test_failed_fetches_and_parses_yield_none(site):
+    site.pages["/ok/"] = "<h1>ok</h1>"
+    site.pages["/broken/"] = "no title here"
+    site.pages["/throttled/"] = "<h1>later</h1>"
+    site.statuses["/throttled/"] = [503]
+    jobs = [(path, site.url(path)) for path in ("/ok/", "/broken/", "/missing/", "/throttled/")]
+    assert dict(run_crawl(jobs, parse_title, rate=1000)) == {
+        "/ok/": "ok", "/broken/": None, "/missing/": None, "/throttled/": "later"}
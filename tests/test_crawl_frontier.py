@@ -0,0 +1,47 @@
+import time
+import crawl_frontier
+from crawl_frontier import CrawlFrontier
+
+LISTING = "https://www.doctorbangladesh.com/cardiologist-barisal/"
+PROFILE = "https://www.doctorbangladesh.com/dr-a/"
+
+
+def test_urls_are_deduplicated_after_normalizing(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.sqlite3")) as frontier:
+        assert frontier.add(LISTING, "listing", "barisal")
+        assert not frontier.add("HTTPS://WWW.DOCTORBANGLADESH.COM/cardiologist-barisal/#top", "listing")
+        assert not frontier.add("https://example.com/elsewhere/", "listing")
+        assert frontier.pending() == [(LISTING, "listing")]
+
+
+def test_completing_a_page_queues_its_links(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.sqlite3")) as frontier:
+        frontier.add(LISTING, "listing", "barisal")
+        assert frontier.complete(LISTING, [{"name": "Dr. A", "chamber_link": PROFILE}]) == 1
+        assert frontier.pending() == [(PROFILE, "profile")]
+        assert frontier.done("listing", "barisal")[0][3] == [{"name": "Dr. A", "chamber_link": PROFILE}]
+
+
+def test_failed_urls_are_retried_up_to_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(crawl_frontier, "MAX_ATTEMPTS", 2)
+    with CrawlFrontier(str(tmp_path / "frontier.sqlite3")) as frontier:
+        frontier.add(PROFILE, "profile")
+        frontier.fail(PROFILE)
+        assert frontier.pending() == [(PROFILE, "profile")]
+        frontier.fail(PROFILE)
+        assert frontier.pending() == []
+        assert frontier.stats() == {"profile": {"failed": 1}}
+        # A new crawl tries it again
+        frontier.reset()
+        assert frontier.pending() == [(PROFILE, "profile")]
+
+
+def test_results_from_an_earlier_crawl_are_not_reused(tmp_path):
+    with CrawlFrontier(str(tmp_path / "frontier.sqlite3")) as frontier:
+        frontier.add(PROFILE, "profile")
+        frontier.complete(PROFILE, {"name": "Dr. A"})
+        assert frontier.result(PROFILE) == {"name": "Dr. A"}
+        assert frontier.result(PROFILE, since=time.time() + 1) is None
+        time.sleep(0.01)
+        frontier.reset()
+        assert frontier.result(PROFILE) is None
@@ -0,0 +1,63 @@
+import os
+import metrics
+from crawl_pipeline import run_pipeline
+from http_cache import HttpCache
+
+
+def parse_title(html, url):
+    if "crash" in html:
+        os._exit(1)  # a worker dying, as on a segfault or the OOM killer
+    if "broken" in html:
+        raise ValueError("no title")
+    metrics.SELECTOR_MISSES.inc(parser="parse_title", selector="h1")
+    return html.split("<h1>", 1)[1].split("</h1>", 1)[0]
+
+
+def crawl(site, paths, **kwargs):
+    jobs = [(path, site.url(path)) for path in paths]
+    results, report = run_pipeline(jobs, parse_title, rate=1000, workers=2, batch_size=4, **kwargs)
+    return dict(results), report
+
+
+def test_pages_are_fetched_and_parsed_in_worker_processes(site):
+    paths = [f"/dr-{i}/" for i in range(20)]
+    for i, path in enumerate(paths):
+        site.pages[path] = f"<h1>Dr. {i}</h1>"
+    site.pages["/broken/"] = "<p>no title</p>, broken"
+    metrics.reset()
+    metrics.RECORDS.inc(7, stage="fetch")
+    try:
+        results, report = crawl(site, paths + ["/broken/", "/missing/"])
+        assert results == {**{path: f"Dr. {i}" for i, path in enumerate(paths)}, "/broken/": None, "/missing/": None}
+        assert report["fetch"]["failures"] == 1
+        assert report["parse"]["pages"] == 21 and report["parse"]["failures"] == 1
+        # Counters bumped in the workers come back once; the parent's own are not sent back
+        assert metrics.SELECTOR_MISSES.value(parser="parse_title", selector="h1") == 20
+        assert metrics.RECORDS.value(stage="fetch") == 7
+    finally:
+        metrics.reset()
+
+
+def test_a_dying_worker_only_fails_its_batch(site):
+    paths = [f"/dr-{i}/" for i in range(40)]
+    for i, path in enumerate(paths):
+        site.pages[path] = f"<h1>Dr. {i}</h1>"
+    site.pages["/dr-7/"] = "crash"
+    results, report = crawl(site, paths)
+    assert len(results) == 40 and results["/dr-7/"] is None
+    assert report["parse"]["pool_restarts"] == 1
+    # Only batches already sent to the broken pool fail: at most workers * 2 batches of 4
+    assert 1 <= report["parse"]["failures"] <= 16
+    assert sum(result is not None for result in results.values()) == 40 - report["parse"]["failures"]
+
+
+def test_cached_results_skip_the_parse_stage(site, tmp_path):
+    paths = [f"/dr-{i}/" for i in range(10)]
+    for i, path in enumerate(paths):
+        site.pages[path] = f"<h1>Dr. {i}</h1>"
+    cache = HttpCache(str(tmp_path / "responses.sqlite3"))
+    first, _ = crawl(site, paths, cache=cache)
+    second, report = crawl(site, paths, cache=cache)
+    cache.close()
+    assert first == second
+    assert report["fetch"]["cache_hits"] == 10 and report["parse"]["pages"] == 0
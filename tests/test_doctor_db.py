@@ -0,0 +1,40 @@
+import pytest
+from doctor_db import DoctorDatabase, build_database
+from doctor_store import DoctorStore
+
+
+def test_build_is_skipped_while_the_json_is_unchanged(data_dir):
+    assert build_database(data_dir, data_dir / "doctors.sqlite3", hospitals_dir=data_dir / "no-hospitals") is None
+
+
+def test_a_missing_database_is_not_built_on_open(tmp_path):
+    with pytest.raises(FileNotFoundError, match="python doctor_db.py"):
+        DoctorDatabase(tmp_path / "doctors.sqlite3")
+    assert not (tmp_path / "doctors.sqlite3").exists()
+
+
+def test_queries_match_the_in_memory_store(data_dir):
+    store = DoctorStore(data_dir)
+    store.load()
+    database = DoctorDatabase(data_dir / "doctors.sqlite3")
+    for filters in ({}, {"district": ["Barisal"]}, {"district": ["barisal", "dhaka"]}):
+        expected = store.query(filters, limit=1000)
+        found = database.query(filters, limit=1000)
+        assert found["total"] == expected["total"]
+        assert [d["profile_url"] for d in found["doctors"]] == [d["profile_url"] for d in expected["doctors"]]
+    assert database.facets() == store.facets()
+
+
+def test_fts_search_finds_a_subset_of_the_fuzzy_search(data_dir):
+    store = DoctorStore(data_dir)
+    store.load()
+    database = DoctorDatabase(data_dir / "doctors.sqlite3")
+    for text in ("Rezwan Kaiser", "medicine"):
+        fuzzy = store.search(text, limit=1000)
+        fts = database.search(text, limit=1000)
+        assert 0 < fts["total"] <= fuzzy["total"]
+        assert ({r["doctor"]["profile_url"] for r in fts["results"]}
+                <= {r["doctor"]["profile_url"] for r in fuzzy["results"]})
+    # Typos only match in memory
+    assert store.search("kaisr")["total"] > 0
+    assert database.search("kaisr")["total"] == 0
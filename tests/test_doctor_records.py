@@ -0,0 +1,37 @@
+import json
+from doctor_records import ChamberRecord, DoctorRecord, to_json
+
+
+def sample():
+    return {"name": "Dr. A", "district": "dhaka", "custom": 1,
+            "chambers": [{"name": "Popular Diagnostic", "url": "https://example.com/c/1/"}],
+            "sources": [{"hospital": "General Hospital", "link": ""}], "specialty": "Medicine"}
+
+
+def test_record_reads_like_the_dict():
+    data = sample()
+    record = DoctorRecord.from_dict(data)
+    assert record == data and list(record) == list(data)
+    assert record["custom"] == 1 and record.get("rating", "none") == "none"
+    assert "chambers" in record and "rating" not in record
+    assert isinstance(record["chambers"][0], ChamberRecord)
+    assert {**record, "district": "barisal"}["district"] == "barisal"
+
+
+def test_to_dict_and_json_hook_give_back_the_original_json():
+    data = sample()
+    record = DoctorRecord.from_dict(data)
+    assert record.to_dict() == data
+    assert json.dumps(record, default=to_json) == json.dumps(data)
+
+
+def test_repeated_values_share_one_string():
+    first = DoctorRecord.from_dict({"district": "".join(["dha", "ka"]), "chambers": [{"url": "".join(["u", "1"])}]})
+    second = DoctorRecord.from_dict({"district": "".join(["dha", "ka"]), "chambers": [{"url": "".join(["u", "1"])}]})
+    assert first["district"] is second["district"]
+    assert first["chambers"][0]["url"] is second["chambers"][0]["url"]
+
+
+def test_from_dict_passes_records_through():
+    record = DoctorRecord.from_dict(sample())
+    assert DoctorRecord.from_dict(record) is record
@@ -0,0 +1,46 @@
+import json
+import os
+import shutil
+from doctor_snapshot import DoctorSnapshotFile, write_snapshot
+from doctor_store import SNAPSHOT_FILE, DoctorStore
+
+
+def test_snapshot_records_match_the_json(data_dir):
+    json_store = DoctorStore(data_dir)
+    mapped = DoctorSnapshotFile(data_dir / SNAPSHOT_FILE)
+    doctors = json_store.doctors()
+    assert mapped.count == len(doctors) == 80
+    assert [mapped.record(i) for i in range(mapped.count)] == [doctor.to_dict() for doctor in doctors]
+    assert mapped.signature == [list(entry) for entry in json_store.signature()]
+
+
+def test_snapshot_indexes_match_the_json_store(data_dir):
+    json_store = DoctorStore(data_dir)
+    snapshot_store = DoctorStore(data_dir, use_snapshot=True)
+    for store in (json_store, snapshot_store):
+        store.load()
+    assert snapshot_store.query({"district": ["dhaka"]}, limit=1000) == json_store.query({"district": ["dhaka"]},
+                                                                                         limit=1000)
+    name = json_store.doctors()[5]["name"]
+    assert snapshot_store.search(name, limit=5) == json_store.search(name, limit=5)
+
+
+def test_round_trip_keeps_value_types(tmp_path):
+    doctors = [{"name": "A", "rating": 4.5, "reviews": 12, "verified": True, "photo": None,
+                "chambers": [{"name": "C", "phones": ["+8801711000000"]}], "tags": []}]
+    path = tmp_path / "doctors.snapshot"
+    write_snapshot(doctors, path)
+    assert DoctorSnapshotFile(path).record(0) == doctors[0]
+
+
+def test_stale_snapshot_is_ignored(data_dir, tmp_path):
+    source = tmp_path / "data"
+    shutil.copytree(data_dir, source)
+    path = source / "standardized-barisal.json"
+    with open(path, encoding="utf-8") as f:
+        doctors = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doctors[:10], f, ensure_ascii=False)
+    os.utime(path, ns=(1, 1))  # A signature the snapshot was not written from
+    store = DoctorStore(source, use_snapshot=True)
+    assert len(store.load().doctors) == 50
@@ -0,0 +1,48 @@
+import shutil
+from doctor_store import DoctorStore
+
+
+def test_filters_are_case_insensitive_and_or_repeated_values(store):
+    barisal = store.query({"district": ["Barisal"]}, limit=1000)
+    dhaka = store.query({"district": ["dhaka"]}, limit=1000)
+    both = store.query({"district": ["barisal", "DHAKA"]}, limit=1000)
+    assert barisal["total"] == dhaka["total"] == 40
+    assert both["total"] == 80
+    assert all(doctor["district"] == "barisal" for doctor in barisal["doctors"])
+    assert store.query({"district": ["nowhere"]})["total"] == 0
+
+
+def test_offset_and_cursor_pages_cover_every_match_once(store):
+    filters = {"district": ["barisal", "dhaka"]}
+    everything = [doctor["profile_url"] for doctor in store.query(filters, limit=1000)["doctors"]]
+
+    by_offset = []
+    for offset in range(0, len(everything), 7):
+        by_offset += [doctor["profile_url"] for doctor in store.query(filters, offset=offset, limit=7)["doctors"]]
+    assert by_offset == everything
+
+    by_cursor, cursor = [], None
+    while True:
+        page = store.query(filters, limit=7, cursor=cursor)
+        by_cursor += [doctor["profile_url"] for doctor in page["doctors"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert by_cursor == everything
+
+
+def test_fields_project_each_doctor(store):
+    page = store.query({}, limit=3, fields=["name", "district"])
+    assert page["doctors"] and all(set(doctor) <= {"name", "district"} for doctor in page["doctors"])
+
+
+def test_reload_picks_up_changed_files(data_dir, tmp_path):
+    source = tmp_path / "data"
+    source.mkdir()
+    shutil.copy(data_dir / "standardized-barisal.json", source)
+    store = DoctorStore(source, reload_interval=0)
+    assert store.query({})["total"] == 40
+    version = store.version()
+    shutil.copy(data_dir / "standardized-dhaka.json", source)
+    assert store.query({})["total"] == 80
+    assert store.version() != version
@@ -0,0 +1,34 @@
+from entity_resolution import name_key, resolve_doctors
+
+
+def doctor(name, district, url, specialty="Medicine Specialist", phone="+8801711240969"):
+    return {"name": name, "district": district, "profile_url": url, "specialty": specialty,
+            "chambers": [{"address": f"{district} chamber", "phones": [phone]}]}
+
+
+def test_name_key():
+    assert name_key("Prof. Dr. Mohammad Rezwan Kaiser") == name_key("Dr. Md. Rezwan Kaiser") == "md rezwan kaiser"
+
+
+def test_records_merge_by_profile_url_or_name_and_phone():
+    doctors = [
+        doctor("Dr. Md. A Rahman", "barisal", "https://example.com/a/"),
+        doctor("Dr. Md. A Rahman", "dhaka", "https://example.com/a/"),
+        doctor("Prof. Dr. Mohammad A Rahman", "khulna", "https://example.com/a-2/"),
+        doctor("Dr. B Karim", "dhaka", "https://example.com/b/"),
+    ]
+    resolved, stats = resolve_doctors(doctors)
+    assert stats["records"] == 4 and stats["doctors"] == 2
+    assert stats["merged_by_profile_url"] == 1 and stats["merged_by_name_and_phone"] == 1
+    merged = resolved[0]
+    assert merged["districts"] == ["barisal", "dhaka", "khulna"]
+    assert merged["profile_urls"] == ["https://example.com/a/", "https://example.com/a-2/"]
+    assert len(merged["chambers"]) == 3
+    assert resolved[1]["name"] == "Dr. B Karim"
+
+
+def test_a_shared_number_with_a_different_specialty_is_not_a_match():
+    doctors = [doctor("Dr. A Rahman", "dhaka", "https://example.com/a/", specialty="Cardiology"),
+               doctor("Dr. A Rahman", "dhaka", "https://example.com/other-a/", specialty="Dermatology")]
+    resolved, stats = resolve_doctors(doctors)
+    assert stats["doctors"] == 2
@@ -0,0 +1,45 @@
+import os
+import pytest
+import metrics
+from conftest import load_script
+from html_parsers import available_backends, parse_doctor_articles, parse_doctor_profile, parse_specialty_listing
+
+fixtures = load_script(os.path.join("benchmarks", "site_fixtures.py"))
+BACKENDS = available_backends()
+
+DOCTOR = {"name": "Dr. A", "photo": "https://example.com/a.jpg", "qualification": "MBBS, FCPS",
+          "specialty": "Medicine Specialist", "designation": "Consultant", "workplace": "General Hospital",
+          "rating": "4.5", "profile_url": "https://example.com/doctor/a/",
+          "chambers": [{"name": "Popular Diagnostic", "url": "https://example.com/c/1/", "address": "Road 2, Dhaka",
+                        "visiting_hour": "5pm to 9pm (Closed: Friday)", "appointment": "01711000000"}]}
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_profile_page_parses_back_to_the_record(backend):
+    profile = parse_doctor_profile(fixtures.render_profile(DOCTOR), DOCTOR["profile_url"], backend=backend)
+    assert profile == {key: DOCTOR[key] for key in profile}
+
+
+def test_backends_agree_on_recorded_profiles():
+    pages = [(doctor["profile_url"], fixtures.render_profile(doctor)) for doctor in fixtures.load_profiles(limit=30)]
+    parsed = {backend: [parse_doctor_profile(html, url, backend=backend) for url, html in pages]
+              for backend in BACKENDS}
+    assert all(results == parsed["html.parser"] for results in parsed.values())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_listing_and_archive_pages(backend):
+    card = {"name": "Dr. A", "photo": DOCTOR["photo"], "degree": "MBBS", "specialty": "Medicine",
+            "workplace": "General Hospital", "chamber_link": DOCTOR["profile_url"]}
+    assert parse_specialty_listing(fixtures.render_listing("Medicine", [card]), "listing", backend=backend) == [card]
+    articles = parse_doctor_articles(fixtures.render_archive([DOCTOR]), backend=backend)
+    assert [article["name"] for article in articles] == ["Dr. A"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_missing_elements_are_counted(backend):
+    metrics.reset()
+    profile = parse_doctor_profile("<html><body><p>Not found</p></body></html>", "missing", backend=backend)
+    assert profile["name"] is None and profile["chambers"] == []
+    assert metrics.SELECTOR_MISSES.value(parser="profile", selector="header.entry-header h1.entry-title") == 1
+    metrics.reset()
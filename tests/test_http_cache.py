@@ -0,0 +1,48 @@
+import html_parsers
+from http_cache import HttpCache, fetch_parsed, parser_key
+
+parsed = []
+
+
+def parse_title(html, url):
+    parsed.append(url)
+    return {"title": html.split("<h1>", 1)[1].split("</h1>", 1)[0]}
+
+
+def test_unchanged_pages_are_revalidated_and_not_parsed_again(site, tmp_path):
+    site.pages["/dr-a/"] = "<h1>Dr. A</h1>"
+    url = site.url("/dr-a/")
+    cache = HttpCache(str(tmp_path / "responses.sqlite3"))
+    parsed.clear()
+    assert fetch_parsed(url, parse_title, cache) == {"title": "Dr. A"}
+    assert fetch_parsed(url, parse_title, cache) == {"title": "Dr. A"}
+    assert parsed == [url]
+    assert site.requests[0][1] is None and site.requests[1][1] is not None
+    assert cache.stats["not_modified"] == 1
+
+    site.pages["/dr-a/"] = "<h1>Dr. A, MBBS</h1>"
+    assert fetch_parsed(url, parse_title, cache) == {"title": "Dr. A, MBBS"}
+    assert parsed == [url, url]
+    cache.close()
+
+
+def test_a_304_for_a_url_without_a_stored_body_resolves_to_none(tmp_path):
+    cache = HttpCache(str(tmp_path / "responses.sqlite3"))
+    assert cache.conditional_headers("https://example.com/") == {}
+    assert cache.resolve("https://example.com/", 304, {}, None, parse_title) is None
+    assert cache.stats["uncached"] == 1
+    cache.close()
+
+
+def test_results_of_another_parser_version_are_not_reused(site, tmp_path, monkeypatch):
+    site.pages["/dr-a/"] = "<h1>Dr. A</h1>"
+    url = site.url("/dr-a/")
+    cache = HttpCache(str(tmp_path / "responses.sqlite3"))
+    parsed.clear()
+    fetch_parsed(url, parse_title, cache)
+    key = parser_key(parse_title)
+    monkeypatch.setattr(html_parsers, "PARSER_BACKEND", html_parsers.PARSER_BACKEND + "-other")
+    assert parser_key(parse_title) != key
+    assert fetch_parsed(url, parse_title, cache) == {"title": "Dr. A"}
+    assert parsed == [url, url]  # a 304, but parsed again from the stored body
+    cache.close()
@@ -0,0 +1,49 @@
+import pytest
+import requests
+import http_client
+import rate_limiter
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backoff_delay", lambda attempt, retry_after=None: 0)
+    http_client.stats.reset()
+
+
+def test_throttled_responses_are_retried(site, no_backoff):
+    site.pages["/a"] = "<h1>a</h1>"
+    site.statuses["/a"] = [503, 429]
+    response = http_client.fetch(site.url("/a"))
+    assert response.status_code == 200 and response.text == "<h1>a</h1>"
+    summary = http_client.stats.summary()
+    assert summary["requests"] == 3 and summary["retries"] == 2
+    assert summary["status_codes"] == {503: 1, 429: 1, 200: 1}
+
+
+def test_other_errors_are_returned_as_is(site, no_backoff):
+    response = http_client.fetch(site.url("/missing"))
+    assert response.status_code == 404
+    assert len(site.requests) == 1 and http_client.stats.summary()["retries"] == 0
+
+
+def test_gives_up_after_the_last_retry(site, no_backoff):
+    site.pages["/a"] = "<h1>a</h1>"
+    site.statuses["/a"] = [503] * 5
+    assert http_client.fetch(site.url("/a"), retries=2).status_code == 503
+    assert len(site.requests) == 3
+
+
+def test_connection_errors_raise_after_retries(site, no_backoff):
+    url = site.url("/a")
+    site.server.shutdown()
+    site.server.server_close()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.fetch(url, retries=1)
+    assert http_client.stats.summary()["errors"] == 2
+
+
+def test_one_shared_session_until_reconfigured():
+    session = http_client.get_session()
+    assert http_client.get_session() is session
+    replaced = http_client.configure(pool_size=4)
+    assert replaced is not session and http_client.get_session() is replaced
@@ -0,0 +1,45 @@
+import json
+import os
+import pytest
+from jsonl_io import JsonlWriter, iter_records, latest_outputs, output_path
+
+
+def test_records_appear_only_on_commit(tmp_path):
+    path = str(tmp_path / "doctors.jsonl")
+    writer = JsonlWriter(path)
+    writer.write({"name": "Dr. A"})
+    writer.write({"name": "ডা. বি"})
+    assert not os.path.exists(path)
+    writer.commit()
+    assert list(iter_records(path)) == [{"name": "Dr. A"}, {"name": "ডা. বি"}]
+    assert writer.count == 2
+
+
+def test_an_exception_discards_the_records(tmp_path):
+    path = tmp_path / "doctors.jsonl"
+    path.write_text('{"name": "kept"}\n', encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with JsonlWriter(str(path)) as writer:
+            writer.write({"name": "lost"})
+            raise RuntimeError("crawl interrupted")
+    assert list(iter_records(path)) == [{"name": "kept"}]
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_json_documents_and_invalid_lines(tmp_path):
+    document = tmp_path / "doctors.json"
+    document.write_text(json.dumps({"district": "x", "doctors": [{"name": "Dr. A"}]}), encoding="utf-8")
+    assert list(iter_records(document, key="doctors")) == [{"name": "Dr. A"}]
+    lines = tmp_path / "doctors.jsonl"
+    lines.write_text('{"name": "Dr. A"}\n{"name": "Dr. B\n\n{"name": "Dr. C"}\n', encoding="utf-8")
+    assert [record["name"] for record in iter_records(lines)] == ["Dr. A", "Dr. C"]
+
+
+def test_the_most_recently_written_format_wins(tmp_path):
+    old, new = tmp_path / "doctors-a.json", tmp_path / "doctors-a.jsonl"
+    old.write_text("[]", encoding="utf-8")
+    new.write_text("", encoding="utf-8")
+    os.utime(old, ns=(1, 1))
+    (tmp_path / "doctors-b.json.tmp").write_text("", encoding="utf-8")
+    assert latest_outputs(tmp_path.iterdir()) == [new]
+    assert output_path("out/doctors-a.json", "jsonl") == "out/doctors-a.jsonl"
@@ -0,0 +1,40 @@
+import metrics
+from page_archive import PageArchive, replay
+
+PAGE = '<html><body><h1 class="entry-title">{}</h1></body></html>'
+
+
+def parse_title(html, url):
+    metrics.SELECTOR_MISSES.inc(parser="parse_title", selector="h1")
+    return html.split('entry-title">', 1)[1].split("<", 1)[0]
+
+
+def test_merge_adds_drained_counts():
+    registry = metrics.Registry()
+    worker = metrics.Registry()
+    registry.counter("pages_total", "Pages", ("status",)).inc(3, status=200)
+    worker.counter("pages_total", "Pages", ("status",)).inc(2, status=200)
+    registry.merge(worker.drain())
+    assert registry.counter("pages_total", "Pages", ("status",)).value(status=200) == 5
+    assert worker.drain() == [("pages_total", "Pages", ("status",), {})]
+
+
+def test_replay_workers_do_not_send_back_the_parents_counts(tmp_path):
+    archive = PageArchive(str(tmp_path))
+    urls = [f"https://example.com/doctor/{i}/" for i in range(40)]
+    for i, url in enumerate(urls):
+        archive.append(url, 200, {}, PAGE.format(f"Doctor {i}"))
+    archive.close()
+    metrics.reset()
+    metrics.FETCH_RESPONSES.inc(100, status=200)
+    metrics.RECORDS.inc(50, stage="fetch")
+    try:
+        results, report = replay([(url, url) for url in urls], parse_title, archive=PageArchive(str(tmp_path)),
+                                 workers=4, batch_size=5)
+        assert report["pages"] == 40 and report["failures"] == 0
+        assert sorted(result for _, result in results) == sorted(f"Doctor {i}" for i in range(40))
+        assert metrics.FETCH_RESPONSES.value(status=200) == 100
+        assert metrics.RECORDS.value(stage="fetch") == 50
+        assert metrics.SELECTOR_MISSES.value(parser="parse_title", selector="h1") == 40
+    finally:
+        metrics.reset()
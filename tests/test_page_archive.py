@@ -0,0 +1,66 @@
+import json
+import os
+import pytest
+from conftest import load_script
+from html_parsers import parse_doctor_profile
+from page_archive import PageArchive, replay
+
+render_profile = load_script(os.path.join("benchmarks", "site_fixtures.py")).render_profile
+URL = "https://www.doctorbangladesh.com/dr-{}/".format
+
+
+def profile(name, **fields):
+    return render_profile({"name": name, "qualification": "MBBS", "specialty": "Medicine", "designation": "Consultant",
+                           "workplace": "General Hospital", **fields})
+
+
+def test_pages_round_trip_and_unchanged_bodies_are_stored_once(tmp_path):
+    with PageArchive(str(tmp_path)) as archive:
+        archive.append(URL("a"), 200, {"ETag": '"1"'}, profile("Dr. A"))
+        archive.append(URL("a"), 200, {"ETag": '"1"'}, profile("Dr. A"))
+        archive.append(URL("b"), 200, {}, profile("Dr. B"))
+        assert archive.stats["stored"] == 2 and archive.stats["unchanged"] == 1
+    with open(tmp_path / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"url": "https://www.doctorbangladesh.com/dr-c/", "da')  # torn by a crash
+    archive = PageArchive(str(tmp_path))
+    assert sorted(archive.latest()) == [URL("a"), URL("b")]
+    assert archive.page(URL("a")) == profile("Dr. A")
+    assert archive.page(URL("c")) is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_parses_each_url_once_and_reports_missing_ones(tmp_path, workers):
+    with PageArchive(str(tmp_path)) as archive:
+        for name in "abcd":
+            archive.append(URL(name), 200, {}, profile(f"Dr. {name.upper()}"))
+    jobs = [("a1", URL("a")), ("a2", URL("a")), ("b", URL("b")), ("c", URL("c")), ("d", URL("d")),
+            ("gone", URL("gone"))]
+    results, report = replay(jobs, parse_doctor_profile, archive=PageArchive(str(tmp_path)), workers=workers,
+                             batch_size=2)
+    names = {key: result and result["name"] for key, result in results}
+    assert names == {"a1": "Dr. A", "a2": "Dr. A", "b": "Dr. B", "c": "Dr. C", "d": "Dr. D", "gone": None}
+    assert report["pages"] == 4 and report["missing"] == 1 and report["failures"] == 0
+
+
+def test_from_archive_keeps_saved_records_of_profiles_it_does_not_have(districts, tmp_path, monkeypatch):
+    archive_dir = str(tmp_path / "archive")
+    monkeypatch.setattr(districts, "PageArchive", lambda: PageArchive(archive_dir))
+    saved = {"district": "testdistrict", "doctors": [
+        {"name": f"Dr. {name.upper()}", "specialty": "Old", "chamber_link": f"https://example.com/doctor/{name}/",
+         "hospital_name": "General Hospital", "hospital_link": "", "source_hospital": "General Hospital",
+         "source_hospital_link": ""} for name in "abc"]}
+    os.makedirs(os.path.dirname(districts.output_file("testdistrict", "json")))
+    with open(districts.output_file("testdistrict", "json"), "w", encoding="utf-8") as f:
+        json.dump(saved, f)
+    with PageArchive(archive_dir) as archive:
+        archive.append("https://example.com/doctor/a/", 200, {}, profile("Dr. A", specialty="New"))
+
+    districts.process_district("testdistrict", from_archive=True)
+
+    with open(districts.output_file("testdistrict", "json"), encoding="utf-8") as f:
+        doctors = {doctor["name"]: doctor for doctor in json.load(f)["doctors"]}
+    assert sorted(doctors) == ["Dr. A", "Dr. B", "Dr. C"]
+    assert doctors["Dr. A"]["specialty"] == "New"
+    assert doctors["Dr. B"]["specialty"] == doctors["Dr. C"]["specialty"] == "Old"
+    # Archive data never goes in the journal a network run would resume from
+    assert not os.path.exists(districts.checkpoint_path("testdistrict"))
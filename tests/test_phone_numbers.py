@@ -0,0 +1,27 @@
+import pytest
+from phone_numbers import extract_phones, normalize_phone
+
+
+@pytest.mark.parametrize("text", ["+8801711240969", "01711240969", "01711-240969", "+88 01711240969",
+                                  "8801711240969"])
+def test_mobile_numbers_normalize_to_e164(text):
+    assert normalize_phone(text) == "+8801711240969"
+
+
+def test_numbers_that_are_not_phones():
+    assert normalize_phone("10606") is None
+    assert normalize_phone("") is None
+
+
+def test_extract_phones():
+    assert extract_phones("+8801407-075714-5") == ["+8801407075714", "+8801407075715"]
+    assert extract_phones("+8809609004444 (Press 0 after calling for operator help)") == ["+8809609004444"]
+    assert extract_phones("01782402628, 01782402628 or 01817706725") == ["+8801782402628", "+8801817706725"]
+
+
+def test_lookup_by_any_spelling(store):
+    found = store.lookup_phone("01711-240969")
+    assert found["phone"] == "+8801711240969"
+    assert any("Rezwan Kaiser" in match["name"] for match in found["matches"])
+    assert store.lookup_phone("+8801711240969") == found
+    assert store.lookup_phone("01999999999") is None
@@ -0,0 +1,76 @@
+import pytest
+import rate_limiter
+from rate_limiter import HostRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_a_burst_then_one_request_per_token(clock):
+    limiter = HostRateLimiter("example.com", rate=2.0, burst=2)
+    assert [limiter.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.sleep(10)
+    assert limiter.reserve() == 0.0
+
+
+def test_throttling_halves_the_rate_once_per_cooldown(clock):
+    limiter = HostRateLimiter("example.com", rate=4.0)
+    limiter.record(429)
+    limiter.record(503)  # same throttle episode
+    assert limiter.rate == 2.0
+    clock.sleep(rate_limiter.DECREASE_COOLDOWN)
+    limiter.record(None)
+    assert limiter.rate == 1.0 and limiter.throttled == 2
+    limiter.record(200, latency=0.1)
+    assert limiter.rate == pytest.approx(1.0 + rate_limiter.INCREASE_STEP)
+
+
+def test_rising_latency_slows_down(clock):
+    limiter = HostRateLimiter("example.com", rate=5.0)
+    limiter.record(200, latency=0.2)
+    limiter.record(200, latency=2.0)
+    assert limiter.rate == pytest.approx((5.0 + rate_limiter.INCREASE_STEP) * rate_limiter.SLOW_FACTOR)
+    assert limiter.slowdowns == 1
+
+
+def test_requests_queued_during_retry_after_are_spaced_after_it(clock):
+    limiter = HostRateLimiter("example.com", rate=2.0, burst=2)
+    limiter.record(429, retry_after=5)  # rate halves to 1/s
+    waits = [limiter.reserve() for _ in range(4)]
+    assert waits == pytest.approx([5.0, 6.0, 7.0, 8.0])
+
+
+def test_configure_keeps_learned_rates_within_new_bounds(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(rate_limiter, "_defaults", dict(rate_limiter._defaults))
+    limiter = rate_limiter.limiter_for("https://example.com/a")
+    assert rate_limiter.limiter_for("https://EXAMPLE.com/b") is limiter
+    limiter.record(429)
+    learned = limiter.rate
+    rate_limiter.configure(rate=8.0)
+    assert limiter.rate == learned
+    assert rate_limiter.limiter_for("https://other.example/").rate == 8.0
+    rate_limiter.configure(max_rate=learned / 2)
+    assert limiter.rate == learned / 2
+
+
+def test_retry_after_and_backoff():
+    assert rate_limiter.parse_retry_after("3") == 3.0
+    assert rate_limiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert 0 <= rate_limiter.backoff_delay(2) <= 4 * rate_limiter.BACKOFF_BASE
+    assert rate_limiter.backoff_delay(0, retry_after=30) == 30
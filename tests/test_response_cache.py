@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from response_cache import ResponseCache
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return self.calls
+
+
+def test_fresh_values_come_from_memory():
+    loader = Loader()
+    cache = ResponseCache(loader, ttl=60)
+    assert cache.get() == 1
+    assert cache.get() == 1
+    assert loader.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_concurrent_misses_share_one_fetch():
+    loader = Loader(delay=0.1)
+    cache = ResponseCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8
+    assert loader.calls == 1
+
+
+def test_stale_values_are_served_while_one_refresh_runs():
+    loader = Loader(delay=0.05)
+    cache = ResponseCache(loader, ttl=0.01, stale_ttl=60)
+    assert cache.get() == 1
+    time.sleep(0.02)
+    assert cache.get() == 1  # stale, refreshing in the background
+    assert cache.get() == 1
+    assert loader.calls == 2  # one refresh, however many stale hits
+    time.sleep(0.1)
+    assert cache.get() == 2
+
+
+def test_a_failed_refresh_keeps_the_stale_value():
+    loader = Loader()
+    cache = ResponseCache(loader, ttl=0.01, stale_ttl=60)
+    cache.get()
+    loader.fail = True
+    time.sleep(0.02)
+    assert cache.get() == 1
+    time.sleep(0.05)
+    assert cache.get() == 1
+    assert cache.stats()["refresh_errors"] >= 1
+
+
+def test_no_value_at_all_raises():
+    loader = Loader()
+    loader.fail = True
+    with pytest.raises(RuntimeError, match="upstream down"):
+        ResponseCache(loader).get()
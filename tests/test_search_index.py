@@ -0,0 +1,39 @@
+from search_index import SearchIndex, tokenize
+
+DOCTORS = [
+    {"name": "Dr. Md. Rezwan Kaiser", "specialty": "Dermatology", "chambers": [{"address": "Barisal"}]},
+    {"name": "Dr. Rezaul Karim", "specialty": "Medicine", "qualification": "MBBS, FCPS (Medicine)"},
+    {"name": "Dr. Kaiser Ahmed", "specialty": "Cardiology", "chambers": [{"address": "Dhaka"}]},
+]
+
+
+def test_tokenize():
+    assert tokenize("Dr. Md. Rezwan-Kaiser (DU)") == ["dr", "md", "rezwan", "kaiser", "du"]
+    assert tokenize(None) == []
+
+
+def test_records_matching_more_tokens_rank_first():
+    ranked = [position for _, position in SearchIndex(DOCTORS).search("Rezwan Kaiser")]
+    assert ranked[0] == 0
+    assert 2 in ranked
+
+
+def test_prefixes_and_typos_match():
+    index = SearchIndex(DOCTORS)
+    assert [position for _, position in index.search("derma")] == [0]
+    assert {position for _, position in index.search("kaisr")} == {0, 2}
+    assert index.search("cardiolgy")[0][1] == 2
+
+
+def test_name_hits_outrank_other_fields():
+    doctors = [{"name": "Dr. A", "specialty": "Medicine"}, {"name": "Dr. Medicine"}]
+    assert SearchIndex(doctors).search("medicine")[0][1] == 1
+
+
+def test_store_search_pages_and_projects(store):
+    first = store.search("medicine", limit=3, fields=["name", "profile_url"])
+    second = store.search("medicine", offset=3, limit=3, fields=["name", "profile_url"])
+    assert first["total"] == second["total"] > 3
+    assert all(set(result["doctor"]) == {"name", "profile_url"} for result in first["results"])
+    urls = [result["doctor"]["profile_url"] for result in first["results"] + second["results"]]
+    assert len(set(urls)) == 6
@@ -0,0 +1,42 @@
+import json
+from doctor_db import DoctorDatabase
+from standardize_doctor_data import standardize_record
+from standardize_pipeline import standardize_all
+
+
+def write_details(directory, district, names):
+    doctors = [{"name": f"Dr. {name}", "chamber_link": f"https://www.doctorbangladesh.com/dr-{name.lower()}/",
+                "specialty": "Medicine", "hospital_name": "General Hospital",
+                "chambers": [{"visiting_hour": "5pm to 8pm (Closed: Friday)", "appointment": "01711-240969"}]}
+               for name in names]
+    with open(directory / f"doctors-details-{district}.json", "w", encoding="utf-8") as f:
+        json.dump({"district": district, "doctors": doctors}, f)
+
+
+def test_only_changed_districts_are_standardized_again(tmp_path):
+    input_dir, output_dir = tmp_path / "details", tmp_path / "standardized"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    write_details(input_dir, "barisal", ["A", "B", "A"])
+    write_details(input_dir, "dhaka", ["C"])
+
+    summary = standardize_all(standardize_record, input_dir, output_dir, workers=2, snapshot=True, database=True)
+    assert summary["processed"] == 2 and summary["skipped"] == 0
+    assert summary["doctors"] == 3 and summary["duplicates"] == 1
+    assert summary["visiting_hours_parsed"] == 3
+    with open(output_dir / "standardized-barisal.json", encoding="utf-8") as f:
+        barisal = json.load(f)
+    assert [doctor["name"] for doctor in barisal] == ["Dr. A", "Dr. B"]
+    assert barisal[0]["chambers"][0]["phones"] == ["+8801711240969"]
+    assert summary["snapshot"] and summary["database"] == 3
+    assert DoctorDatabase(output_dir / "doctors.sqlite3").query({})["total"] == 3
+
+    summary = standardize_all(standardize_record, input_dir, output_dir, snapshot=True, database=True)
+    assert summary["processed"] == 0 and summary["skipped"] == 2
+    assert summary["combined"] is None and summary["database"] is None
+
+    write_details(input_dir, "dhaka", ["C", "D"])
+    summary = standardize_all(standardize_record, input_dir, output_dir, database=True)
+    assert summary["processed"] == 1 and summary["skipped"] == 1
+    assert summary["doctors"] == 4 and summary["combined"]
+    assert DoctorDatabase(output_dir / "doctors.sqlite3").query({})["total"] == 4
@@ -0,0 +1,41 @@
+import json
+import shutil
+import time
+from static_shards import MANIFEST_FILE, assign_slugs, build_shards, slug
+
+
+def test_slugs_are_predictable_and_only_collisions_get_a_hash():
+    assert slug("Cardiology Specialist") == "cardiology-specialist"
+    names = assign_slugs(["medicine", "medicine!", "নাক কান গলা"])
+    assert names["medicine"] == "medicine"
+    assert names["medicine!"].startswith("medicine-") and len(names["medicine!"]) == len("medicine-") + 8
+    assert len(names["নাক কান গলা"]) == 8
+
+
+def test_builds_are_incremental(data_dir, tmp_path, monkeypatch):
+    source = tmp_path / "data"
+    shutil.copytree(data_dir, source)
+    static = tmp_path / "static"
+    first = build_shards(source, static)
+    assert first["written"] == first["shards"] > 0
+    manifest = json.loads((static / MANIFEST_FILE).read_text(encoding="utf-8"))
+    assert manifest["doctors"] == 80
+    assert manifest["districts"]["barisal"]["total"] == 40
+    shard = json.loads((static / "doctors" / "district" / "barisal.json").read_text(encoding="utf-8"))
+    assert shard["total"] == 40 and len(shard["doctors"]) == 40
+
+    assert build_shards(source, static)["written"] == 0
+
+    # Rewriting every shard with the same content leaves the manifest untouched, later on too
+    written = (static / MANIFEST_FILE).stat().st_mtime_ns
+    monkeypatch.setattr(time, "strftime", lambda *args: "a later time")
+    assert build_shards(source, static, force=True)["written"] == first["shards"]
+    assert (static / MANIFEST_FILE).stat().st_mtime_ns == written
+
+    # A district that goes away takes its shards with it
+    (source / "standardized-dhaka.json").unlink()
+    summary = build_shards(source, static)
+    assert summary["removed"] > 0
+    assert not (static / "doctors" / "district" / "dhaka.json").exists()
+    assert not (static / "doctors" / "district" / "dhaka").exists()
+    assert "dhaka" not in json.loads((static / MANIFEST_FILE).read_text(encoding="utf-8"))["districts"]